@@ -5,17 +5,56 @@ to avoid the sql client library issues
 """
 
 import os
+import threading
+import time
 import requests
 import json
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 import pytz
 from dotenv import load_dotenv
+from tracing import set_attribute, span, traced
+from metrics import SQL_RESPONSE_BYTES, WAREHOUSE_ERRORS, record_cache, statement_class, timed_sql
+from statement_log import record_statement
+from demo_repository import DemoNotFound, DemoRepository, NotDemoOwner, UpdateConflict
 
 load_dotenv()
 
-class APIBasedDatabaseManager:
-    """REST API based Database Manager"""
+# Facet counts are shared by all users and change only on writes
+FACET_CACHE_TTL_SECONDS = int(os.getenv("FACET_CACHE_TTL_SECONDS", "60"))
+_facet_cache = {"value": None, "expires_at": 0.0}
+_facet_cache_lock = threading.Lock()
+
+# Filters accepted by get_demos and the predicate each one becomes
+FILTER_COLUMNS = {
+    "status": "status = {value}",
+    "confidentiality": "confidentiality = {value}",
+    "owner": "owner_emp_id = {value}",
+    "product": "array_contains(products, {value})",
+}
+
+# updated_at is the row version of conditional updates, so writes keep microseconds
+# (two saves within the same second must not produce the same version)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Column projections of the single-demo reads (each ships only what its caller uses)
+DETAIL_COLUMNS = ["demo_id", "all_info_md"]
+OWNERSHIP_COLUMNS = ["demo_id", "owner_emp_id"]
+UPDATE_FORM_COLUMNS = [
+    "demo_id", "title", "summary", "description_md", "owner_emp_id", "creator_emp_id",
+    "status", "demo_url", "repo_url", "products", "confidentiality", "remarks",
+    # The version the form was loaded at (the update is applied only if it is unchanged)
+    "created_at", "updated_at",
+]
+
+def invalidate_facet_cache():
+    """Drop cached facet counts (call after writes to the demos table)"""
+    with _facet_cache_lock:
+        _facet_cache["value"] = None
+        _facet_cache["expires_at"] = 0.0
+
+class APIBasedDatabaseManager(DemoRepository):
+    """REST API based Database Manager (the "rest" repository backend)"""
     
     def __init__(self, user_token: str = None):
         self.server_hostname = os.getenv("DATABRICKS_SERVER_HOSTNAME", "adb-984752964297111.11.azuredatabricks.net")
@@ -32,10 +71,20 @@ class APIBasedDatabaseManager:
                 # No token available - will cause authentication errors downstream
                 self.access_token = None
         
-        self.base_url = f"https://{self.server_hostname}/api/2.0/sql/statements"
+        # A scheme may be given to point at a local stand-in (python dev_server.py)
+        if self.server_hostname.startswith(("http://", "https://")):
+            self.server_url = self.server_hostname.rstrip("/")
+        else:
+            self.server_url = f"https://{self.server_hostname}"
+        self.base_url = f"{self.server_url}/api/2.0/sql/statements"
         
-    def execute_query_api(self, query: str) -> List[Dict]:
-        """Execute query using Databricks REST API"""
+    @timed_sql
+    @traced("sql.execute_query_api")
+    def execute_query_api(self, query: str, timeout: Optional[float] = None, query_name: Optional[str] = None) -> List[Dict]:
+        """Execute query using Databricks REST API (timeout in seconds, None waits indefinitely)
+
+        query_name labels the response size metric (defaults to the statement class).
+        """
         if not self.access_token:
             raise ValueError("No access token available for database operations. Please ensure user authentication is properly configured.")
         
@@ -53,8 +102,16 @@ class APIBasedDatabaseManager:
             "disposition": "INLINE"
         }
         
+        set_attribute("statement", " ".join(query.split())[:120])
+        started = time.perf_counter()
+        response = result = error = None
         try:
-            response = requests.post(self.base_url, headers=headers, json=payload)
+            response = requests.post(self.base_url, headers=headers, json=payload, timeout=timeout)
+            set_attribute("http_status", response.status_code)
+            set_attribute("bytes", len(response.content))
+            
+            if response.status_code >= 400:
+                WAREHOUSE_ERRORS.inc(status=str(response.status_code))
             
             # Handle authentication errors
             if response.status_code == 403:
@@ -65,6 +122,8 @@ class APIBasedDatabaseManager:
             response.raise_for_status()
             
             result = response.json()
+            set_attribute("statement_id", result.get("statement_id"))
+            set_attribute("state", result.get("status", {}).get("state"))
             
             # Check if the query was successful
             if result.get("status", {}).get("state") == "SUCCEEDED":
@@ -84,17 +143,166 @@ class APIBasedDatabaseManager:
                     for row in rows:
                         results.append(dict(zip(columns, row)))
                     
+                    set_attribute("rows", len(results))
                     return results
                 else:
                     return []
             else:
+                WAREHOUSE_ERRORS.inc(status=result.get("status", {}).get("state", "UNKNOWN"))
                 return []
                 
+        except requests.exceptions.HTTPError as e:
+            error = str(e)
+            set_attribute("error", error)
+            return []
         except requests.exceptions.RequestException as e:
+            WAREHOUSE_ERRORS.inc(status="timeout" if isinstance(e, requests.exceptions.Timeout) else "connection")
+            error = str(e)
+            set_attribute("error", error)
             return []
         except Exception as e:
+            error = str(e)
+            set_attribute("error", error)
             return []
-    
+        finally:
+            self.log_statement(query, started, response, result, error)
+            if response is not None:
+                SQL_RESPONSE_BYTES.observe(len(response.content), query=query_name or statement_class(query))
+
+    def log_statement(self, query: str, started: float, response=None, result: Optional[Dict] = None, error: Optional[str] = None):
+        """Record a finished statement for the per-fingerprint aggregates and the slow log"""
+        result = result if isinstance(result, dict) else {}
+        state = result.get("status", {}).get("state")
+        if state is None and response is not None and response.status_code >= 400:
+            state = f"HTTP_{response.status_code}"
+        record_statement(
+            query, (time.perf_counter() - started) * 1000,
+            statement_id=result.get("statement_id"),
+            state=state,
+            rows=result.get("manifest", {}).get("total_row_count"),
+            response_bytes=len(response.content) if response is not None else None,
+            error=error or result.get("status", {}).get("error", {}).get("message"),
+            fetch_warehouse_metrics=self.get_statement_metrics
+        )
+
+    def get_statement_metrics(self, statement_id: str, timeout: float = 30) -> Optional[Dict]:
+        """Warehouse-reported status and timing breakdown of a statement (query history API)"""
+        response = requests.get(
+            f"{self.server_url}/api/2.0/sql/history/queries",
+            headers={"Authorization": f"Bearer {self.access_token}"},
+            params={"filter_by.statement_ids": statement_id, "include_metrics": "true"},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        queries = response.json().get("res", [])
+        if not queries:
+            return None
+        query_info = queries[0]
+        query_metrics = query_info.get("metrics", {})
+        # Time spent waiting for a warehouse to start (provisioning) or for capacity (overloading)
+        queue_start = query_metrics.get("provisioning_queue_start_timestamp") or query_metrics.get("overloading_queue_start_timestamp")
+        compilation_start = query_metrics.get("query_compilation_start_timestamp")
+        return {
+            "status": query_info.get("status"),
+            "duration_ms": query_info.get("duration"),
+            "total_time_ms": query_metrics.get("total_time_ms"),
+            "queued_time_ms": compilation_start - queue_start if queue_start and compilation_start else 0,
+            "compilation_time_ms": query_metrics.get("compilation_time_ms"),
+            "execution_time_ms": query_metrics.get("execution_time_ms"),
+            "result_fetch_time_ms": query_metrics.get("result_fetch_time_ms"),
+            "rows_produced": query_metrics.get("rows_produced_count"),
+            "read_bytes": query_metrics.get("read_bytes"),
+        }
+
+    def iter_query_chunks(self, query: str, timeout: Optional[float] = 60, poll_interval: float = 1.0,
+                          large_result: bool = False) -> Iterator[Tuple[List[str], List[List]]]:
+        """Execute query and yield (columns, rows) one result chunk at a time
+
+        Follows next_chunk_internal_link so that large results are never held in memory at once.
+        INLINE results are capped at 25 MiB, so with large_result the chunks are downloaded
+        from EXTERNAL_LINKS instead. Unlike execute_query_api, errors are raised (a partial
+        export must not look complete).
+        """
+        if not self.access_token:
+            raise ValueError("No access token available for database operations. Please ensure user authentication is properly configured.")
+
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        payload = {
+            "statement": query,
+            "warehouse_id": self.warehouse_id,
+            "format": "JSON_ARRAY",
+            "disposition": "EXTERNAL_LINKS" if large_result else "INLINE",
+            "wait_timeout": "30s",
+            "on_wait_timeout": "CONTINUE"
+        }
+
+        started = time.perf_counter()
+        with requests.Session() as session:
+            session.headers.update(headers)
+            # Spans never stay open across a yield (the consumer runs between chunks)
+            with span("sql.iter_query_chunks", statement=" ".join(query.split())[:120]) as query_span:
+                response = result = None
+                try:
+                    response = session.post(self.base_url, json=payload, timeout=timeout)
+                    response.raise_for_status()
+                    result = response.json()
+
+                    # Long statements keep running on the warehouse; poll until they finish
+                    statement_id = result.get("statement_id")
+                    while result.get("status", {}).get("state") in ("PENDING", "RUNNING"):
+                        time.sleep(poll_interval)
+                        response = session.get(f"{self.base_url}/{statement_id}", timeout=timeout)
+                        response.raise_for_status()
+                        result = response.json()
+                except requests.exceptions.RequestException as e:
+                    self.log_statement(query, started, response, result, str(e))
+                    raise
+                # Timed until the first chunk is available (later chunks are paced by the consumer)
+                self.log_statement(query, started, response, result)
+
+                status = result.get("status", {})
+                manifest = result.get("manifest", {})
+                if query_span:
+                    query_span.set_attribute("statement_id", statement_id)
+                    query_span.set_attribute("state", status.get("state"))
+                    query_span.set_attribute("rows", manifest.get("total_row_count"))
+                    query_span.set_attribute("chunks", manifest.get("total_chunk_count"))
+                    query_span.set_attribute("bytes", len(response.content))
+
+            if status.get("state") != "SUCCEEDED":
+                WAREHOUSE_ERRORS.inc(status=status.get("state", "UNKNOWN"))
+                message = status.get("error", {}).get("message", status.get("state"))
+                raise Exception(f"Statement {statement_id} failed: {message}")
+
+            columns = [col["name"] for col in manifest.get("schema", {}).get("columns", [])]
+            chunk = result.get("result", {})
+            while chunk:
+                if "external_links" in chunk:
+                    links = chunk["external_links"]
+                    for link in links:
+                        yield columns, self.download_external_chunk(link, statement_id, timeout)
+                    next_link = links[-1].get("next_chunk_internal_link") if links else None
+                else:
+                    yield columns, chunk.get("data_array", [])
+                    next_link = chunk.get("next_chunk_internal_link")
+                if not next_link:
+                    break
+                with span("sql.fetch_chunk", statement_id=statement_id) as chunk_span:
+                    response = session.get(f"{self.server_url}{next_link}", timeout=timeout)
+                    response.raise_for_status()
+                    chunk = response.json()
+                    if chunk_span:
+                        chunk_span.set_attribute("bytes", len(response.content))
+
+    def download_external_chunk(self, link: Dict, statement_id: Optional[str], timeout: Optional[float] = 60) -> List[List]:
+        """Rows of one EXTERNAL_LINKS chunk (presigned URL: fetched without the Authorization header)"""
+        with span("sql.fetch_chunk", statement_id=statement_id) as chunk_span:
+            response = requests.get(link["external_link"], timeout=timeout)
+            response.raise_for_status()
+            if chunk_span:
+                chunk_span.set_attribute("bytes", len(response.content))
+            return response.json()
+
     def test_connection(self) -> bool:
         """Test API connection"""
         try:
@@ -104,8 +312,18 @@ class APIBasedDatabaseManager:
             print(f"Connection test failed: {e}")
             return False
     
-    def get_demos(self, page: int = 1, sort_column: str = "created_at", sort_order: str = "ASC") -> Tuple[List[Dict], int]:
-        """Get paginated demo list with sorting"""
+    def build_where_clause(self, filters: Optional[Dict[str, str]]) -> str:
+        """Build a WHERE clause from {filter name: value}; unknown names and empty values are ignored"""
+        predicates = []
+        for name, value in (filters or {}).items():
+            if name in FILTER_COLUMNS and value:
+                predicates.append(FILTER_COLUMNS[name].format(value=self.escape_sql_string(value)))
+        if not predicates:
+            return ""
+        return "WHERE " + " AND ".join(predicates)
+    
+    def get_demos(self, page: int = 1, sort_column: str = "created_at", sort_order: str = "ASC", filters: Optional[Dict[str, str]] = None) -> Tuple[List[Dict], int]:
+        """Get paginated demo list with sorting and optional filters (status, confidentiality, owner, product)"""
         try:
             ITEMS_PER_PAGE = 10
             
@@ -114,9 +332,10 @@ class APIBasedDatabaseManager:
                 page = 1
             
             offset = (page - 1) * ITEMS_PER_PAGE
+            where_clause = self.build_where_clause(filters)
             
             # Get total count
-            count_query = "SELECT COUNT(*) as total FROM hiroshi.ai_demo_hub.demos"
+            count_query = f"SELECT COUNT(*) as total FROM hiroshi.ai_demo_hub.demos {where_clause}"
             count_result = self.execute_query_api(count_query)
             
             # Convert string to int - API returns all data as strings
@@ -137,7 +356,8 @@ class APIBasedDatabaseManager:
             SELECT demo_id, title, summary, owner_emp_id, creator_emp_id, created_at, updated_at, status, 
                    demo_url, repo_url, products, confidentiality, remarks
             FROM hiroshi.ai_demo_hub.demos
-            ORDER BY {sort_column} {sort_order}
+            {where_clause}
+            ORDER BY {sort_column} {sort_order}, demo_id {sort_order}
             LIMIT {ITEMS_PER_PAGE} OFFSET {offset}
             """
             
@@ -184,98 +404,97 @@ class APIBasedDatabaseManager:
             print(f"Error in get_demos: {str(e)}")
             return [], 0
     
-    def get_demo_by_id(self, demo_id: int) -> Optional[Dict]:
-        """Get demo by ID (excluding all_info_md from user-facing operations)"""
+    def get_facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """Get {facet: {value: count}} for status, confidentiality, owner and product in one grouped query (cached)"""
+        with _facet_cache_lock:
+            hit = _facet_cache["value"] is not None and time.monotonic() < _facet_cache["expires_at"]
+            record_cache("facets", hit)
+            if hit:
+                return _facet_cache["value"]
+        
         try:
-            query = f"""SELECT demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, created_at, updated_at, 
-                               status, demo_url, repo_url, products, confidentiality, remarks 
-                        FROM hiroshi.ai_demo_hub.demos WHERE demo_id = {demo_id}"""
+            query = """
+            SELECT 'status' AS facet, status AS value, COUNT(*) AS count FROM hiroshi.ai_demo_hub.demos GROUP BY status
+            UNION ALL
+            SELECT 'confidentiality' AS facet, confidentiality AS value, COUNT(*) AS count FROM hiroshi.ai_demo_hub.demos GROUP BY confidentiality
+            UNION ALL
+            SELECT 'owner' AS facet, owner_emp_id AS value, COUNT(*) AS count FROM hiroshi.ai_demo_hub.demos GROUP BY owner_emp_id
+            UNION ALL
+            SELECT 'product' AS facet, product AS value, COUNT(*) AS count
+            FROM hiroshi.ai_demo_hub.demos LATERAL VIEW explode(products) exploded AS product GROUP BY product
+            """
             results = self.execute_query_api(query)
-            
-            if not results:
-                return None
-            
-            result = results[0]
-            
-            # Convert demo_id to int if it's a string
-            if 'demo_id' in result and isinstance(result['demo_id'], str):
-                try:
-                    result['demo_id'] = int(result['demo_id'])
-                except ValueError:
-                    pass
-            
-            # Handle products array - convert string representation to list
-            if 'products' in result and result['products']:
-                products_value = result['products']
-                if isinstance(products_value, str):
-                    try:
-                        # Handle JSON string format
-                        import json
-                        if products_value.startswith('[') and products_value.endswith(']'):
-                            result['products'] = json.loads(products_value)
-                        else:
-                            # Handle simple string format
-                            result['products'] = [products_value]
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, treat as single item
-                        result['products'] = [products_value]
-                elif not isinstance(products_value, list):
-                    # If it's not a list, make it a single-item list
-                    result['products'] = [str(products_value)]
-            else:
-                result['products'] = []
-                
-            return result
-            
         except Exception as e:
-            print(f"Error in get_demo_by_id: {str(e)}")
-            return None
+            print(f"Error in get_facet_counts: {str(e)}")
+            return {}
+        
+        facets = {name: {} for name in FILTER_COLUMNS}
+        for row in results:
+            if row.get('facet') in facets and row.get('value'):
+                facets[row['facet']][row['value']] = int(row.get('count') or 0)
+        
+        # Do not cache a failed (empty) answer
+        if results:
+            with _facet_cache_lock:
+                _facet_cache["value"] = facets
+                _facet_cache["expires_at"] = time.monotonic() + FACET_CACHE_TTL_SECONDS
+        return facets
     
-    def get_demo_by_id_internal(self, demo_id: int) -> Optional[Dict]:
-        """Get demo by ID for internal operations (includes all columns including all_info_md)"""
-        try:
-            query = f"SELECT * FROM hiroshi.ai_demo_hub.demos WHERE demo_id = {demo_id}"
-            results = self.execute_query_api(query)
-            
-            if not results:
-                return None
-            
-            result = results[0]
-            
-            # Convert demo_id to int if it's a string
-            if 'demo_id' in result and isinstance(result['demo_id'], str):
+    def _normalize_demo_row(self, result: Dict) -> Dict:
+        """Convert demo_id to int and products to a list (Statement API returns strings)"""
+        # Convert demo_id to int if it's a string
+        if 'demo_id' in result and isinstance(result['demo_id'], str):
+            try:
+                result['demo_id'] = int(result['demo_id'])
+            except ValueError:
+                pass
+        
+        if 'products' not in result:
+            return result
+        
+        # Handle products array - convert string representation to list
+        if result['products']:
+            products_value = result['products']
+            if isinstance(products_value, str):
                 try:
-                    result['demo_id'] = int(result['demo_id'])
-                except ValueError:
-                    pass
-            
-            # Handle products array - convert string representation to list
-            if 'products' in result and result['products']:
-                products_value = result['products']
-                if isinstance(products_value, str):
-                    try:
-                        # Handle JSON string format
-                        import json
-                        if products_value.startswith('[') and products_value.endswith(']'):
-                            result['products'] = json.loads(products_value)
-                        else:
-                            # Handle simple string format
-                            result['products'] = [products_value]
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, treat as single item
+                    # Handle JSON string format
+                    if products_value.startswith('[') and products_value.endswith(']'):
+                        result['products'] = json.loads(products_value)
+                    else:
+                        # Handle simple string format
                         result['products'] = [products_value]
-                elif not isinstance(products_value, list):
-                    # If it's not a list, make it a single-item list
-                    result['products'] = [str(products_value)]
-            else:
-                result['products'] = []
-                
-            return result
-            
+                except json.JSONDecodeError:
+                    # If JSON parsing fails, treat as single item
+                    result['products'] = [products_value]
+            elif not isinstance(products_value, list):
+                # If it's not a list, make it a single-item list
+                result['products'] = [str(products_value)]
+        else:
+            result['products'] = []
+        return result
+    
+    def _get_demo_columns(self, demo_id: int, columns: List[str], query_name: str) -> Optional[Dict]:
+        """One demo row with only the given columns (None if not found or on error)"""
+        try:
+            query = f"SELECT {', '.join(columns)} FROM hiroshi.ai_demo_hub.demos WHERE demo_id = {int(demo_id)}"
+            results = self.execute_query_api(query, query_name=query_name)
+            return self._normalize_demo_row(results[0]) if results else None
         except Exception as e:
-            print(f"Error in get_demo_by_id_internal: {str(e)}")
+            print(f"Error in {query_name} query: {str(e)}")
             return None
     
+    def get_demo_detail(self, demo_id: int) -> Optional[Dict]:
+        """demo_id and all_info_md for the detail view (all_info_md already contains every other column)"""
+        return self._get_demo_columns(demo_id, DETAIL_COLUMNS, "demo_detail")
+    
+    def get_demo_owner(self, demo_id: int) -> Optional[Dict]:
+        """demo_id and owner_emp_id for ownership and existence checks"""
+        return self._get_demo_columns(demo_id, OWNERSHIP_COLUMNS, "demo_ownership")
+    
+    def get_demo_for_update(self, demo_id: int) -> Optional[Dict]:
+        """The editable columns shown in the update form, with created_at/updated_at as its version"""
+        return self._get_demo_columns(demo_id, UPDATE_FORM_COLUMNS, "demo_update_form")
+    
     def get_description_by_id(self, demo_id: int) -> Optional[str]:
         """Get description_md by demo_id"""
         try:
@@ -292,6 +511,36 @@ class APIBasedDatabaseManager:
             print(f"Error in get_description_by_id: {str(e)}")
             return None
     
+    def get_demo_versions(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Get (demo_id, updated_at) of all demos to detect changed rows cheaply"""
+        try:
+            query = "SELECT demo_id, updated_at FROM hiroshi.ai_demo_hub.demos"
+            return self.execute_query_api(query, timeout=timeout)
+        except Exception as e:
+            print(f"Error in get_demo_versions: {str(e)}")
+            return []
+    
+    def get_search_documents(self, demo_ids: Optional[List[int]] = None, timeout: Optional[float] = None) -> List[Dict]:
+        """Get the columns needed by the local search index (all demos, or only demo_ids)
+
+        Includes the demo list columns so that keyword search pages render without another query;
+        description_md is only needed when all_info_md has not been generated.
+        """
+        try:
+            query = """
+            SELECT demo_id, title, summary, owner_emp_id, creator_emp_id, status, demo_url, repo_url,
+                   products, confidentiality, remarks, updated_at,
+                   coalesce(all_info_md, description_md) AS all_info_md
+            FROM hiroshi.ai_demo_hub.demos"""
+            if demo_ids is not None:
+                if not demo_ids:
+                    return []
+                query += f" WHERE demo_id IN ({', '.join(str(int(demo_id)) for demo_id in demo_ids)})"
+            return self.execute_query_api(query, timeout=timeout)
+        except Exception as e:
+            print(f"Error in get_search_documents: {str(e)}")
+            return []
+    
     def escape_sql_string(self, value: str) -> str:
         """Escape SQL string to prevent injection"""
         if value is None:
@@ -362,13 +611,13 @@ class APIBasedDatabaseManager:
 """
         return md_content
     
-    def insert_demo(self, data: Dict) -> int:
-        """Insert new demo"""
+    def insert_demo(self, data: Dict, created_at: Optional[datetime] = None) -> int:
+        """Insert new demo (created_at defaults to now; the write-behind journal passes the time it accepted the write)"""
         try:
             # Convert products list to array format for Databricks
             products_list = [p.strip() for p in data['products'] if p.strip()]
             if products_list:
-                products_array_str = ', '.join([f"'{p}'" for p in products_list])
+                products_array_str = ', '.join(self.escape_sql_string(p) for p in products_list)
             else:
                 products_array_str = ""
             
@@ -376,8 +625,8 @@ class APIBasedDatabaseManager:
             import pytz
             from datetime import datetime
             JST = pytz.timezone('Asia/Tokyo')
-            current_time = datetime.now(JST)
-            current_time_str = current_time.strftime('%Y-%m-%d %H:%M:%S')
+            current_time = created_at or datetime.now(JST)
+            current_time_str = current_time.strftime(TIMESTAMP_FORMAT)
             
             # Generate all_info_md content with temporary demo_id
             data_with_metadata = data.copy()
@@ -402,6 +651,7 @@ class APIBasedDatabaseManager:
             
             # Execute insert query
             self.execute_query_api(query)
+            invalidate_facet_cache()
             
             # Get the last inserted ID
             last_id_query = "SELECT MAX(demo_id) as last_id FROM hiroshi.ai_demo_hub.demos"
@@ -427,12 +677,123 @@ class APIBasedDatabaseManager:
                 
         except Exception as e:
             raise Exception(f"Failed to insert demo: {str(e)}")
+
+    def insert_demos_batch(self, rows: List[Dict], timeout: Optional[float] = 120) -> int:
+        """Insert many validated demos with one multi-row INSERT; returns the number of rows
+
+        all_info_md is written with "Demo ID: TBD" (the identity is assigned by the INSERT);
+        call fill_pending_demo_ids once after the last batch.
+        """
+        if not rows:
+            return 0
+
+        JST = pytz.timezone('Asia/Tokyo')
+        current_time = datetime.now(JST)
+        current_time_str = current_time.strftime(TIMESTAMP_FORMAT)
+
+        values = []
+        for data in rows:
+            data_with_metadata = dict(data, demo_id='TBD', created_at=current_time, updated_at=current_time)
+            all_info_md = self.generate_all_info_md(data_with_metadata)
+            products_array_str = ', '.join(self.escape_sql_string(p) for p in data['products'])
+            creator_emp_id_value = self.escape_sql_string(data['creator_emp_id']) if data.get('creator_emp_id') else 'NULL'
+            values.append(f"""({self.escape_sql_string(data['title'])}, {self.escape_sql_string(data['summary'])},
+                    {self.escape_sql_string(data['description_md'])}, {self.escape_sql_string(data['owner_emp_id'])},
+                    {creator_emp_id_value}, {self.escape_sql_string(data['status'])}, {self.escape_sql_string(data['demo_url'])},
+                    {self.escape_sql_string(data['repo_url'])}, array({products_array_str}),
+                    {self.escape_sql_string(data['confidentiality'])}, {self.escape_sql_string(data['remarks'])},
+                    '{current_time_str}', '{current_time_str}', {self.escape_sql_string(all_info_md)})""")
+
+        query = f"""
+        INSERT INTO hiroshi.ai_demo_hub.demos
+        (title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products, confidentiality, remarks, created_at, updated_at, all_info_md)
+        VALUES {', '.join(values)}
+        """
+
+        # Unlike execute_query_api, a failed batch raises so that the import stops
+        for _ in self.iter_query_chunks(query, timeout=timeout):
+            pass
+        invalidate_facet_cache()
+        return len(rows)
+
+    def query_strict(self, query: str, timeout: Optional[float] = 60) -> List[Dict]:
+        """Execute a small query and return its rows, raising on failure (an empty result really means no rows)"""
+        results = []
+        for columns, rows in self.iter_query_chunks(query, timeout=timeout):
+            results.extend(dict(zip(columns, row)) for row in rows)
+        return results
+
+    def find_demo_by_write_key(self, title: str, owner_emp_id: str, created_at: datetime) -> Optional[int]:
+        """demo_id of the demo inserted with (title, owner_emp_id, created_at), or None"""
+        query = f"""
+        SELECT demo_id FROM hiroshi.ai_demo_hub.demos
+        WHERE title = {self.escape_sql_string(title)}
+          AND owner_emp_id = {self.escape_sql_string(owner_emp_id)}
+          AND created_at = '{created_at.strftime(TIMESTAMP_FORMAT)}'
+        """
+        results = self.query_strict(query)
+        return int(results[0]['demo_id']) if results else None
+
+    def is_demo_updated_at(self, demo_id: int, updated_at: datetime) -> bool:
+        """Whether demo_id has already been updated at updated_at"""
+        query = f"""
+        SELECT demo_id FROM hiroshi.ai_demo_hub.demos
+        WHERE demo_id = {int(demo_id)} AND updated_at = '{updated_at.strftime(TIMESTAMP_FORMAT)}'
+        """
+        return bool(self.query_strict(query))
+
+    def fill_pending_demo_ids(self, timeout: Optional[float] = 120):
+        """Replace "Demo ID: TBD" in all_info_md with the assigned demo_id (one statement for all imported rows)"""
+        query = """
+        UPDATE hiroshi.ai_demo_hub.demos
+        SET all_info_md = replace(all_info_md, '- **Demo ID**: TBD', concat('- **Demo ID**: ', CAST(demo_id AS STRING)))
+        WHERE all_info_md LIKE '%- **Demo ID**: TBD%'
+        """
+        for _ in self.iter_query_chunks(query, timeout=timeout):
+            pass
+
+    def affected_rows(self, rows: List[Dict]) -> int:
+        """num_affected_rows of a DML statement's result"""
+        return int(rows[0].get("num_affected_rows") or 0) if rows else 0
+    
+    def version_predicate(self, updated_at) -> str:
+        """Predicate matching the row version updated_at (as returned by a read; NULL for never-updated rows)"""
+        if updated_at is None or updated_at == "":
+            return "updated_at IS NULL"
+        if hasattr(updated_at, "strftime"):
+            updated_at = updated_at.strftime(TIMESTAMP_FORMAT)
+        return f"updated_at = {self.escape_sql_string(updated_at)}"
     
-    def update_demo(self, demo_id: int, data: Dict) -> bool:
-        """Update existing demo"""
+    def explain_unapplied_write(self, demo_id: int, required_owner: Optional[str] = None,
+                                expected_version: Optional[Dict] = None):
+        """Raise why a conditional write matched no row (read only on this failure path)"""
+        demo = self._get_demo_columns(demo_id, ["demo_id", "owner_emp_id", "updated_at"], "demo_write_check")
+        if demo is None:
+            raise DemoNotFound(f"Demo {demo_id} not found")
+        if required_owner is not None and demo.get("owner_emp_id") != required_owner:
+            raise NotDemoOwner(demo_id, demo.get("owner_emp_id") or "")
+        if expected_version is not None:
+            raise UpdateConflict(demo_id, expected_version.get("updated_at"))
+        raise Exception(f"Write to demo {demo_id} matched no row")
+    
+    def update_demo(self, demo_id: int, data: Dict, updated_at: Optional[datetime] = None,
+                    expected_version: Optional[Dict] = None, required_owner: Optional[str] = None) -> bool:
+        """Update existing demo (updated_at defaults to now)
+
+        With expected_version ({"created_at", "updated_at"} as returned by get_demo_for_update)
+        and/or required_owner the UPDATE applies only while the row still has that updated_at
+        and is owned by required_owner; the affected row count decides, and UpdateConflict,
+        NotDemoOwner or DemoNotFound is raised when it matched no row. Without expected_version
+        the timestamps are read first.
+        """
         try:
-            # Get existing demo data to preserve timestamps and demo_id for all_info_md
-            existing_demo = self.get_demo_by_id_internal(demo_id)
+            if expected_version is not None:
+                # The loaded version already has the timestamps all_info_md shows
+                existing_demo = {"demo_id": demo_id, "created_at": expected_version.get("created_at"),
+                                 "updated_at": expected_version.get("updated_at")}
+            else:
+                # Get existing demo data to preserve timestamps and demo_id for all_info_md
+                existing_demo = self._get_demo_columns(demo_id, ["demo_id", "created_at", "updated_at"], "demo_update_metadata")
             if existing_demo:
                 # Include demo_id and timestamps in data for all_info_md generation
                 data_with_metadata = data.copy()
@@ -446,7 +807,7 @@ class APIBasedDatabaseManager:
             # Convert products list to array format for Databricks
             products_list = [p.strip() for p in data['products'] if p.strip()]
             if products_list:
-                products_array_str = ', '.join([f"'{p}'" for p in products_list])
+                products_array_str = ', '.join(self.escape_sql_string(p) for p in products_list)
             else:
                 products_array_str = ""
             
@@ -454,8 +815,8 @@ class APIBasedDatabaseManager:
             import pytz
             from datetime import datetime
             JST = pytz.timezone('Asia/Tokyo')
-            current_time = datetime.now(JST)
-            current_time_str = current_time.strftime('%Y-%m-%d %H:%M:%S')
+            current_time = updated_at or datetime.now(JST)
+            current_time_str = current_time.strftime(TIMESTAMP_FORMAT)
             
             # Update metadata with current timestamp
             data_with_metadata['updated_at'] = current_time
@@ -484,15 +845,32 @@ class APIBasedDatabaseManager:
             WHERE demo_id = {demo_id}
             """
             
-            # Execute update query
-            self.execute_query_api(query)
+            if expected_version is None and required_owner is None:
+                # Execute update query
+                self.execute_query_api(query)
+                invalidate_facet_cache()
+                return True
+            
+            # Conditional update: the affected row count tells whether the version and owner still matched
+            if expected_version is not None:
+                query += f"  AND {self.version_predicate(expected_version.get('updated_at'))}\n"
+            if required_owner is not None:
+                query += f"  AND owner_emp_id = {self.escape_sql_string(required_owner)}\n"
+            if self.affected_rows(self.query_strict(query)) == 0:
+                self.explain_unapplied_write(demo_id, required_owner, expected_version)
+            invalidate_facet_cache()
             return True
             
+        except (UpdateConflict, NotDemoOwner, DemoNotFound):
+            raise
         except Exception as e:
             raise Exception(f"Failed to update demo: {str(e)}")
     
-    def delete_demo(self, demo_id: int) -> bool:
-        """Delete demo by ID"""
+    def delete_demo(self, demo_id: int, required_owner: Optional[str] = None) -> bool:
+        """Delete demo by ID (with required_owner only if that user owns it)
+
+        One statement; DemoNotFound or NotDemoOwner is raised when it deleted no row.
+        """
         try:
             # Validate demo_id
             if demo_id is None or demo_id <= 0:
@@ -500,11 +878,17 @@ class APIBasedDatabaseManager:
                 
             # Build query
             query = f"DELETE FROM hiroshi.ai_demo_hub.demos WHERE demo_id = {demo_id}"
+            if required_owner is not None:
+                query += f" AND owner_emp_id = {self.escape_sql_string(required_owner)}"
             
             # Execute delete query
-            self.execute_query_api(query)
+            if self.affected_rows(self.query_strict(query)) == 0:
+                self.explain_unapplied_write(demo_id, required_owner)
+            invalidate_facet_cache()
             return True
             
+        except (NotDemoOwner, DemoNotFound):
+            raise
         except Exception as e:
             raise Exception(f"Failed to delete demo: {str(e)}")
 
@@ -1,16 +1,36 @@
-import gradio as gr
-import pandas as pd
+from startup_profile import phase, report_when_ready
+
+with phase("import gradio, pandas"):
+    import gradio as gr
+    import pandas as pd
+import hashlib
 import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from html import escape
 from typing import List, Dict, Any, Optional, Tuple
 import json
-import requests
-import markdown
-import pytz
-from databricks import sql
-from databricks.sdk import WorkspaceClient
-from dotenv import load_dotenv
+# markdown, databricks.sql and databricks.sdk are imported where they are used
+# (not needed for the first page; warm_up_deferred loads them after the server starts)
+with phase("import app modules"):
+    import requests
+    import pytz
+    from dotenv import load_dotenv
+    from local_search import DemoSearchIndex, HashingEmbedder, format_candidates, format_fallback_answer
+    from conversation_memory import ConversationMemory
+    from demo_repository import DemoNotFound, DemoRepository, NotDemoOwner, UpdateConflict, create_demo_repository
+    from demo_utils import parse_products, validate_email
+    from catalog_export import EXPORT_FORMATS, export_catalog, new_export_dir
+    from catalog_import import ImportFailed, ImportValidationError, import_catalog
+    from write_journal import WRITE_BEHIND_ENABLED, WriteJournal
+    from vector_search_sync import VECTOR_SEARCH_INDEX_NAME, VECTOR_SEARCH_SYNC_ENABLED, IndexSyncScheduler, VectorSearchIndexClient
+    from tracing import span, submit_traced, traced
+    from statement_log import statement_stats
+    from metrics import METRICS_ENABLED, TOKEN_MINTS, record_cache, render_metrics, timed_handler, timed_llm, track_chat_session
+    from event_workloads import WorkloadRejected, event_options, required_threads, run_as_workload, WORKLOAD_CLASSES
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +41,25 @@ DATABRICKS_SERVER_HOSTNAME = os.getenv("DATABRICKS_HOST")
 DATABRICKS_WAREHOUSE_ID = os.getenv("DATABRICKS_WAREHOUSE_ID")
 RAG_ENDPOINT = os.getenv("RAG_ENDPOINT")
 ITEMS_PER_PAGE = 10
+# Hard deadline for a single RAG chat request (token + invocation), after which
+# the bot answers from the local keyword search instead
+RAG_TIMEOUT_SECONDS = float(os.getenv("RAG_TIMEOUT_SECONDS", "30"))
+RAG_CONNECT_TIMEOUT_SECONDS = float(os.getenv("RAG_CONNECT_TIMEOUT_SECONDS", "5"))
+# Concurrent RAG requests; the body is read in chunks so that late answers are dropped
+RAG_MAX_WORKERS = 8
+RAG_READ_CHUNK_BYTES = 16384
+LOCAL_SEARCH_LOAD_TIMEOUT_SECONDS = 5
+# Fuse BM25 with locally computed (hashed character n-gram) embeddings
+LOCAL_SEARCH_EMBEDDINGS = os.getenv("LOCAL_SEARCH_EMBEDDINGS", "true").lower() == "true"
+# Registrations whose title + description match a registered demo at least this closely
+# (estimated Jaccard similarity of character shingles) ask for confirmation; 0 disables the check
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.5"))
+# Approximate token budgets for the chat history sent to the RAG endpoint;
+# older turns are rolled into a running summary
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "500"))
+# How long a token that passed the SQL Warehouse probe is trusted without probing again (0: always probe)
+TOKEN_PERMISSION_CACHE_SECONDS = float(os.getenv("TOKEN_PERMISSION_CACHE_SECONDS", "300"))
 JST = pytz.timezone('Asia/Tokyo')
 
 # Translation dictionary for multilingual support
@@ -63,9 +102,17 @@ TRANSLATIONS = {
         "label_remarks": "備考",
         "label_demo_id": "Demo ID",
         "label_message": "メッセージ（入力後にShift+Enterで送信）",
+        "label_filter_status": "ステータス",
+        "label_filter_confidentiality": "機密レベル",
+        "label_filter_product": "利用製品",
+        "label_filter_owner": "代表投稿者",
+        "label_sort_column": "並び替え",
+        "label_sort_order": "順序",
+        "label_keyword_search": "キーワード検索",
         
         # Placeholders
         "placeholder_demo_title": "デモのタイトル",
+        "placeholder_keyword_search": "タイトル・要約・詳細説明・利用製品から検索（Enterで検索）",
         "placeholder_card_summary": "カード表示用の要約",
         "placeholder_description_md": "詳細説明をMarkdown形式でも記載可能",
         "placeholder_creator_email": "デモを作成した人のメールアドレス（不明の場合は空白でOK）",
@@ -104,6 +151,16 @@ TRANSLATIONS = {
         "confidentiality_public": "public",
         "confidentiality_internal": "internal",
         
+        # Filter and sort options
+        "filter_all": "すべて",
+        "sort_created_at": "登録日時",
+        "sort_updated_at": "更新日時",
+        "sort_title": "タイトル",
+        "sort_demo_id": "デモID",
+        "sort_desc": "新しい順 / 降順",
+        "sort_asc": "古い順 / 昇順",
+        "search_hits": "検索結果（関連度順）",
+        
         # Table headers
         "table_demo_id": "デモID",
         "table_title": "タイトル",
@@ -157,9 +214,17 @@ TRANSLATIONS = {
         "label_remarks": "Remarks",
         "label_demo_id": "Demo ID",
         "label_message": "Message (Press Shift+Enter to send)",
+        "label_filter_status": "Status",
+        "label_filter_confidentiality": "Confidentiality",
+        "label_filter_product": "Products Used",
+        "label_filter_owner": "Representative Poster",
+        "label_sort_column": "Sort by",
+        "label_sort_order": "Order",
+        "label_keyword_search": "Keyword search",
         
         # Placeholders
         "placeholder_demo_title": "Demo title",
+        "placeholder_keyword_search": "Search titles, summaries, descriptions and products (Enter to search)",
         "placeholder_card_summary": "Summary for card display",
         "placeholder_description_md": "Detailed description in Markdown format",
         "placeholder_creator_email": "Email of the demo creator (leave blank if unknown)",
@@ -198,6 +263,16 @@ TRANSLATIONS = {
         "confidentiality_public": "public",
         "confidentiality_internal": "internal",
         
+        # Filter and sort options
+        "filter_all": "All",
+        "sort_created_at": "Registered",
+        "sort_updated_at": "Updated",
+        "sort_title": "Title",
+        "sort_demo_id": "Demo ID",
+        "sort_desc": "Newest / Descending",
+        "sort_asc": "Oldest / Ascending",
+        "search_hits": "Search results (by relevance)",
+        
         # Table headers
         "table_demo_id": "Demo ID",
         "table_title": "Title",
@@ -333,6 +408,15 @@ def switch_language(language: str):
     btn_send_update = gr.update(value=get_text("btn_send", language))
     btn_clear_chat_update = gr.update(value=get_text("btn_clear_chat", language))
     
+    # Update filter and sort controls (facet choices keep their values and counts)
+    status_filter_update = gr.update(label=get_text("label_filter_status", language))
+    confidentiality_filter_update = gr.update(label=get_text("label_filter_confidentiality", language))
+    product_filter_update = gr.update(label=get_text("label_filter_product", language))
+    owner_filter_update = gr.update(label=get_text("label_filter_owner", language))
+    sort_column_update = gr.update(label=get_text("label_sort_column", language), choices=get_sort_column_choices(language))
+    sort_order_update = gr.update(label=get_text("label_sort_order", language), choices=get_sort_order_choices(language))
+    keyword_search_update = gr.update(label=get_text("label_keyword_search", language), placeholder=get_text("placeholder_keyword_search", language))
+    
     # Update other UI elements
     page_input_update = gr.update(label=get_text("label_page", language))
     demo_details_update = gr.update(label=get_text("label_demo_details", language), value=default_details)
@@ -381,7 +465,10 @@ def switch_language(language: str):
         # New UI updates
         main_title_update, chat_msg_update,
         # Tab label updates
-        tab_demo_list_update, tab_new_reg_update, tab_update_update, tab_chat_update
+        tab_demo_list_update, tab_new_reg_update, tab_update_update, tab_chat_update,
+        # Filter and sort updates
+        status_filter_update, confidentiality_filter_update, product_filter_update, owner_filter_update,
+        sort_column_update, sort_order_update, keyword_search_update, btn_search_update
     )
 
 def get_current_user_email(request: gr.Request) -> str:
@@ -449,48 +536,8 @@ def get_greeting_message(request: gr.Request, language: str = "ja") -> str:
         else:
             return "👋 Hello!"
 
-def check_ownership_permission(demo_id, current_user_email: str, user_token: str = None) -> Tuple[bool, str, str]:
-    """Check if current user has permission to modify/delete the demo
-    
-    Returns:
-        tuple: (has_permission, original_owner_email, message)
-    """
-    try:
-        # Convert number to string if needed
-        if demo_id is None or demo_id == "":
-            return False, "", "Demo IDが入力されていません。"
-        
-        demo_id_str = str(int(demo_id)) if isinstance(demo_id, (int, float)) else str(demo_id).strip()
-        
-        if not demo_id_str:
-            return False, "", "Demo IDが入力されていません。"
-        
-        # Convert to int with error handling
-        try:
-            demo_id_int = int(float(demo_id_str))
-            if demo_id_int <= 0:
-                return False, "", "無効なDemo IDです。"
-        except (ValueError, TypeError, OverflowError):
-            return False, "", "Demo IDの形式が正しくありません。"
-        
-        # Get demo data from database
-        user_db_manager = APIBasedDatabaseManager(user_token)
-        demo = user_db_manager.get_demo_by_id(demo_id_int)
-        if not demo:
-            return False, "", "指定されたデモが見つかりません。"
-        
-        original_owner = demo.get("owner_emp_id", "")
-        
-        # Check if current user is the original owner
-        if current_user_email == original_owner:
-            return True, original_owner, "権限があります。"
-        else:
-            return False, original_owner, f"権限がありません。このデモの投稿者は {original_owner} です。"
-            
-    except Exception as e:
-        return False, "", f"権限チェック中にエラーが発生しました: {str(e)}"
-
-def get_service_principal_token() -> str:
+@traced("auth.get_service_principal_token")
+def get_service_principal_token(timeout: float = 30) -> str:
     """Get Service Principal OAuth token for database operations"""
     try:
         client_id = os.getenv('DATABRICKS_CLIENT_ID', '').strip()
@@ -514,27 +561,45 @@ def get_service_principal_token() -> str:
             token_url,
             auth=(client_id, client_secret),
             data={"grant_type": "client_credentials", "scope": "all-apis"},
-            timeout=30
+            timeout=timeout
         )
         
         response.raise_for_status()
         token_data = response.json()
         access_token = token_data["access_token"]
+        TOKEN_MINTS.inc(kind="service_principal")
         return access_token
     except Exception as e:
         raise
 
+# sha256(token) -> monotonic time until which the token is known to have warehouse access
+_token_permission_cache: Dict[str, float] = {}
+_token_permission_lock = threading.Lock()
+
+@traced("auth.test_token_permissions")
 def test_token_permissions(token: str) -> bool:
-    """Test if a token has SQL Warehouse access permissions"""
+    """Test if a token has SQL Warehouse access permissions (successes are cached for TOKEN_PERMISSION_CACHE_SECONDS)"""
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    now = time.monotonic()
+    with _token_permission_lock:
+        hit = _token_permission_cache.get(key, 0) > now
+    record_cache("token_permissions", hit)
+    if hit:
+        return True
     try:
-        from api_database_manager import APIBasedDatabaseManager
-        test_manager = APIBasedDatabaseManager(token)
         # Simple test query to check permissions
-        result = test_manager.execute_query_api("SELECT 1 as test_permission")
-        return len(result) > 0  # If we get any result, permissions are OK
+        allowed = create_demo_repository(token).test_connection()
     except Exception as e:
         return False
+    # Failures are not cached: they may be transient (e.g. a warehouse still starting)
+    if allowed and TOKEN_PERMISSION_CACHE_SECONDS > 0:
+        with _token_permission_lock:
+            for expired in [cached for cached, expires_at in _token_permission_cache.items() if expires_at <= now]:
+                del _token_permission_cache[expired]
+            _token_permission_cache[key] = now + TOKEN_PERMISSION_CACHE_SECONDS
+    return allowed
 
+@traced("auth.get_user_access_token")
 def get_user_access_token(request: gr.Request) -> str:
     """Get access token for database operations with fallback priority:
     1. User token from headers (x-forwarded-access-token) - test permissions first
@@ -583,304 +648,13 @@ def get_user_access_token(request: gr.Request) -> str:
         # Priority 3: System token for local testing
         return DATABRICKS_TOKEN or ""
 
-class DatabaseManager:
-    """Database connection and operations manager"""
-    
-    def __init__(self, user_token: str = None):
-        self.server_hostname = DATABRICKS_SERVER_HOSTNAME
-        self.http_path = f"/sql/1.0/warehouses/{DATABRICKS_WAREHOUSE_ID}"
-        self.access_token = user_token or DATABRICKS_TOKEN
-        
-    def test_connection(self) -> bool:
-        """Test database connection"""
-        try:
-            query = "SELECT 1 as test"
-            result = self.execute_query(query)
-            return len(result) > 0
-        except Exception as e:
-            print(f"Database connection test failed: {str(e)}")
-            return False
-        
-    def get_connection(self):
-        """Get database connection"""
-        return sql.connect(
-            server_hostname=self.server_hostname,
-            http_path=self.http_path,
-            access_token=self.access_token
-        )
-    
-    def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict]:
-        """Execute query and return results"""
-        connection = self.get_connection()
-        cursor = connection.cursor()
-        try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            columns = [desc[0] for desc in cursor.description]
-            
-            # ❌ fetchall()はDatabricksライブラリのバグでエラーが発生する
-            # 代替アプローチ: 一行ずつ取得してリストに追加
-            rows = []
-            try:
-                while True:
-                    row = cursor.fetchone()
-                    if row is None:
-                        break
-                    rows.append(row)
-            except Exception as fetch_error:
-                # fetchone()でもエラーが発生する場合は、pandasアプローチを試す
-                print(f"🔍 fetchone() failed: {fetch_error}")
-                try:
-                    import pandas as pd
-                    df = pd.read_sql(query, connection)
-                    # DataFrameをリストに変換
-                    rows = [tuple(row) for row in df.values]
-                    columns = df.columns.tolist()
-                except Exception as pandas_error:
-                    print(f"🔍 pandas approach failed: {pandas_error}")
-                    # 最後の手段: 空のリストを返す
-                    return []
-            
-            results = []
-            for row in rows:
-                results.append(dict(zip(columns, row)))
-            
-            return results
-        except Exception as e:
-            raise Exception(f"Database error: {str(e)}")
-        finally:
-            cursor.close()
-            connection.close()
-    
-    def get_demos(self, page: int = 1, sort_column: str = "created_at", sort_order: str = "ASC") -> Tuple[List[Dict], int]:
-        """Get paginated demo list with sorting"""
-        try:
-            # Validate and sanitize inputs
-            if page is None or page < 1:
-                page = 1
-            
-            offset = (page - 1) * ITEMS_PER_PAGE
-            
-            # Get total count
-            count_query = "SELECT COUNT(*) as total FROM hiroshi.ai_demo_hub.demos"
-            count_result = self.execute_query(count_query)
-            total_count = count_result[0]['total'] if count_result and count_result[0]['total'] is not None else 0
-            
-            # Get paginated data
-            valid_columns = ["demo_id", "title", "summary", "owner_emp_id", "created_at", "updated_at", "status", "demo_url", "repo_url", "products", "confidentiality", "remarks"]
-            if sort_column not in valid_columns:
-                sort_column = "created_at"
-            
-            if sort_order.upper() not in ["ASC", "DESC"]:
-                sort_order = "ASC"
-                
-            query = f"""
-            SELECT demo_id, title, summary, owner_emp_id, created_at, updated_at, status, 
-                   demo_url, repo_url, products, confidentiality, remarks
-            FROM hiroshi.ai_demo_hub.demos
-            ORDER BY {sort_column} {sort_order}
-            LIMIT {ITEMS_PER_PAGE} OFFSET {offset}
-            """
-            
-            results = self.execute_query(query)
-            
-            # Validate and clean results
-            cleaned_results = []
-            for result in results:
-                if result.get('demo_id') is not None:
-                    cleaned_results.append(result)
-            
-            return cleaned_results, total_count
-            
-        except Exception as e:
-            print(f"Error in get_demos: {str(e)}")
-            return [], 0
-    
-    def get_demo_by_id(self, demo_id: int) -> Optional[Dict]:
-        """Get demo by ID (excluding all_info_md from user-facing operations)"""
-        query = """SELECT demo_id, title, summary, description_md, owner_emp_id, created_at, updated_at, 
-                          status, demo_url, repo_url, products, confidentiality, remarks 
-                   FROM hiroshi.ai_demo_hub.demos WHERE demo_id = ?"""
-        results = self.execute_query(query, [demo_id])
-        return results[0] if results else None
-    
-    def get_demo_by_id_internal(self, demo_id: int) -> Optional[Dict]:
-        """Get demo by ID for internal operations (includes all columns including all_info_md)"""
-        query = "SELECT * FROM hiroshi.ai_demo_hub.demos WHERE demo_id = ?"
-        results = self.execute_query(query, [demo_id])
-        return results[0] if results else None
-    
-    def get_description_by_id(self, demo_id: int) -> Optional[str]:
-        """Get description_md by demo_id"""
-        try:
-            if demo_id is None:
-                return None
-                
-            query = "SELECT description_md FROM hiroshi.ai_demo_hub.demos WHERE demo_id = ?"
-            results = self.execute_query(query, [demo_id])
-            
-            if results and len(results) > 0:
-                return results[0].get('description_md')
-            return None
-        except Exception as e:
-            print(f"Error in get_description_by_id: {str(e)}")
-            return None
-    
-    def insert_demo(self, data: Dict) -> int:
-        """Insert new demo"""
-        try:
-            # Convert products list to array format for Databricks
-            products_list = [p.strip() for p in data['products'] if p.strip()]
-            if products_list:
-                products_array_str = ', '.join([f"'{p}'" for p in products_list])
-            else:
-                products_array_str = ""
-            
-            # Generate timestamp for both created_at and updated_at
-            current_time = datetime.now(JST)
-            
-            # Build query with array literal directly in SQL (including all_info_md and timestamps)
-            query = f"""
-            INSERT INTO hiroshi.ai_demo_hub.demos 
-            (title, summary, description_md, owner_emp_id, status, demo_url, repo_url, products, confidentiality, remarks, created_at, updated_at, all_info_md)
-            VALUES (?, ?, ?, ?, ?, ?, ?, array({products_array_str}), ?, ?, ?, ?, ?)
-            """
-            
-            # Generate all_info_md with actual data (demo_id will be updated after INSERT)
-            data_with_metadata = data.copy()
-            data_with_metadata['demo_id'] = 'TBD'  # Will be updated after INSERT
-            data_with_metadata['created_at'] = current_time
-            data_with_metadata['updated_at'] = current_time
-            all_info_md = generate_all_info_md(data_with_metadata)
-            
-            params = [
-                data['title'],
-                data['summary'],
-                data['description_md'],
-                data['owner_emp_id'],
-                data['status'],
-                data['demo_url'],
-                data['repo_url'],
-                data['confidentiality'],
-                data['remarks'],
-                current_time,
-                current_time,
-                all_info_md
-            ]
-            
-            self.execute_query(query, params)
-            
-            # Get the inserted demo ID to update all_info_md with correct demo_id
-            last_id_query = "SELECT MAX(demo_id) as last_id FROM hiroshi.ai_demo_hub.demos"
-            result = self.execute_query(last_id_query)
-            
-            if result and len(result) > 0 and result[0]['last_id'] is not None:
-                new_demo_id = result[0]['last_id']
-                
-                # Update all_info_md with correct demo_id
-                data_with_metadata['demo_id'] = new_demo_id
-                updated_all_info_md = generate_all_info_md(data_with_metadata)
-                
-                update_query = "UPDATE hiroshi.ai_demo_hub.demos SET all_info_md = ? WHERE demo_id = ?"
-                self.execute_query(update_query, [updated_all_info_md, new_demo_id])
-                
-        except Exception as e:
-            raise Exception(f"Failed to insert demo: {str(e)}")
-        
-        # Get the last inserted ID with proper error handling
-        try:
-            last_id_query = "SELECT MAX(demo_id) as last_id FROM hiroshi.ai_demo_hub.demos"
-            result = self.execute_query(last_id_query)
-            
-            if result and len(result) > 0 and result[0]['last_id'] is not None:
-                return result[0]['last_id']
-            else:
-                # Fallback: try to get the ID of the inserted record by matching the exact data
-                fallback_query = """
-                SELECT demo_id FROM hiroshi.ai_demo_hub.demos 
-                WHERE title = ? AND owner_emp_id = ? AND demo_url = ?
-                ORDER BY created_at DESC LIMIT 1
-                """
-                fallback_result = self.execute_query(fallback_query, [data['title'], data['owner_emp_id'], data['demo_url']])
-                if fallback_result and len(fallback_result) > 0:
-                    return fallback_result[0]['demo_id']
-                else:
-                    # If all else fails, return a default message
-                    return 0
-        except Exception as e:
-            print(f"Error getting last inserted ID: {str(e)}")
-            return 0
-    
-    def update_demo(self, demo_id: int, data: Dict) -> bool:
-        """Update existing demo"""
-        try:
-            # Get existing demo data to preserve timestamps and demo_id for all_info_md
-            existing_demo = self.get_demo_by_id_internal(demo_id)
-            if existing_demo:
-                # Include demo_id and timestamps in data for all_info_md generation
-                data_with_metadata = data.copy()
-                data_with_metadata['demo_id'] = existing_demo.get('demo_id', demo_id)
-                data_with_metadata['created_at'] = existing_demo.get('created_at')
-                data_with_metadata['updated_at'] = existing_demo.get('updated_at')
-            else:
-                data_with_metadata = data.copy()
-                data_with_metadata['demo_id'] = demo_id
-            
-            # Convert products list to array format for Databricks
-            products_list = [p.strip() for p in data['products'] if p.strip()]
-            if products_list:
-                products_array_str = ', '.join([f"'{p}'" for p in products_list])
-            else:
-                products_array_str = ""
-            
-            # Generate updated all_info_md content with complete metadata
-            all_info_md = generate_all_info_md(data_with_metadata)
-                
-            # Generate current timestamp for updated_at
-            current_time = datetime.now(JST)
-            
-            # Update metadata with current timestamp
-            data_with_metadata['updated_at'] = current_time
-            
-            # Generate updated all_info_md content with complete metadata
-            all_info_md = generate_all_info_md(data_with_metadata)
-            
-            # Build query with array literal directly in SQL (including all_info_md and updated_at)
-            query = f"""
-            UPDATE hiroshi.ai_demo_hub.demos 
-            SET title = ?, summary = ?, description_md = ?, owner_emp_id = ?, status = ?, 
-                demo_url = ?, repo_url = ?, products = array({products_array_str}), confidentiality = ?, remarks = ?, 
-                updated_at = ?, all_info_md = ?
-            WHERE demo_id = ?
-            """
-            
-            params = [
-                data['title'],
-                data['summary'],
-                data['description_md'],
-                data['owner_emp_id'],
-                data['status'],
-                data['demo_url'],
-                data['repo_url'],
-                data['confidentiality'],
-                data['remarks'],
-                current_time,
-                all_info_md,
-                demo_id
-            ]
-            
-            self.execute_query(query, params)
-            return True
-        except Exception as e:
-            raise Exception(f"Failed to update demo: {str(e)}")
+class RAGEndpointBusy(Exception):
+    """Raised when every RAG worker is still busy with an earlier (possibly abandoned) request"""
 
 class RAGClient:
     """RAG system client for semantic search"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = RAG_MAX_WORKERS):
         self.endpoint = RAG_ENDPOINT
         # Check if running in Databricks Apps environment
         self.client_id = os.getenv('DATABRICKS_CLIENT_ID', '').strip()
@@ -891,8 +665,14 @@ class RAGClient:
         self.use_oauth = bool(self.client_id and self.client_secret)
         
         # OAuth or PAT authentication is determined by use_oauth flag
+        
+        # Requests run in worker threads so that the caller can stop waiting at the deadline;
+        # a worker is taken only when free, so chats never queue behind stuck requests
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag")
+        self.workers = threading.BoundedSemaphore(max_workers)
     
-    def get_oauth_token(self):
+    @traced("rag.get_oauth_token")
+    def get_oauth_token(self, timeout: float = 30):
         """Get OAuth access token for Service Principal authentication"""
         try:
             # Get host directly from environment variable to avoid Config conflicts
@@ -910,40 +690,107 @@ class RAGClient:
                 token_url,
                 auth=(self.client_id, self.client_secret),
                 data={"grant_type": "client_credentials", "scope": "all-apis"},
-                timeout=30
+                timeout=timeout
             )
                 
             response.raise_for_status()
             
             token_data = response.json()
             access_token = token_data["access_token"]
+            TOKEN_MINTS.inc(kind="rag_oauth")
             return access_token
             
         except Exception as e:
             raise
         
-    def chat_completion(self, messages: List[Dict[str, str]]) -> str:
-        """Send chat completion request to RAG system"""
+    def post_with_deadline(self, data: Dict, headers: Dict[str, str], deadline: float) -> Dict:
+        """POST to the RAG endpoint and stop waiting once the deadline (time.monotonic) passes
+
+        A request cannot be interrupted once its worker is blocked reading, so an abandoned
+        request keeps its worker until the next read returns: the body is streamed and
+        dropped at the first read after the deadline, and every read times out after the
+        time that was left when the request started. The leak is therefore bounded by
+        twice the deadline per worker, and while all workers are busy RAGEndpointBusy is
+        raised at once instead of queueing.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FutureTimeoutError()
+        if not self.workers.acquire(blocking=False):
+            raise RAGEndpointBusy()
+        
+        def post():
+            try:
+                with span("rag.http_post"):
+                    return post_request()
+            finally:
+                self.workers.release()
+        
+        def post_request():
+            with requests.Session() as session, session.post(
+                url=self.endpoint, 
+                json=data, 
+                headers=headers,
+                timeout=(min(RAG_CONNECT_TIMEOUT_SECONDS, remaining), remaining),
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                body = bytearray()
+                for chunk in response.iter_content(RAG_READ_CHUNK_BYTES):
+                    if time.monotonic() > deadline:
+                        # Nobody waits for this answer any more
+                        raise FutureTimeoutError()
+                    body.extend(chunk)
+                return json.loads(bytes(body))
+        
+        try:
+            future = submit_traced(self.executor, post)
+        except Exception:
+            self.workers.release()
+            raise
+        return future.result(timeout=remaining)
+    
+    def fallback_answer(self, messages: List[Dict[str, str]], reason: str) -> str:
+        """Answer from the local keyword search when the RAG endpoint cannot be used"""
+        query = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        if len(demo_search_index) == 0:
+            # The deadline has already passed, so never load the index synchronously here
+            demo_search_index.refresh_in_background(refresh_demo_search_index)
+            return format_fallback_answer(query, [], reason, index_ready=False)
+        results = demo_search_index.search(query)
+        return format_fallback_answer(query, results, reason)
+        
+    @timed_llm("rag.chat_completion")
+    @traced("rag.chat_completion")
+    def chat_completion(self, messages: List[Dict[str, str]], timeout: Optional[float] = None, context_summary: Optional[str] = None) -> str:
+        """Send chat completion request to RAG system, falling back to local search after timeout seconds"""
         if not self.endpoint:
             return "RAG_ENDPOINTが設定されていません。環境変数を確認してください。"
+        
+        timeout = RAG_TIMEOUT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
             
         # Get authentication token based on environment
         try:
             if self.use_oauth:
                 # Use OAuth Service Principal authentication for production
-                token = self.get_oauth_token()
+                token = self.get_oauth_token(timeout=max(0.1, deadline - time.monotonic()))
             else:
                 # Use PAT token for local development
                 if not self.pat_token:
                     return "DATABRICKS_TOKENが設定されていません。環境変数を確認してください。"
                 token = self.pat_token
         except Exception as e:
-            return f"認証エラーが発生しました: {str(e)}"
+            return self.fallback_answer(messages, f"認証エラー: {str(e)}")
             
         # Convert messages to the expected input format
         # RAG endpoint expects messages array in the input field with system message
+        system_prompt = "You are a helpful agent that assists users with finding information about AI demos. Please respond in Japanese."
+        if context_summary:
+            # Older turns that no longer fit the history budget
+            system_prompt += f"\n\n{context_summary}"
         input_messages = [
-            {"role": "system", "content": "You are a helpful agent that assists users with finding information about AI demos. Please respond in Japanese."}
+            {"role": "system", "content": system_prompt}
         ]
         
         # Add the original messages to the input
@@ -959,15 +806,7 @@ class RAGClient:
         }
         
         try:
-            response = requests.post(
-                url=self.endpoint, 
-                json=data, 
-                headers=headers
-            )
-            
-            response.raise_for_status()
-            
-            result = response.json()
+            result = self.post_with_deadline(data, headers, deadline)
             
             # Handle different response formats
             if "output" in result and len(result["output"]) > 0:
@@ -1002,15 +841,39 @@ class RAGClient:
                 # Fallback: return the entire result as string
                 print(f"   Unknown response format, returning full result")
                 return str(result)
+        except RAGEndpointBusy:
+            print("   RAG busy: all workers are waiting for earlier requests, using local search")
+            return self.fallback_answer(messages, "AIアシスタントが混雑しています")
+        except (FutureTimeoutError, requests.exceptions.Timeout):
+            print(f"   RAG Timeout: no response within {timeout:.0f}s, using local search")
+            return self.fallback_answer(messages, f"{timeout:.0f}秒以内に応答がありませんでした")
         except Exception as e:
             print(f"   RAG Error: {str(e)}")
-            return f"エラーが発生しました: {str(e)}"
+            return self.fallback_answer(messages, f"エラーが発生しました: {str(e)}")
 
 class TitleGenerator:
     """AI-powered title generation using Databricks Claude model"""
     
     def __init__(self):
+        # Importing the Databricks SDK takes about a second and creating the client resolves
+        # the workspace configuration over the network, so both wait until the first use
+        self._openai_client = None
+        self._client_created = False
+        self._client_lock = threading.Lock()
+    
+    @property
+    def openai_client(self):
+        with self._client_lock:
+            if not self._client_created:
+                self._openai_client = self._create_openai_client()
+                self._client_created = True
+        return self._openai_client
+    
+    def _create_openai_client(self):
+        """Create the OpenAI-compatible serving endpoint client (None if it cannot be initialized)"""
         try:
+            from databricks.sdk import WorkspaceClient
+            
             # Get authentication variables
             databricks_host = os.getenv('DATABRICKS_HOST')
             databricks_token = os.getenv('DATABRICKS_TOKEN')
@@ -1041,12 +904,14 @@ class TitleGenerator:
                     auth_type="pat"
                 )
                 
-            self.openai_client = self.client.serving_endpoints.get_open_ai_client()
+            return self.client.serving_endpoints.get_open_ai_client()
             
         except Exception as e:
             print(f"Warning: Failed to initialize TitleGenerator: {str(e)}")
-            self.openai_client = None
+            return None
     
+    @timed_llm("llm.generate_title")
+    @traced("llm.generate_title")
     def generate_title(self, description: str) -> str:
         """Generate a catchy title from demo description"""
         if not self.openai_client:
@@ -1088,6 +953,8 @@ class TitleGenerator:
             print(f"Title generation error: {str(e)}")
             return f"Error: タイトル生成に失敗しました ({str(e)})"
     
+    @timed_llm("llm.generate_summary")
+    @traced("llm.generate_summary")
     def generate_summary(self, description: str) -> str:
         """Generate a concise summary from demo description"""
         if not self.openai_client:
@@ -1129,6 +996,8 @@ class TitleGenerator:
             print(f"Summary generation error: {str(e)}")
             return f"Error: 要約生成に失敗しました ({str(e)})"
     
+    @timed_llm("llm.polish_description")
+    @traced("llm.polish_description")
     def polish_description(self, rough_description: str) -> str:
         """Polish rough description into professional, detailed content"""
         if not self.openai_client:
@@ -1173,21 +1042,159 @@ class TitleGenerator:
             return f"Error: 清書に失敗しました ({str(e)})"
 
 # Global instances
-# APIベースのDatabaseManagerを使用してsqlクライアントの問題を回避
-from api_database_manager import APIBasedDatabaseManager
-db_manager = APIBasedDatabaseManager()
-rag_client = RAGClient()
-title_generator = TitleGenerator()
+# DEMO_REPOSITORY_BACKEND で選択（既定はAPIベース: sqlクライアントの問題を回避）
+with phase("create clients"):
+    db_manager = create_demo_repository()
+    rag_client = RAGClient()
+    title_generator = TitleGenerator()
+    demo_search_index = DemoSearchIndex(embedder=HashingEmbedder() if LOCAL_SEARCH_EMBEDDINGS else None)
+
+def warm_up_deferred():
+    """Load what startup deferred once the server accepts requests, so that the first
+    detail view or AI generation does not pay for it"""
+    try:
+        with phase("deferred warm-up"):
+            import markdown
+            title_generator.openai_client
+    except Exception as e:
+        print(f"Warm-up error: {str(e)}")
 
 # Global variable to store current demo list for table click functionality
 current_demo_list = []
 
-# Utility functions
-def validate_email(email: str) -> bool:
-    """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+def get_service_db_manager() -> DemoRepository:
+    """Get a database manager that is not tied to a user request
+    (Service Principal token in OAuth environment, system token otherwise)"""
+    try:
+        client_id = os.getenv('DATABRICKS_CLIENT_ID', '').strip()
+        client_secret = os.getenv('DATABRICKS_CLIENT_SECRET', '').strip()
+        use_oauth = bool(client_id and client_secret)
+        
+        if use_oauth:
+            service_token = get_service_principal_token()
+            return create_demo_repository(service_token)
+        else:
+            # Use system token for local development
+            return create_demo_repository()
+    except Exception as e:
+        # Fallback to system token
+        return create_demo_repository()
+
+@traced("search.refresh_index")
+def refresh_demo_search_index(timeout: Optional[float] = 30) -> bool:
+    """Synchronize the local search index, fetching only rows changed since the last sync"""
+    service_db_manager = get_service_db_manager()
+    return demo_search_index.refresh_incremental(
+        lambda: service_db_manager.get_demo_versions(timeout=timeout),
+        lambda demo_ids: service_db_manager.get_search_documents(demo_ids, timeout=timeout)
+    )
+
+def get_service_token() -> str:
+    """Token for calls that are not tied to a user request (same choice as get_service_db_manager)"""
+    client_id = os.getenv('DATABRICKS_CLIENT_ID', '').strip()
+    client_secret = os.getenv('DATABRICKS_CLIENT_SECRET', '').strip()
+    if client_id and client_secret:
+        return get_service_principal_token()
+    return DATABRICKS_TOKEN or ""
+
+# Optional triggered sync of the chat bot's Vector Search index: writes are
+# coalesced into one sync per quiet period instead of a CONTINUOUS pipeline
+vector_search_sync = None
+if VECTOR_SEARCH_SYNC_ENABLED:
+    if DATABRICKS_SERVER_HOSTNAME:
+        vector_search_sync = IndexSyncScheduler(
+            VectorSearchIndexClient(DATABRICKS_SERVER_HOSTNAME, VECTOR_SEARCH_INDEX_NAME, get_service_token)
+        )
+        vector_search_sync.start()
+    else:
+        print("VECTOR_SEARCH_SYNC_ENABLED is set but DATABRICKS_HOST is missing; index sync disabled")
+
+def notify_demos_changed():
+    """Schedule a Vector Search index sync for a write to the demos table"""
+    if vector_search_sync:
+        vector_search_sync.notify_write()
+
+def index_demo_row(demo_id: int, data: Optional[Dict] = None):
+    """Apply a register/update (data) or delete (None) to the local search index right away
+    (the next incremental sync then picks up the stored updated_at and all_info_md)
+    and schedule a Vector Search index sync"""
+    try:
+        if data is None:
+            demo_search_index.remove(int(demo_id))
+        elif len(demo_search_index) > 0:
+            # An empty index is loaded in full by the next search
+            demo_search_index.upsert(dict(data, demo_id=int(demo_id)))
+    except Exception as e:
+        print(f"Search index update error: {str(e)}")
+    demo_search_index.invalidate()
+    notify_demos_changed()
+
+# Optional write-behind mode: registrations and updates are journaled locally and
+# applied to the table by a background flusher (with the non-user database manager)
+write_journal = WriteJournal() if WRITE_BEHIND_ENABLED else None
+if write_journal:
+    write_journal.start_flusher(get_service_db_manager, on_applied=index_demo_row)
+
+def get_write_behind_status() -> str:
+    """Pending write-behind state for the demo list (empty when the mode is off or nothing is pending)"""
+    if not write_journal:
+        return ""
+    pending = write_journal.pending_count()
+    failed = write_journal.failed_count()
+    messages = []
+    if pending:
+        messages.append(f"⏳ データベースへの反映待ちの変更が {pending} 件あります。")
+    if failed:
+        messages.append(f"⚠️ 反映に失敗した変更が {failed} 件あります。管理者に連絡してください。")
+    return "\n\n".join(messages)
+
+def get_vector_search_sync_status() -> str:
+    """Freshness of the chat bot's Vector Search index (empty when triggered sync is off)"""
+    if not vector_search_sync:
+        return ""
+    status = vector_search_sync.status()
+    if status["state"] == "syncing":
+        return "🔄 AIチャットボットの検索インデックスを同期中です。直前の変更は同期完了後に回答へ反映されます。"
+    if status["state"] == "pending":
+        return (f"⏳ AIチャットボットの検索インデックスへの反映待ちの変更が {status['pending_writes']} 件あります"
+                f"（約{status['due_in_seconds'] or 0:.0f}秒後に同期）。")
+    if status["state"] == "failed":
+        return "⚠️ AIチャットボットの検索インデックスの同期に失敗しました。自動的に再試行します。"
+    if status["last_synced_at"]:
+        return f"✅ AIチャットボットの検索インデックスは最新です（最終同期: {status['last_synced_at'].strftime('%Y-%m-%d %H:%M:%S')}）。"
+    return ""
+
+def demo_matches_filters(demo: Dict, filters: Optional[Dict[str, str]]) -> bool:
+    """Apply the demo list filters to an indexed row (same semantics as build_where_clause)"""
+    if not filters:
+        return True
+    for name, column in [("status", "status"), ("confidentiality", "confidentiality"), ("owner", "owner_emp_id")]:
+        if filters.get(name) and (demo.get(column) or "") != filters[name]:
+            return False
+    if filters.get("product"):
+        products = demo.get("products") or []
+        if isinstance(products, str):
+            try:
+                products = json.loads(products)
+            except (ValueError, TypeError):
+                products = [p.strip() for p in products.split(',')]
+        if filters["product"] not in products:
+            return False
+    return True
+
+@traced("search.search_demos")
+def search_demos(query: str, page: int = 1, filters: Optional[Dict[str, str]] = None) -> Tuple[List[Dict], int]:
+    """Ranked keyword search over title, summary, description and products; returns (demos of the page, total hits)"""
+    if len(demo_search_index) == 0:
+        refresh_demo_search_index(timeout=LOCAL_SEARCH_LOAD_TIMEOUT_SECONDS)
+    elif demo_search_index.is_stale():
+        demo_search_index.refresh_in_background(refresh_demo_search_index)
+    return demo_search_index.search_page(
+        query, page, ITEMS_PER_PAGE,
+        row_filter=lambda demo: demo_matches_filters(demo, filters)
+    )
 
+# Utility functions
 def generate_all_info_md(data: Dict) -> str:
     """Generate all_info_md content from demo data (includes ALL columns except all_info_md)"""
     # Handle products - could be list or string
@@ -1251,18 +1258,12 @@ def format_datetime(dt) -> str:
     jst_dt = dt.astimezone(JST)
     return jst_dt.strftime("%Y-%m-%d %H:%M:%S JST")
 
-def parse_products(products_str: str) -> List[str]:
-    """Parse products string to list"""
-    if not products_str:
-        return []
-    # Handle comma-separated values
-    return [p.strip() for p in products_str.split(',') if p.strip()]
-
 def render_markdown(text: str) -> str:
     """Render markdown to HTML"""
     if not text:
         return ""
     try:
+        import markdown
         html = markdown.markdown(text, extensions=['tables', 'fenced_code'])
         return html
     except:
@@ -1338,9 +1339,91 @@ def get_button_states(current_page: int, total_pages: int) -> tuple:
     next_enabled = current_page < total_pages
     return prev_enabled, next_enabled
 
+# Sort columns offered in the demo list (all are accepted by get_demos)
+SORT_COLUMNS = ["created_at", "updated_at", "title", "demo_id"]
+
+def get_sort_column_choices(language: str = "ja") -> List[Tuple[str, str]]:
+    """Sort column dropdown choices as (label, column)"""
+    return [(get_text(f"sort_{column}", language), column) for column in SORT_COLUMNS]
+
+def get_sort_order_choices(language: str = "ja") -> List[Tuple[str, str]]:
+    """Sort order dropdown choices as (label, order)"""
+    return [(get_text("sort_desc", language), "DESC"), (get_text("sort_asc", language), "ASC")]
+
+def build_demo_filters(status: str = "", confidentiality: str = "", product: str = "", owner: str = "") -> Dict[str, str]:
+    """Collect the non-empty filter values for get_demos"""
+    filters = {"status": status, "confidentiality": confidentiality, "product": product, "owner": owner}
+    return {name: value for name, value in filters.items() if value}
+
+def get_facet_choices(counts: Dict[str, int], language: str = "ja") -> List[Tuple[str, str]]:
+    """Filter dropdown choices with facet counts, e.g. ("published (12)", "published")"""
+    choices = [(get_text("filter_all", language), "")]
+    for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        choices.append((f"{value} ({count})", value))
+    return choices
+
+def load_facet_filters(request: gr.Request = None, language: str = "ja") -> tuple:
+    """Dropdown updates for the status, confidentiality, product and owner filters (one cached grouped query)"""
+    try:
+        user_token = get_user_access_token(request) if request else None
+        facets = create_demo_repository(user_token).get_facet_counts()
+    except Exception as e:
+        print(f"Load facet error: {str(e)}")
+        facets = {}
+    return tuple(
+        gr.update(choices=get_facet_choices(facets.get(name, {}), language))
+        for name in ["status", "confidentiality", "product", "owner"]
+    )
+
 # Tab 1: Demo List
-def load_demo_list(page: int = 1, language: str = "ja", request: gr.Request = None):
-    """Load demo list with pagination and sorting"""
+def format_demo_rows(demos: List[Dict], language: str = "ja") -> List[Dict]:
+    """Format one page of demo rows for the list table (localized column names)"""
+    formatted_demos = []
+    for demo in demos:
+        # Safely handle None values and type conversion
+        try:
+            # Handle demo_id - convert string to int if needed
+            demo_id = demo.get("demo_id")
+            if demo_id is not None:
+                demo_id = int(demo_id) if isinstance(demo_id, str) else demo_id
+            else:
+                demo_id = 0
+        
+            # Handle products - could be string or list
+            products = demo.get("products", [])
+            if isinstance(products, str):
+                # Handle JSON string format like '["Apps"]'
+                try:
+                    import json
+                    products = json.loads(products)
+                except:
+                    # If JSON parsing fails, treat as comma-separated string
+                    products = [p.strip() for p in products.split(',') if p.strip()]
+            products_str = ", ".join(products) if products else ""
+        
+            formatted_demo = {
+                get_text("table_demo_id", language): demo_id,
+                get_text("table_title", language): demo.get("title") or "",
+                get_text("table_summary", language): demo.get("summary") or "",
+                get_text("table_owner", language): demo.get("owner_emp_id") or "",
+                get_text("table_creator", language): demo.get("creator_emp_id") or "",
+                get_text("table_updated", language): format_datetime(demo.get("updated_at")),
+                get_text("table_status", language): demo.get("status") or "",
+                get_text("table_demo_url", language): demo.get("demo_url") or "",
+                get_text("table_repo_url", language): demo.get("repo_url") or "",
+                get_text("table_products", language): products_str,
+                get_text("table_confidentiality", language): demo.get("confidentiality") or "",
+                get_text("table_remarks", language): demo.get("remarks") or ""
+            }
+            formatted_demos.append(formatted_demo)
+        except Exception as format_error:
+            print(f"Error formatting demo: {format_error}")
+            continue
+    return formatted_demos
+
+def load_demo_list(page: int = 1, language: str = "ja", request: gr.Request = None, filters: Optional[Dict[str, str]] = None, sort_column: str = "created_at", sort_order: str = "DESC", query: str = ""):
+    """Load demo list with pagination, server-side filters and sorting
+    (or ranked keyword search hits when query is given)"""
     try:
         # Validate inputs with proper type checking
         if page is None or not isinstance(page, (int, float)):
@@ -1348,91 +1431,58 @@ def load_demo_list(page: int = 1, language: str = "ja", request: gr.Request = No
         else:
             page = int(page)
             
-        # Get user token and create database manager
-        user_token = get_user_access_token(request) if request else None
-        user_db_manager = APIBasedDatabaseManager(user_token)
-        
-        # Use default sorting by created_at DESC (newest first)
-        demos, total_count = user_db_manager.get_demos(page, "created_at", "DESC")
-        
-        # Format data for display
-        formatted_demos = []
-        for demo in demos:
-            # Safely handle None values and type conversion
-            try:
-                # Handle demo_id - convert string to int if needed
-                demo_id = demo.get("demo_id")
-                if demo_id is not None:
-                    demo_id = int(demo_id) if isinstance(demo_id, str) else demo_id
-                else:
-                    demo_id = 0
-                
-                # Handle products - could be string or list
-                products = demo.get("products", [])
-                if isinstance(products, str):
-                    # Handle JSON string format like '["Apps"]'
-                    try:
-                        import json
-                        products = json.loads(products)
-                    except:
-                        # If JSON parsing fails, treat as comma-separated string
-                        products = [p.strip() for p in products.split(',') if p.strip()]
-                products_str = ", ".join(products) if products else ""
-                
-                formatted_demo = {
-                    get_text("table_demo_id", language): demo_id,
-                    get_text("table_title", language): demo.get("title") or "",
-                    get_text("table_summary", language): demo.get("summary") or "",
-                    get_text("table_owner", language): demo.get("owner_emp_id") or "",
-                    get_text("table_creator", language): demo.get("creator_emp_id") or "",
-                    get_text("table_updated", language): format_datetime(demo.get("updated_at")),
-                    get_text("table_status", language): demo.get("status") or "",
-                    get_text("table_demo_url", language): demo.get("demo_url") or "",
-                    get_text("table_repo_url", language): demo.get("repo_url") or "",
-                    get_text("table_products", language): products_str,
-                    get_text("table_confidentiality", language): demo.get("confidentiality") or "",
-                    get_text("table_remarks", language): demo.get("remarks") or ""
-                }
-                formatted_demos.append(formatted_demo)
-            except Exception as format_error:
-                print(f"Error formatting demo: {format_error}")
-                continue
-        
-        # Store current demo list globally for table click functionality
-        global current_demo_list, last_displayed_demo_id, last_displayed_demo_html
-        current_demo_list = formatted_demos
-        
-        # Clear cache when new demo list is loaded
-        last_displayed_demo_id = None
-        last_displayed_demo_html = None
-        
-        # Define column order with creator_emp_id before owner_emp_id
-        column_order = [
-            get_text("table_demo_id", language),
-            get_text("table_title", language),
-            get_text("table_summary", language),
-            get_text("table_creator", language),
-            get_text("table_owner", language),
-            get_text("table_updated", language),
-            get_text("table_status", language),
-            get_text("table_demo_url", language),
-            get_text("table_repo_url", language),
-            get_text("table_products", language),
-            get_text("table_confidentiality", language),
-            get_text("table_remarks", language)
-        ]
-        
-        # Handle empty data case properly
-        if formatted_demos:
-            df = pd.DataFrame(formatted_demos)[column_order]
+        if query and query.strip():
+            # Keyword search is answered from the local index, ranked by relevance
+            demos, total_count = search_demos(query, page, filters)
         else:
-            # Create empty DataFrame with proper column names for empty data
-            df = pd.DataFrame(columns=column_order)
+            # Get user token and create database manager
+            user_token = get_user_access_token(request) if request else None
+            user_db_manager = create_demo_repository(user_token)
+            
+            # Default sorting is created_at DESC (newest first); filters are pushed into the statement
+            demos, total_count = user_db_manager.get_demos(page, sort_column or "created_at", sort_order or "DESC", filters)
+        
+        with span("demo_list.build_dataframe", rows=len(demos)):
+            # Format data for display
+            formatted_demos = format_demo_rows(demos, language)
+        
+            # Store current demo list globally for table click functionality
+            global current_demo_list, last_displayed_demo_id, last_displayed_demo_html
+            current_demo_list = formatted_demos
+        
+            # Clear cache when new demo list is loaded
+            last_displayed_demo_id = None
+            last_displayed_demo_html = None
+        
+            # Define column order with creator_emp_id before owner_emp_id
+            column_order = [
+                get_text("table_demo_id", language),
+                get_text("table_title", language),
+                get_text("table_summary", language),
+                get_text("table_creator", language),
+                get_text("table_owner", language),
+                get_text("table_updated", language),
+                get_text("table_status", language),
+                get_text("table_demo_url", language),
+                get_text("table_repo_url", language),
+                get_text("table_products", language),
+                get_text("table_confidentiality", language),
+                get_text("table_remarks", language)
+            ]
+        
+            # Handle empty data case properly
+            if formatted_demos:
+                df = pd.DataFrame(formatted_demos)[column_order]
+            else:
+                # Create empty DataFrame with proper column names for empty data
+                df = pd.DataFrame(columns=column_order)
         
         # Calculate pagination info - ensure proper type conversion
         total_count = int(total_count) if total_count is not None else 0
         total_pages = max(1, (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
         page_info = f"Page {page} of {total_pages} (Total: {total_count} demos)"
+        if query and query.strip():
+            page_info += f" - {get_text('search_hits', language)}: {query.strip()}"
         
         # Calculate button states
         prev_enabled, next_enabled = get_button_states(page, total_pages)
@@ -1459,6 +1509,78 @@ def load_demo_list(page: int = 1, language: str = "ja", request: gr.Request = No
         ]
         return pd.DataFrame(columns=column_order), error_msg, 1, 1, False, False
 
+def export_demo_catalog(export_format: str, request: gr.Request, progress=gr.Progress()):
+    """Stream the whole catalog to a downloadable CSV / JSONL / Parquet file"""
+    try:
+        user_token = get_user_access_token(request) if request else None
+        user_db_manager = create_demo_repository(user_token)
+        
+        export_format = export_format or "csv"
+        timestamp = datetime.now(pytz.timezone('Asia/Tokyo')).strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(new_export_dir(), f"demos_{timestamp}.{export_format}")
+        
+        progress(0, desc="Exporting...")
+        total = export_catalog(user_db_manager, path, export_format, progress=lambda count: progress(None, desc=f"Exported {count} demos..."))
+        return f"✅ {total}件のデモをエクスポートしました。", gr.update(value=path, visible=True)
+    except Exception as e:
+        print(f"Export error: {str(e)}")
+        return f"Error: エクスポートに失敗しました ({str(e)})", gr.update(value=None, visible=False)
+
+def import_demo_catalog(file_path: str, request: gr.Request, progress=gr.Progress()):
+    """Validate an uploaded CSV / JSONL file and insert all demos in batches"""
+    try:
+        if not file_path:
+            return "Error: CSVまたはJSONLファイルを選択してください。"
+        
+        user_token = get_user_access_token(request) if request else None
+        user_db_manager = create_demo_repository(user_token)
+        
+        progress(0, desc="Validating rows...")
+        total = import_catalog(
+            user_db_manager, file_path,
+            progress=lambda done, total: progress(done / total, desc=f"Imported {done}/{total} demos..."),
+            owner=get_current_user_email(request)
+        )
+        demo_search_index.invalidate()
+        notify_demos_changed()
+        return f"✅ {total}件のデモを一括登録しました。"
+    except ImportValidationError as e:
+        shown = "\n".join(f"- {message}" for message in e.errors[:20])
+        more = f"\n- ...ほか{len(e.errors) - 20}件" if len(e.errors) > 20 else ""
+        return f"Error: 入力内容に誤りがあるため登録しませんでした。\n{shown}{more}"
+    except ImportFailed as e:
+        print(f"Import error: {str(e)}")
+        if e.imported:
+            demo_search_index.invalidate()
+            notify_demos_changed()
+        return f"Error: {e.total}件中{e.imported}件を登録した時点で一括登録に失敗しました ({str(e.cause)})"
+    except Exception as e:
+        print(f"Import error: {str(e)}")
+        return f"Error: 一括登録に失敗しました ({str(e)})"
+
+def render_related_demos(demo_id) -> str:
+    """"Related demos" panel for the detail pane, from the neighbours precomputed by the local search index"""
+    try:
+        if demo_search_index.is_stale():
+            # Loaded in the background; an empty index shows the panel from a later click on
+            demo_search_index.refresh_in_background(refresh_demo_search_index)
+        related = demo_search_index.related(int(demo_id))
+    except Exception as e:
+        print(f"Related demos error: {str(e)}")
+        return ""
+    if not related:
+        return ""
+    items = []
+    for row in related:
+        title = escape(row.get('title') or 'タイトル未設定')
+        demo_url = row.get('demo_url') or ''
+        if demo_url.startswith(('http://', 'https://')):
+            title = f'<a href="{escape(demo_url)}" target="_blank">{title}</a>'
+        summary = f'<br><small>{escape(row["summary"])}</small>' if row.get('summary') else ''
+        items.append(f'<li>{title} (Demo ID: {row.get("demo_id")}){summary}</li>')
+    return (f'<div class="demo-details-content related-demos" style="padding: 12px 20px; margin-top: 12px; border-radius: 8px;">'
+            f'<h4>関連するデモ</h4><ul>{"".join(items)}</ul></div>')
+
 def show_demo_all_info_by_click(evt: gr.SelectData):
     """Show all_info_md content when a table row is clicked"""
     try:
@@ -1482,32 +1604,20 @@ def show_demo_all_info_by_click(evt: gr.SelectData):
             return "Demo IDが見つかりません。"
         
         # Check if we already have this demo's details cached
+        record_cache("demo_detail", demo_id == last_displayed_demo_id and bool(last_displayed_demo_html))
         if demo_id == last_displayed_demo_id and last_displayed_demo_html:
             # Return cached result to avoid unnecessary database query
-            return last_displayed_demo_html
+            return last_displayed_demo_html + render_related_demos(demo_id)
         
-        # Get demo with all_info_md using internal function
+        # Get only all_info_md (it already contains every other column)
         # Use Service Principal token for read-only operations in event handlers
-        try:
-            # Try to get Service Principal token for OAuth environment
-            client_id = os.getenv('DATABRICKS_CLIENT_ID', '').strip()
-            client_secret = os.getenv('DATABRICKS_CLIENT_SECRET', '').strip()
-            use_oauth = bool(client_id and client_secret)
-            
-            if use_oauth:
-                service_token = get_service_principal_token()
-                fallback_db_manager = APIBasedDatabaseManager(service_token)
-            else:
-                # Use system token for local development
-                fallback_db_manager = APIBasedDatabaseManager()
-        except Exception as e:
-            # Fallback to system token
-            fallback_db_manager = APIBasedDatabaseManager()
+        fallback_db_manager = get_service_db_manager()
             
-        demo_full = fallback_db_manager.get_demo_by_id_internal(demo_id)
+        demo_full = fallback_db_manager.get_demo_detail(demo_id)
         
         if demo_full and demo_full.get('all_info_md'):
             # Convert markdown to HTML for display
+            import markdown
             html_content = markdown.markdown(demo_full['all_info_md'])
             formatted_html = f'<div class="demo-details-content" style="padding: 20px; border-radius: 8px; max-height: 600px; overflow-y: auto;">{html_content}</div>'
             
@@ -1515,7 +1625,7 @@ def show_demo_all_info_by_click(evt: gr.SelectData):
             last_displayed_demo_id = demo_id
             last_displayed_demo_html = formatted_html
             
-            return formatted_html
+            return formatted_html + render_related_demos(demo_id)
         elif demo_full:
             error_msg = "このデモにはall_info_md情報がありません。（古いデータの可能性があります）"
             # Cache the error result as well
@@ -1627,9 +1737,16 @@ def register_demo(title, summary, description_md, owner_emp_id, creator_emp_id,
         
         # Get user token and create database manager
         user_token = get_user_access_token(request)
-        user_db_manager = APIBasedDatabaseManager(user_token)
+        user_db_manager = create_demo_repository(user_token)
+        
+        if write_journal:
+            # Acknowledge as soon as the write is journaled; the flusher inserts it
+            write_journal.append_insert(data)
+            progress(1.0, desc="Registration accepted!")
+            return f"Success: 登録を受け付けました。データベースへの反映待ちです（未反映: {write_journal.pending_count()}件）", "", "", "", owner_emp_id, "", "draft", "", "", "", "internal", ""
         
         demo_id = user_db_manager.insert_demo(data)
+        index_demo_row(demo_id, data)
         
         progress(1.0, desc="Registration completed!")
         
@@ -1644,34 +1761,68 @@ def register_demo(title, summary, description_md, owner_emp_id, creator_emp_id,
     except Exception as e:
         return f"Error: {str(e)}", title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks
 
+def find_near_duplicate_demos(title: str, description_md: str) -> List[Tuple[float, Dict]]:
+    """Registered demos that look like the same demo (from the in-memory index, no query)"""
+    if NEAR_DUPLICATE_THRESHOLD <= 0:
+        return []
+    if demo_search_index.is_stale():
+        demo_search_index.refresh_in_background(refresh_demo_search_index)
+    try:
+        return demo_search_index.near_duplicates(title or "", description_md or "", NEAR_DUPLICATE_THRESHOLD)
+    except Exception as e:
+        print(f"Near-duplicate check error: {str(e)}")
+        return []
+
+def check_duplicates_or_register(title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, request: gr.Request, progress=gr.Progress()):
+    """Register the demo, or show a confirmation when it looks like a demo that is already registered"""
+    duplicates = find_near_duplicate_demos(title, description_md) if title and owner_emp_id and status and demo_url else []
+    if not duplicates:
+        return register_demo(title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, request, progress) + (gr.update(visible=False), "")
+    
+    similar = "\n".join(
+        f"- **{row.get('title') or 'タイトル未設定'}** (Demo ID: {row.get('demo_id')}) 類似度 {similarity:.0%}"
+        for similarity, row in duplicates
+    )
+    confirmation_msg = f"""
+### ⚠️ 似たデモが登録済みです
+
+入力したタイトルと詳細説明は、次のデモとよく似ています。
+
+{similar}
+
+同じデモの場合は「デモ更新」タブで既存のデモを更新してください。別のデモとして登録する場合は「別のデモとして登録」を押してください。
+    """
+    # Keep the input and show the confirmation area
+    return ("", title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, gr.update(visible=True), confirmation_msg)
+
 # Tab 3: Demo Update
 def search_demo_for_update(demo_id, request: gr.Request):
-    """Search demo by ID for update"""
+    """Search demo by ID for update; the last output is the version the update is applied against"""
     try:
         # Convert number to string if needed
         if demo_id is None or demo_id == "":
-            return "", "", "", "", "", "", "", "", "", "", "", "デモIDを入力してください。"
+            return "", "", "", "", "", "", "", "", "", "", "", "デモIDを入力してください。", None
         
         demo_id_str = str(int(demo_id)) if isinstance(demo_id, (int, float)) else str(demo_id).strip()
         
         if not demo_id_str:
-            return "", "", "", "", "", "", "", "", "", "", "", "デモIDを入力してください。"
+            return "", "", "", "", "", "", "", "", "", "", "", "デモIDを入力してください。", None
         
         # Convert to int with better error handling
         try:
             demo_id_int = int(float(demo_id_str))
             if demo_id_int <= 0:
-                return "", "", "", "", "", "", "", "", "", "", "", "デモIDは正の数値である必要があります。"
+                return "", "", "", "", "", "", "", "", "", "", "", "デモIDは正の数値である必要があります。", None
         except (ValueError, TypeError, OverflowError):
-            return "", "", "", "", "", "", "", "", "", "", "", "無効なデモID形式です。正の数値を入力してください。"
+            return "", "", "", "", "", "", "", "", "", "", "", "無効なデモID形式です。正の数値を入力してください。", None
         
         # Get user access token for database operations
         user_token = get_user_access_token(request)
-        user_db_manager = APIBasedDatabaseManager(user_token)
-        demo = user_db_manager.get_demo_by_id(demo_id_int)
+        user_db_manager = create_demo_repository(user_token)
+        demo = user_db_manager.get_demo_for_update(demo_id_int)
         
         if not demo:
-            return "", "", "", "", "", "", "", "", "", "", "", "Demo not found."
+            return "", "", "", "", "", "", "", "", "", "", "", "Demo not found.", None
         
         # Handle products array properly
         products_str = ""
@@ -1710,24 +1861,23 @@ def search_demo_for_update(demo_id, request: gr.Request):
             products_str,
             demo["confidentiality"] or "",
             demo["remarks"] or "",
-            f"Demo found: {demo['title']}"
+            f"Demo found: {demo['title']}",
+            {"demo_id": demo_id_int, "created_at": demo.get("created_at"), "updated_at": demo.get("updated_at")}
         )
         
     except ValueError:
-        return "", "", "", "", "", "", "", "", "", "", "", "Invalid demo ID format."
+        return "", "", "", "", "", "", "", "", "", "", "", "Invalid demo ID format.", None
     except Exception as e:
-        return "", "", "", "", "", "", "", "", "", "", "", f"Error: {str(e)}"
+        return "", "", "", "", "", "", "", "", "", "", "", f"Error: {str(e)}", None
 
-def check_update_permission_or_execute(demo_id: str, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, request: gr.Request):
-    """Check permission before update or show confirmation"""
+def check_update_permission_or_execute(demo_id: str, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, version=None, request: gr.Request = None):
+    """Update if the current user owns the demo (checked by the UPDATE itself) or show confirmation"""
     current_user_email = get_current_user_email(request)
-    user_token = get_user_access_token(request)
-    has_permission, original_owner, message = check_ownership_permission(demo_id, current_user_email, user_token)
-    
-    if has_permission:
+    try:
         # Direct execution - user owns the demo
-        return update_demo(demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, request) + (gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False))
-    else:
+        return update_demo(demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, version, request, required_owner=current_user_email) + (gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False))
+    except NotDemoOwner as e:
+        original_owner = e.owner_emp_id
         # Show confirmation area
         confirmation_msg = f"""
 ### ⚠️ 権限確認
@@ -1743,15 +1893,13 @@ def check_update_permission_or_execute(demo_id: str, title, summary, description
         return ("", safe_demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, "", gr.update(visible=True), confirmation_msg, gr.update(value="確認して更新実行", visible=True), gr.update(visible=False))
 
 def check_delete_permission_or_execute(demo_id: str, request: gr.Request):
-    """Check permission before delete or show confirmation"""
+    """Delete if the current user owns the demo (checked by the DELETE itself) or show confirmation"""
     current_user_email = get_current_user_email(request)
-    user_token = get_user_access_token(request)
-    has_permission, original_owner, message = check_ownership_permission(demo_id, current_user_email, user_token)
-    
-    if has_permission:
+    try:
         # Direct execution - user owns the demo
-        return delete_demo(demo_id, request) + (gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False))
-    else:
+        return delete_demo(demo_id, request, required_owner=current_user_email) + (gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False))
+    except NotDemoOwner as e:
+        original_owner = e.owner_emp_id
         # Show confirmation area
         confirmation_msg = f"""
 ### ⚠️ 削除権限確認
@@ -1767,8 +1915,14 @@ def check_delete_permission_or_execute(demo_id: str, request: gr.Request):
         safe_demo_id = None if demo_id == "" or demo_id is None else demo_id
         return ("", safe_demo_id, "", "", "", "", "", "draft", "", "", "", "internal", "", "", gr.update(visible=True), confirmation_msg, gr.update(visible=False), gr.update(value="確認して削除実行", visible=True))
 
-def update_demo(demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, request: gr.Request, progress=gr.Progress()):
-    """Update existing demo with progress display"""
+def update_demo(demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, version=None, request: gr.Request = None, progress=gr.Progress(), required_owner: Optional[str] = None):
+    """Update existing demo with progress display
+
+    version is what search_demo_for_update loaded; when it belongs to this demo the
+    update is applied only if nobody changed the demo since (one conditional UPDATE).
+    With required_owner it is applied only if that user owns the demo, and NotDemoOwner
+    is raised to the caller otherwise.
+    """
     try:
         progress(0.1, desc="Validating input...")
         
@@ -1827,17 +1981,42 @@ def update_demo(demo_id, title, summary, description_md, owner_emp_id, creator_e
         
         progress(0.8, desc="Updating demo...")
         
+        # The loaded version only applies to the demo it was searched for (IDs can be typed in directly)
+        expected_version = version if version and version.get("demo_id") == demo_id_int else None
+        
         # Get user token and create database manager
         user_token = get_user_access_token(request)
-        user_db_manager = APIBasedDatabaseManager(user_token)
-        
-        user_db_manager.update_demo(demo_id_int, data)
+        user_db_manager = create_demo_repository(user_token)
+        
+        if write_journal:
+            if required_owner is not None:
+                # The flusher applies the write later, so ownership has to be checked now
+                demo = user_db_manager.get_demo_owner(demo_id_int)
+                if not demo:
+                    raise DemoNotFound(f"Demo {demo_id_int} not found")
+                if demo.get("owner_emp_id") != required_owner:
+                    raise NotDemoOwner(demo_id_int, demo.get("owner_emp_id") or "")
+            # Acknowledge as soon as the write is journaled; the flusher applies it
+            write_journal.append_update(demo_id_int, data, expected_version=expected_version)
+            index_demo_row(demo_id_int, data)
+            progress(1.0, desc="Update accepted!")
+            return f"Success: 更新を受け付けました。データベースへの反映待ちです（未反映: {write_journal.pending_count()}件）", None, "", "", "", "", "", "draft", "", "", "", "internal", "", ""
+        
+        user_db_manager.update_demo(demo_id_int, data, expected_version=expected_version, required_owner=required_owner)
+        index_demo_row(demo_id_int, data)
         
         progress(1.0, desc="Update completed!")
         
         # Clear all fields on successful update
         return "Success: Demo updated successfully.", None, "", "", "", "", "", "draft", "", "", "", "internal", "", ""
         
+    except NotDemoOwner:
+        raise
+    except UpdateConflict:
+        # Keep the user's edits in the form so they can be reapplied after reloading
+        return "Error: このデモは読み込み後に他の利用者によって更新されています。入力内容を控えてから再度検索し、最新の内容に反映してください。", demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, "更新が競合しました。"
+    except DemoNotFound:
+        return "Error: Demo not found.", demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, "Demo not found."
     except ValueError:
         # Ensure demo_id is numeric or None for gr.Number component
         safe_demo_id = None if demo_id == "" or demo_id is None else demo_id
@@ -1847,8 +2026,12 @@ def update_demo(demo_id, title, summary, description_md, owner_emp_id, creator_e
         safe_demo_id = None if demo_id == "" or demo_id is None else demo_id
         return f"Error: {str(e)}", safe_demo_id, title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products_str, confidentiality, remarks, f"Error: {str(e)}"
 
-def delete_demo(demo_id, request: gr.Request, progress=gr.Progress()):
-    """Delete demo by ID with progress display"""
+def delete_demo(demo_id, request: gr.Request, progress=gr.Progress(), required_owner: Optional[str] = None):
+    """Delete demo by ID with progress display
+
+    With required_owner the demo is deleted only if that user owns it, and NotDemoOwner
+    is raised to the caller otherwise.
+    """
     try:
         progress(0.1, desc="Validating input...")
         
@@ -1873,27 +2056,25 @@ def delete_demo(demo_id, request: gr.Request, progress=gr.Progress()):
             safe_demo_id = None if demo_id == "" or demo_id is None else demo_id
             return "Error: 無効なデモID形式です。", safe_demo_id, "", "", "", "", "", "draft", "", "", "", "internal", "", "無効なデモID形式です。"
         
-        progress(0.5, desc="Checking demo existence...")
+        progress(0.5, desc="Deleting demo...")
         
         # Get user token and create database manager
         user_token = get_user_access_token(request)
-        user_db_manager = APIBasedDatabaseManager(user_token)
-        
-        # Check if demo exists before deletion
-        demo = user_db_manager.get_demo_by_id(demo_id_int)
-        if not demo:
-            return "Error: Demo not found.", demo_id, "", "", "", "", "", "draft", "", "", "", "internal", "", "Demo not found."
+        user_db_manager = create_demo_repository(user_token)
         
-        progress(0.8, desc="Deleting demo...")
-        
-        # Delete the demo
-        user_db_manager.delete_demo(demo_id_int)
+        # Delete the demo (a missing demo is reported by the DELETE's affected row count)
+        user_db_manager.delete_demo(demo_id_int, required_owner=required_owner)
+        index_demo_row(demo_id_int)
         
         progress(1.0, desc="Deletion completed!")
         
         # Clear all fields on successful deletion
         return f"Success: Demo ID {demo_id_int} has been deleted successfully.", None, "", "", "", "", "", "draft", "", "", "", "internal", "", ""
         
+    except NotDemoOwner:
+        raise
+    except DemoNotFound:
+        return "Error: Demo not found.", demo_id, "", "", "", "", "", "draft", "", "", "", "internal", "", "Demo not found."
     except ValueError:
         # Ensure demo_id is numeric or None for gr.Number component
         safe_demo_id = None if demo_id == "" or demo_id is None else demo_id
@@ -1904,12 +2085,27 @@ def delete_demo(demo_id, request: gr.Request, progress=gr.Progress()):
         return f"Error: {str(e)}", safe_demo_id, "", "", "", "", "", "draft", "", "", "", "internal", "", f"Error: {str(e)}"
 
 # Tab 4: Semantic Search Chat
-def chat_with_rag(message: str, history: List[Dict]):
-    """Chat with RAG system - progressive update with thinking indicator"""
+def chat_with_rag(message: str, history: List[Dict], memory: Optional[ConversationMemory] = None):
+    """Chat with RAG system - progressive update with thinking indicator
+    
+    history holds the rendered HTML shown in the chatbot, memory holds the raw
+    Markdown turns that are actually sent to the RAG endpoint.
+    """
+    if memory is None:
+        memory = ConversationMemory(CHAT_HISTORY_TOKEN_BUDGET, CHAT_SUMMARY_TOKEN_BUDGET)
+        track_chat_session(memory)
+    
     try:
+        # Keep the local search index fresh (used for candidates and when the RAG endpoint misses its deadline)
+        demo_search_index.refresh_in_background(refresh_demo_search_index)
+        
+        # Show local candidates immediately, without waiting for the RAG endpoint
+        candidates = demo_search_index.search(message, limit=3)
+        candidates_md = f"**関連しそうなデモ（ローカル検索）**\n\n{format_candidates(candidates)}" if candidates else ""
+        
         # First, add user message to history and yield to show it immediately
         history.append({"role": "user", "content": message})
-        yield "", history
+        yield "", history, memory, candidates_md
         
         # Add animated "thinking" indicator with blinking and loading dots effect
         thinking_msg = '''<div style="color: #666; font-size: 14px;">
@@ -1936,26 +2132,17 @@ def chat_with_rag(message: str, history: List[Dict]):
         <span class="thinking">🤖 考え中</span><span class="dots"></span> 💭
         </div>'''
         history.append({"role": "assistant", "content": thinking_msg})
-        yield "", history
-        
-        # Build messages for RAG endpoint (simplified format)
-        messages = []
-        
-        # Add conversation history (limit to recent messages to avoid token limits)
-        # Exclude the user message and thinking indicator we just added
-        recent_history = history[:-2][-6:] if len(history) > 8 else history[:-2]
-        for msg in recent_history:
-            if msg.get("role") and msg.get("content"):
-                messages.append({
-                    "role": msg["role"], 
-                    "content": msg["content"]
-                })
+        yield "", history, memory, gr.update()
         
-        # Add current user message
-        messages.append({"role": "user", "content": message})
+        # Build messages for RAG endpoint from the raw Markdown memory
+        # (older turns beyond the token budget are sent as a summary)
+        messages = memory.build_messages(message)
         
         # Get response from RAG
-        response = rag_client.chat_completion(messages)
+        response = rag_client.chat_completion(messages, context_summary=memory.context_summary())
+        
+        memory.add("user", message)
+        memory.add("assistant", response)
         
         # Convert markdown footnotes to readable format and render as markdown
         response_converted = convert_markdown_footnotes(response)
@@ -1963,7 +2150,7 @@ def chat_with_rag(message: str, history: List[Dict]):
         
         # Replace thinking indicator with actual response
         history[-1] = {"role": "assistant", "content": response_html}
-        yield "", history
+        yield "", history, memory, gr.update()
         
     except Exception as e:
         error_msg = f"Error: {str(e)}"
@@ -1971,7 +2158,7 @@ def chat_with_rag(message: str, history: List[Dict]):
         # Add user message first if not already added
         if not history or history[-1].get("role") != "user" or history[-1].get("content") != message:
             history.append({"role": "user", "content": message})
-            yield "", history
+            yield "", history, memory, gr.update()
         
         # Add animated "thinking" indicator with blinking and loading dots effect
         thinking_msg = '''<div style="color: #666; font-size: 14px;">
@@ -1998,11 +2185,22 @@ def chat_with_rag(message: str, history: List[Dict]):
         <span class="thinking">🤖 考え中</span><span class="dots"></span> 💭
         </div>'''
         history.append({"role": "assistant", "content": thinking_msg})
-        yield "", history
+        yield "", history, memory, gr.update()
         
         # Replace thinking indicator with error message
         history[-1] = {"role": "assistant", "content": error_msg}
-        yield "", history
+        yield "", history, memory, gr.update()
+
+def raise_busy_error(error: WorkloadRejected):
+    """Tell the user that the event was not admitted because its workload class is saturated"""
+    raise gr.Error("現在混雑しています。しばらくしてから再度お試しください。")
+
+def workload_handler(name: str, fn):
+    """Run an event handler under the concurrency limit and priority of workload class name
+    (traced as the root span of the request, including the scheduler wait)"""
+    handler = run_as_workload(name, fn, on_rejected=raise_busy_error)
+    handler = timed_handler(fn.__name__, name)(handler)
+    return traced(f"handler.{fn.__name__}", workload=name)(handler)
 
 # Create Gradio interface
 def create_interface():
@@ -2175,12 +2373,34 @@ def create_interface():
                             page_input = gr.Number(label="ページ", value=1, precision=0, minimum=1, container=False, scale=1)
                             refresh_btn = gr.Button("🔄 最新情報に更新", variant="primary", scale=1)
                 
+                # Server-side filters (choices show facet counts) and sorting
+                with gr.Row():
+                    status_filter = gr.Dropdown(label="ステータス", choices=get_facet_choices({}), value="", scale=1)
+                    confidentiality_filter = gr.Dropdown(label="機密レベル", choices=get_facet_choices({}), value="", scale=1)
+                    product_filter = gr.Dropdown(label="利用製品", choices=get_facet_choices({}), value="", scale=1)
+                    owner_filter = gr.Dropdown(label="代表投稿者", choices=get_facet_choices({}), value="", scale=1)
+                    sort_column_input = gr.Dropdown(label="並び替え", choices=get_sort_column_choices("ja"), value="created_at", scale=1)
+                    sort_order_input = gr.Dropdown(label="順序", choices=get_sort_order_choices("ja"), value="DESC", scale=1)
+                
+                # Keyword search over the local full-text index (results are ranked by relevance)
+                with gr.Row():
+                    keyword_search_input = gr.Textbox(label="キーワード検索", placeholder="タイトル・要約・詳細説明・利用製品から検索（Enterで検索）", scale=4)
+                    keyword_search_btn = gr.Button("検索", variant="secondary", scale=1)
+                
+                filter_inputs = [status_filter, confidentiality_filter, product_filter, owner_filter, sort_column_input, sort_order_input, keyword_search_input]
+                facet_outputs = [status_filter, confidentiality_filter, product_filter, owner_filter]
+                
                 # Pagination controls
                 with gr.Row():
                     prev_btn = gr.Button("« 前へ", size="sm")
                     page_info = gr.Markdown("")
                     next_btn = gr.Button("次へ »", size="sm")
                 
+                # Write-behind state (only shown when WRITE_BEHIND_ENABLED)
+                write_behind_info = gr.Markdown("", visible=bool(write_journal))
+                if write_journal:
+                    gr.Timer(5).tick(get_write_behind_status, outputs=[write_behind_info], queue=False)
+                
                 # Hidden states for pagination
                 current_page_state = gr.State(value=1)
                 total_pages_state = gr.State(value=1)
@@ -2192,56 +2412,101 @@ def create_interface():
                 
                 demo_details = gr.HTML(label="デモ詳細", value="<p>テーブルの行をクリックすると詳細が表示されます。</p>", elem_id="demo-details")
                 
+                # Full catalog export (streamed chunk by chunk to a file)
+                with gr.Accordion("📥 カタログのエクスポート", open=False):
+                    with gr.Row():
+                        export_format_input = gr.Radio(choices=EXPORT_FORMATS, value="csv", label="形式", scale=2)
+                        export_btn = gr.Button("エクスポート", variant="secondary", scale=1)
+                    export_status = gr.Markdown("")
+                    export_file = gr.File(label="ダウンロード", visible=False, interactive=False)
+                
                 # Event handlers
-                def refresh_demo_list(page, request: gr.Request):
-                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(page, "ja", request)
-                    return df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)
+                def refresh_demo_list(page, status, confidentiality, product, owner, sort_column, sort_order, query, request: gr.Request):
+                    filters = build_demo_filters(status, confidentiality, product, owner)
+                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(page, "ja", request, filters, sort_column, sort_order, query)
+                    return (df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)) + load_facet_filters(request)
                 
                 def initial_load_demo_list(request: gr.Request):
                     """Initial load function that works with demo.load"""
                     df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(1, "ja", request)
-                    return df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)
+                    return (df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)) + load_facet_filters(request)
                 
                 refresh_btn.click(
-                    refresh_demo_list,
-                    inputs=[page_input],
-                    outputs=[demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn]
+                    workload_handler("db_read", refresh_demo_list),
+                    inputs=[page_input] + filter_inputs,
+                    outputs=[demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn] + facet_outputs,
+                    **event_options("db_read")
                 )
                 
+                # Filter or sort change - back to the first page
+                def apply_demo_filters(status, confidentiality, product, owner, sort_column, sort_order, query, request: gr.Request):
+                    filters = build_demo_filters(status, confidentiality, product, owner)
+                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(1, "ja", request, filters, sort_column, sort_order, query)
+                    return 1, df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)
+                
+                for filter_input in facet_outputs + [sort_column_input, sort_order_input]:
+                    filter_input.input(
+                        workload_handler("db_read", apply_demo_filters),
+                        inputs=filter_inputs,
+                        outputs=[page_input, demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn],
+                        **event_options("db_read")
+                    )
+                
+                for keyword_event in [keyword_search_input.submit, keyword_search_btn.click]:
+                    keyword_event(
+                        workload_handler("db_read", apply_demo_filters),
+                        inputs=filter_inputs,
+                        outputs=[page_input, demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn],
+                        **event_options("db_read")
+                    )
+                
                 # Previous page button
-                def go_previous_page(current_page, total_pages, request: gr.Request):
+                def go_previous_page(current_page, total_pages, status, confidentiality, product, owner, sort_column, sort_order, query, request: gr.Request):
                     new_page = get_previous_page(current_page)
-                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(new_page, "ja", request)
+                    filters = build_demo_filters(status, confidentiality, product, owner)
+                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(new_page, "ja", request, filters, sort_column, sort_order, query)
                     return new_page, df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)
                 
                 prev_btn.click(
-                    go_previous_page,
-                    inputs=[current_page_state, total_pages_state],
-                    outputs=[page_input, demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn]
+                    workload_handler("db_read", go_previous_page),
+                    inputs=[current_page_state, total_pages_state] + filter_inputs,
+                    outputs=[page_input, demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn],
+                    **event_options("db_read")
                 )
                 
                 # Next page button
-                def go_next_page(current_page, total_pages, request: gr.Request):
+                def go_next_page(current_page, total_pages, status, confidentiality, product, owner, sort_column, sort_order, query, request: gr.Request):
                     new_page = get_next_page(current_page, total_pages)
-                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(new_page, "ja", request)
+                    filters = build_demo_filters(status, confidentiality, product, owner)
+                    df, page_info, current_page, total_pages, prev_enabled, next_enabled = load_demo_list(new_page, "ja", request, filters, sort_column, sort_order, query)
                     return new_page, df, page_info, current_page, total_pages, gr.update(interactive=prev_enabled), gr.update(interactive=next_enabled)
                 
                 next_btn.click(
-                    go_next_page,
-                    inputs=[current_page_state, total_pages_state],
-                    outputs=[page_input, demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn]
+                    workload_handler("db_read", go_next_page),
+                    inputs=[current_page_state, total_pages_state] + filter_inputs,
+                    outputs=[page_input, demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn],
+                    **event_options("db_read")
+                )
+                
+                export_btn.click(
+                    workload_handler("export", export_demo_catalog),
+                    inputs=[export_format_input],
+                    outputs=[export_status, export_file],
+                    **event_options("export")
                 )
                 
                 demo_table.select(
-                    show_demo_all_info_by_click,
-                    outputs=[demo_details]
+                    workload_handler("db_read", show_demo_all_info_by_click),
+                    outputs=[demo_details],
+                    **event_options("db_read")
                 )
                 
                 # Load initial data
                 demo.load(
-                    initial_load_demo_list,
+                    workload_handler("db_read", initial_load_demo_list),
                     inputs=None,
-                    outputs=[demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn]
+                    outputs=[demo_table, page_info, current_page_state, total_pages_state, prev_btn, next_btn] + facet_outputs,
+                    **event_options("db_read")
                 )
             
             # Tab 2: New Demo Registration
@@ -2281,35 +2546,78 @@ def create_interface():
                 reg_btn = gr.Button("登録", variant="primary")
                 reg_result = gr.Markdown("")
                 
+                # Near-duplicate confirmation area
+                with gr.Column(visible=False) as reg_duplicate_area:
+                    reg_duplicate_msg = gr.Markdown("")
+                    with gr.Row():
+                        reg_duplicate_cancel_btn = gr.Button("キャンセル", variant="secondary")
+                        reg_duplicate_confirm_btn = gr.Button("別のデモとして登録", variant="primary")
+                
                 # AI Title Generation Event Handler
                 ai_title_btn.click(
-                    generate_title_from_description,
+                    workload_handler("llm", generate_title_from_description),
                     inputs=[reg_description],
                     outputs=[reg_title],
-                    show_progress=True
+                    show_progress=True,
+                    **event_options("llm")
                 )
                 
                 # AI Summary Generation Event Handler
                 ai_summary_btn.click(
-                    generate_summary_from_description,
+                    workload_handler("llm", generate_summary_from_description),
                     inputs=[reg_description],
                     outputs=[reg_summary],
-                    show_progress=True
+                    show_progress=True,
+                    **event_options("llm")
                 )
                 
                 # AI Description Polishing Event Handler
                 ai_polish_btn.click(
-                    polish_description_text,
+                    workload_handler("llm", polish_description_text),
                     inputs=[reg_description],
                     outputs=[reg_description],
-                    show_progress=True
+                    show_progress=True,
+                    **event_options("llm")
                 )
                 
                 reg_btn.click(
-                    register_demo,
+                    workload_handler("db_write", check_duplicates_or_register),
+                    inputs=[reg_title, reg_summary, reg_description, reg_owner, reg_creator, reg_status, reg_demo_url, reg_repo_url, reg_products, reg_confidentiality, reg_remarks],
+                    outputs=[reg_result, reg_title, reg_summary, reg_description, reg_owner, reg_creator, reg_status, reg_demo_url, reg_repo_url, reg_products, reg_confidentiality, reg_remarks, reg_duplicate_area, reg_duplicate_msg],
+                    show_progress=True,
+                    **event_options("db_write")
+                )
+                
+                reg_duplicate_cancel_btn.click(
+                    lambda: [gr.update(visible=False), ""],
+                    outputs=[reg_duplicate_area, reg_duplicate_msg]
+                )
+                
+                # Confirmed: register without the check
+                reg_duplicate_confirm_btn.click(
+                    workload_handler("db_write", register_demo),
                     inputs=[reg_title, reg_summary, reg_description, reg_owner, reg_creator, reg_status, reg_demo_url, reg_repo_url, reg_products, reg_confidentiality, reg_remarks],
                     outputs=[reg_result, reg_title, reg_summary, reg_description, reg_owner, reg_creator, reg_status, reg_demo_url, reg_repo_url, reg_products, reg_confidentiality, reg_remarks],
-                    show_progress=True
+                    show_progress=True,
+                    **event_options("db_write")
+                ).then(
+                    lambda: [gr.update(visible=False), ""],
+                    outputs=[reg_duplicate_area, reg_duplicate_msg]
+                )
+                
+                # Bulk import (all rows are validated before anything is written)
+                with gr.Accordion("📤 CSV / JSONLから一括登録", open=False):
+                    gr.Markdown("列名はフォームと同じ（title, summary, description_md, owner_emp_id, creator_emp_id, status, demo_url, repo_url, products, confidentiality, remarks）です。productsはカンマ区切りで指定します。")
+                    import_file = gr.File(label="インポートファイル", file_types=[".csv", ".jsonl"], type="filepath")
+                    import_btn = gr.Button("一括登録", variant="secondary")
+                    import_result = gr.Markdown("")
+                
+                import_btn.click(
+                    workload_handler("db_write", import_demo_catalog),
+                    inputs=[import_file],
+                    outputs=[import_result],
+                    show_progress=True,
+                    **event_options("db_write")
                 )
             
             # Tab 3: Demo Update
@@ -2357,24 +2665,30 @@ def create_interface():
                         permission_confirm_btn = gr.Button("", variant="primary", visible=False)
                         permission_delete_btn = gr.Button("", variant="stop", visible=False)
                 
+                # {demo_id, created_at, updated_at} of the searched demo; updates apply only against it
+                upd_version_state = gr.State(value=None)
+                
                 search_btn.click(
-                    search_demo_for_update,
+                    workload_handler("db_read", search_demo_for_update),
                     inputs=[upd_demo_id],
-                    outputs=[upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result]
+                    outputs=[upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result, upd_version_state],
+                    **event_options("db_read")
                 )
                 
                 # Update button - check permission first
                 upd_btn.click(
-                    check_update_permission_or_execute,
-                    inputs=[upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks],
-                    outputs=[upd_result, upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result, permission_area, permission_msg, permission_confirm_btn, permission_delete_btn]
+                    workload_handler("db_write", check_update_permission_or_execute),
+                    inputs=[upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, upd_version_state],
+                    outputs=[upd_result, upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result, permission_area, permission_msg, permission_confirm_btn, permission_delete_btn],
+                    **event_options("db_write")
                 )
                 
                 # Delete button - check permission first
                 del_btn.click(
-                    check_delete_permission_or_execute,
+                    workload_handler("db_write", check_delete_permission_or_execute),
                     inputs=[upd_demo_id],
-                    outputs=[upd_result, upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result, permission_area, permission_msg, permission_confirm_btn, permission_delete_btn]
+                    outputs=[upd_result, upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result, permission_area, permission_msg, permission_confirm_btn, permission_delete_btn],
+                    **event_options("db_write")
                 )
                 
                 # Permission cancel button - hide permission area
@@ -2385,10 +2699,11 @@ def create_interface():
                 
                 # Permission confirm button - execute update
                 permission_confirm_btn.click(
-                    update_demo,
-                    inputs=[upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks],
+                    workload_handler("db_write", update_demo),
+                    inputs=[upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, upd_version_state],
                     outputs=[upd_result, upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result],
-                    show_progress=True
+                    show_progress=True,
+                    **event_options("db_write")
                 ).then(
                     lambda: [gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False)],
                     outputs=[permission_area, permission_msg, permission_confirm_btn, permission_delete_btn]
@@ -2396,10 +2711,11 @@ def create_interface():
                 
                 # Permission delete button - execute delete
                 permission_delete_btn.click(
-                    delete_demo,
+                    workload_handler("db_write", delete_demo),
                     inputs=[upd_demo_id],
                     outputs=[upd_result, upd_demo_id, upd_title, upd_summary, upd_description, upd_owner, upd_creator, upd_status, upd_demo_url, upd_repo_url, upd_products, upd_confidentiality, upd_remarks, search_result],
-                    show_progress=True
+                    show_progress=True,
+                    **event_options("db_write")
                 ).then(
                     lambda: [gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False)],
                     outputs=[permission_area, permission_msg, permission_confirm_btn, permission_delete_btn]
@@ -2417,6 +2733,9 @@ def create_interface():
                     avatar_images=("https://cdn-icons-png.flaticon.com/512/1053/1053244.png", "https://cdn-icons-png.flaticon.com/512/4712/4712109.png")
                 )
                 
+                # Candidate demos from the in-process search index
+                chat_candidates = gr.Markdown("")
+                
                 with gr.Row():
                     msg = gr.Textbox(
                         label="メッセージ（入力後にShift+Enterで送信）",
@@ -2428,21 +2747,31 @@ def create_interface():
                 
                 clear_btn = gr.Button("チャット履歴をクリア", variant="secondary")
                 
+                # Vector Search index freshness (only shown when VECTOR_SEARCH_SYNC_ENABLED)
+                vector_search_sync_info = gr.Markdown("", visible=bool(vector_search_sync))
+                if vector_search_sync:
+                    gr.Timer(5).tick(get_vector_search_sync_status, outputs=[vector_search_sync_info], queue=False)
+                
+                # Raw Markdown conversation memory sent to the RAG endpoint (per session)
+                chat_memory = gr.State(value=None)
+                
                 send_btn.click(
-                    chat_with_rag,
-                    inputs=[msg, chatbot],
-                    outputs=[msg, chatbot]
+                    workload_handler("chat", chat_with_rag),
+                    inputs=[msg, chatbot, chat_memory],
+                    outputs=[msg, chatbot, chat_memory, chat_candidates],
+                    **event_options("chat")
                 )
                 
                 msg.submit(
-                    chat_with_rag,
-                    inputs=[msg, chatbot],
-                    outputs=[msg, chatbot]
+                    workload_handler("chat", chat_with_rag),
+                    inputs=[msg, chatbot, chat_memory],
+                    outputs=[msg, chatbot, chat_memory, chat_candidates],
+                    **event_options("chat")
                 )
                 
                 clear_btn.click(
-                    lambda: ([], ""),
-                    outputs=[chatbot, msg]
+                    lambda: ([], "", None, ""),
+                    outputs=[chatbot, msg, chat_memory, chat_candidates]
                 )
     
         # Auto-set user email and greeting on demo load
@@ -2491,7 +2820,10 @@ def create_interface():
                 # New UI elements
                 title_display, msg,
                 # Tab elements
-                demo_list_tab, new_reg_tab, update_tab, chat_tab
+                demo_list_tab, new_reg_tab, update_tab, chat_tab,
+                # Filter and sort controls
+                status_filter, confidentiality_filter, product_filter, owner_filter,
+                sort_column_input, sort_order_input, keyword_search_input, keyword_search_btn
             ]
         ).then(
             # Update table column names only (lightweight operation)
@@ -2505,8 +2837,38 @@ def create_interface():
             outputs=[greeting_display]
         )
     
+    # Each workload class has its own Gradio queue (concurrency_id); this bounds the total.
+    # max_threads is set before queue() so that it also applies when mounted on FastAPI
+    demo.max_threads = required_threads()
+    demo.queue(max_size=sum(workload.admitted_limit for workload in WORKLOAD_CLASSES.values()))
+    
     return demo
 
+def serve_with_metrics(interface: gr.Blocks):
+    """Serve the Gradio app with a Prometheus /metrics endpoint (and per-fingerprint /statements) on the same port"""
+    import uvicorn
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+    
+    server = FastAPI()
+    
+    @server.get("/metrics")
+    def metrics_endpoint():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+    
+    @server.get("/statements")
+    def statements_endpoint(limit: int = 50):
+        # Query shapes with the most total time first
+        return statement_stats(limit)
+    
+    # path="" serves the page at / directly (path="/" answers / with a redirect to //)
+    server = gr.mount_gradio_app(server, interface, path="")
+    # Databricks Apps assigns the port through DATABRICKS_APP_PORT
+    port = int(os.getenv("DATABRICKS_APP_PORT") or os.getenv("GRADIO_SERVER_PORT") or 7860)
+    uvicorn_server = uvicorn.Server(uvicorn.Config(server, host=os.getenv("GRADIO_SERVER_NAME", "0.0.0.0"), port=port))
+    report_when_ready(lambda: uvicorn_server.started, on_ready=warm_up_deferred)
+    uvicorn_server.run()
+
 if __name__ == "__main__":
     # Check required environment variables based on authentication method
     client_id = os.getenv('DATABRICKS_CLIENT_ID', '').strip()
@@ -2529,11 +2891,20 @@ if __name__ == "__main__":
             exit(1)
     
     # Create and launch the interface
-    interface = create_interface()
+    with phase("create_interface"):
+        interface = create_interface()
+    
+    if METRICS_ENABLED:
+        serve_with_metrics(interface)
+        exit(0)
+    
+    report_when_ready(lambda: interface.is_running, on_ready=warm_up_deferred)
     
     # Launch with error handling
     try:
         interface.launch(
+            # Enough threads for every admitted event to wait in the workload scheduler
+            max_threads=required_threads(),
             # server_name="127.0.0.1",
             # server_port=7860,
             # share=False,
@@ -2544,6 +2915,7 @@ if __name__ == "__main__":
         print(f"Launch error: {e}")
         print("Trying alternative launch configuration...")
         interface.launch(
+            max_threads=required_threads(),
             share=True,
             show_error=True,
             debug=False
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Load test that drives the running app through its Gradio queue API
+N simulated users follow a weighted mix of events (initial load, paging,
+row clicks, registrations, updates and chat turns); throughput and
+p50/p95/p99 latency per event are reported for each backend latency
+profile and written as JSON so that releases can be compared
+
+By default each profile starts dev_server.py with its latency settings and
+the app pointed at it; --url runs against an app that is already running.
+
+Usage:
+    python benchmarks/load_test.py --users 20 --duration 60 --profile local --profile warehouse
+    python benchmarks/load_test.py --url http://127.0.0.1:7860 --users 5 --output results.json
+    python benchmarks/load_test.py --compare baseline.json --output results.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from statement_log import percentile  # noqa: E402
+
+# dev_server.py settings per backend profile
+PROFILES = {
+    "local": {},
+    "warehouse": {
+        "DEV_SERVER_SQL_LATENCY_MS": "150",
+        "DEV_SERVER_LLM_LATENCY_MS": "1500",
+        "DEV_SERVER_JITTER_MS": "50",
+    },
+    "degraded": {
+        "DEV_SERVER_SQL_LATENCY_MS": "800",
+        "DEV_SERVER_LLM_LATENCY_MS": "5000",
+        "DEV_SERVER_JITTER_MS": "300",
+        "DEV_SERVER_FAILURE_RATE": "0.02",
+    },
+}
+
+# Relative weights of the actions a user takes after the initial load
+MIXES = {
+    "default": {"next_page": 25, "previous_page": 10, "row_click": 30, "register": 5, "update": 5, "chat": 25},
+    "browse": {"next_page": 40, "previous_page": 20, "row_click": 40},
+    "write": {"next_page": 10, "row_click": 10, "register": 40, "update": 40},
+    "chat": {"chat": 80, "row_click": 20},
+}
+
+CHAT_QUESTIONS = [
+    "需要予測のデモはありますか？",
+    "Vector Searchを使ったデモを教えてください",
+    "チャットボットの事例は？",
+    "Unity Catalogの機能を紹介できるデモはどれですか",
+]
+# The filter, sort and keyword inputs shared by the demo list events (no filter, newest first)
+LIST_INPUTS = ["", "", "", "", "created_at", "DESC", ""]
+SUCCESS_ID_PATTERN = re.compile(r'ID (\d+)')
+
+
+class GradioError(Exception):
+    """An event finished with an error (or the queue rejected it)"""
+
+
+class GradioSession:
+    """One browser session: calls events by api_name through the queue, state kept server-side per session_hash
+
+    gradio_client cannot send event data (gr.SelectData), which the row click needs,
+    so the queue protocol is spoken directly.
+    """
+
+    def __init__(self, url: str, config: Dict, email: str, timeout: float = 300):
+        self.url = url.rstrip("/")
+        self.api_prefix = config.get("api_prefix", "/gradio_api")
+        self.session_hash = uuid.uuid4().hex[:11]
+        component_types = {component["id"]: component.get("type") for component in config["components"]}
+        self.dependencies = {}
+        for fn_index, dependency in enumerate(config["dependencies"]):
+            if dependency.get("api_name") and dependency["api_name"] not in self.dependencies:
+                self.dependencies[dependency["api_name"]] = (
+                    dependency.get("id", fn_index),
+                    [component_types.get(input_id) for input_id in dependency["inputs"]],
+                    (dependency.get("targets") or [[None]])[0][0],
+                )
+        self.client = httpx.Client(headers={"x-forwarded-email": email}, timeout=timeout)
+
+    def call(self, api_name: str, *data, event_data: Optional[Dict] = None) -> List:
+        """Run an event and return its output values (State inputs are filled in by the server)"""
+        fn_index, input_types, trigger_id = self.dependencies[api_name]
+        values = iter(data)
+        payload = {
+            "data": [None if input_type == "state" else next(values, None) for input_type in input_types],
+            "event_data": event_data,
+            "fn_index": fn_index,
+            "trigger_id": trigger_id,
+            "session_hash": self.session_hash,
+        }
+        response = self.client.post(f"{self.url}{self.api_prefix}/queue/join", json=payload)
+        if response.status_code != 200:
+            raise GradioError(f"join {response.status_code}: {response.text[:200]}")
+        event_id = response.json()["event_id"]
+
+        with self.client.stream("GET", f"{self.url}{self.api_prefix}/queue/data", params={"session_hash": self.session_hash}) as stream:
+            for line in stream.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                message = json.loads(line[5:])
+                if message.get("event_id") != event_id or message.get("msg") != "process_completed":
+                    continue
+                if not message.get("success"):
+                    raise GradioError(str(message.get("output", {}).get("error") or message.get("title") or "failed"))
+                return message["output"]["data"]
+        raise GradioError("stream closed before the event completed")
+
+    def close(self):
+        self.client.close()
+
+
+class SimulatedUser:
+    """Follows the weighted mix until the deadline, recording (event, seconds, ok) samples"""
+
+    def __init__(self, number: int, url: str, config: Dict, mix: Dict[str, int], think_seconds: float, samples: List):
+        # Seeded demos are owned by user01..user20@example.com, so users own some rows
+        self.email = f"user{number % 20 + 1:02d}@example.com"
+        self.session = GradioSession(url, config, self.email)
+        self.mix = mix
+        self.think_seconds = think_seconds
+        self.samples = samples
+        self.random = random.Random(number)
+        self.rows = 0
+        self.history: List = []
+        self.own_demo_ids: List[int] = []
+
+    def timed(self, event: str, api_name: str, *data, event_data: Optional[Dict] = None) -> Optional[List]:
+        started = time.perf_counter()
+        try:
+            output = self.session.call(api_name, *data, event_data=event_data)
+            ok = True
+        except Exception as e:
+            output, ok = None, False
+            print(f"  {event} failed: {str(e)[:160]}", file=sys.stderr)
+        self.samples.append((event, time.perf_counter() - started, ok))
+        return output
+
+    def initial_load(self):
+        output = self.timed("initial_load", "initial_load_demo_list")
+        if output:
+            self.rows = len((output[0] or {}).get("data") or [])
+
+    def next_page(self):
+        self.timed("next_page", "go_next_page", *LIST_INPUTS)
+
+    def previous_page(self):
+        self.timed("previous_page", "go_previous_page", *LIST_INPUTS)
+
+    def row_click(self):
+        row = self.random.randrange(max(self.rows, 1))
+        self.timed("row_click", "show_demo_all_info_by_click", event_data={"index": [row, 0], "value": None, "selected": True})
+
+    def register(self):
+        tag = uuid.uuid4().hex[:8]
+        output = self.timed(
+            "register", "register_demo",
+            f"負荷試験デモ {tag}", "負荷試験で登録した要約", f"## 概要\n負荷試験 {tag} の説明", self.email, "",
+            "draft", f"https://example.com/load/{tag}", "", "Genie, Vector Search", "internal", ""
+        )
+        match = SUCCESS_ID_PATTERN.search(str(output[0])) if output else None
+        if match:
+            self.own_demo_ids.append(int(match.group(1)))
+
+    def update(self):
+        if not self.own_demo_ids:
+            self.register()
+            return
+        demo_id = self.random.choice(self.own_demo_ids)
+        fields = self.timed("update_search", "search_demo_for_update", demo_id)
+        if not fields:
+            return
+        title, summary, description, owner, creator, status, demo_url, repo_url, products, confidentiality, remarks = fields[:11]
+        self.timed(
+            "update", "check_update_permission_or_execute",
+            demo_id, f"{title} (更新)", summary, description, owner, creator, status,
+            demo_url, repo_url, products, confidentiality, remarks
+        )
+
+    def chat(self):
+        output = self.timed("chat", "chat_with_rag", self.random.choice(CHAT_QUESTIONS), self.history)
+        if output:
+            # Keep the conversation short like a real session
+            self.history = (output[1] or [])[-6:]
+
+    def run(self, deadline: float):
+        try:
+            self.initial_load()
+            actions = list(self.mix)
+            weights = [self.mix[action] for action in actions]
+            while time.monotonic() < deadline:
+                getattr(self, self.random.choices(actions, weights)[0])()
+                time.sleep(self.random.uniform(0, self.think_seconds))
+        finally:
+            self.session.close()
+
+
+def summarize(samples: List, elapsed: float) -> Dict:
+    """Per-event and total count, errors, throughput and latency percentiles (ms)"""
+    by_event: Dict[str, List] = {}
+    for event, seconds, ok in samples:
+        by_event.setdefault(event, []).append((seconds, ok))
+    by_event["total"] = [(seconds, ok) for _, seconds, ok in samples]
+
+    summary = {}
+    for event, values in by_event.items():
+        latencies = sorted(seconds * 1000 for seconds, ok in values if ok)
+        summary[event] = {
+            "count": len(values),
+            "errors": sum(1 for _, ok in values if not ok),
+            "throughput_per_s": round(len(values) / elapsed, 3) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+            "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        }
+    return summary
+
+
+def wait_until_ready(url: str, timeout: float = 180):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=5).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+def start_backend(profile: str, args, workdir: str) -> List[subprocess.Popen]:
+    """Start dev_server.py with the profile's latency settings and the app pointed at it"""
+    dev_url = f"http://127.0.0.1:{args.dev_port}"
+    dev_env = dict(os.environ, **PROFILES[profile])
+    dev_server = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "dev_server.py"), "--port", str(args.dev_port),
+         "--db", os.path.join(workdir, f"{profile}.db"), "--seed", str(args.seed)],
+        env=dev_env, cwd=workdir
+    )
+    wait_until_ready(f"{dev_url}/docs")
+
+    app_env = {key: value for key, value in os.environ.items() if not key.startswith(("DATABRICKS_", "RAG_"))}
+    app_env.update({
+        "DATABRICKS_SERVER_HOSTNAME": dev_url,
+        "DATABRICKS_HOST": dev_url,
+        "DATABRICKS_TOKEN": "dev",
+        "DATABRICKS_WAREHOUSE_ID": "dev",
+        "RAG_ENDPOINT": f"{dev_url}/serving-endpoints/rag/invocations",
+        "GRADIO_SERVER_NAME": "127.0.0.1",
+        "GRADIO_SERVER_PORT": str(args.app_port),
+    })
+    app = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "app.py")], env=app_env, cwd=workdir,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_until_ready(f"http://127.0.0.1:{args.app_port}/config")
+    return [app, dev_server]
+
+
+def run_profile(url: str, args) -> Dict:
+    config = httpx.get(f"{url.rstrip('/')}/config", timeout=30).json()
+    samples: List = []
+    users = [SimulatedUser(number, url, config, MIXES[args.mix], args.think_seconds, samples) for number in range(args.users)]
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = []
+    for user in users:
+        thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        # Ramp up instead of every user loading the page in the same instant
+        time.sleep(args.ramp_up / max(args.users, 1))
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.monotonic() - started)
+
+
+def print_summary(profile: str, summary: Dict, baseline: Optional[Dict] = None):
+    print(f"\n=== {profile} ===")
+    print(f"{'event':<16}{'count':>7}{'errors':>8}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  vs baseline p95")
+    for event, stats in sorted(summary.items(), key=lambda item: (item[0] == "total", item[0])):
+        delta = ""
+        if baseline and event in baseline and baseline[event]["p95_ms"]:
+            delta = f"{(stats['p95_ms'] / baseline[event]['p95_ms'] - 1) * 100:+.0f}%"
+        print(f"{event:<16}{stats['count']:>7}{stats['errors']:>8}{stats['throughput_per_s']:>8.2f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}  {delta}")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive AI Demo Hub with simulated users and report latency per event")
+    parser.add_argument("--url", help="app that is already running (its backend is not managed; reported as profile 'external')")
+    parser.add_argument("--profile", action="append", choices=list(PROFILES), help="backend latency profile (repeatable, default: local)")
+    parser.add_argument("--mix", choices=list(MIXES), default="default", help="event mix of the simulated users")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load per profile")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds over which users start")
+    parser.add_argument("--think-seconds", type=float, default=1.0, help="maximum random pause between a user's events")
+    parser.add_argument("--seed", type=int, default=500, help="synthetic demos in the dev server database")
+    parser.add_argument("--dev-port", type=int, default=8765)
+    parser.add_argument("--app-port", type=int, default=7870)
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare p95 latencies against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("profiles", {})
+
+    results = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "users": args.users,
+        "duration_seconds": args.duration,
+        "mix": {"name": args.mix, "weights": MIXES[args.mix]},
+        "profiles": {},
+    }
+
+    if args.url:
+        print(f"Running {args.users} users for {args.duration:.0f}s against {args.url}")
+        summary = run_profile(args.url, args)
+        results["profiles"]["external"] = {"backend": None, "events": summary}
+        print_summary("external", summary, baseline.get("external", {}).get("events"))
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            for profile in args.profile or ["local"]:
+                print(f"Starting backend for profile '{profile}'...")
+                processes = start_backend(profile, args, workdir)
+                try:
+                    print(f"Running {args.users} users for {args.duration:.0f}s")
+                    summary = run_profile(f"http://127.0.0.1:{args.app_port}", args)
+                finally:
+                    for process in processes:
+                        process.terminate()
+                        process.wait(timeout=30)
+                results["profiles"][profile] = {"backend": PROFILES[profile], "events": summary}
+                print_summary(profile, summary, baseline.get(profile, {}).get("events"))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the rendering and formatting functions run on every request
+each case is calibrated to a minimum round time and repeated for several rounds
+(pytest-benchmark style: min / median / mean / stddev / ops); results are written
+as JSON and can be compared against a stored baseline, failing on regressions
+
+Inputs are realistic (a page of demos, a typical description) and adversarial
+(long Japanese descriptions, hundreds of URLs, many footnotes, large pages).
+Not collected by pytest; run it directly.
+
+Usage:
+    python benchmarks/micro_bench.py --output micro_baseline.json
+    python benchmarks/micro_bench.py --compare micro_baseline.json --max-regression 0.2
+    python benchmarks/micro_bench.py -k footnotes -k links
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd  # noqa: E402
+
+import app  # noqa: E402
+from api_database_manager import APIBasedDatabaseManager  # noqa: E402
+from demo_utils import parse_products  # noqa: E402
+
+JST = timezone(timedelta(hours=9))
+PRODUCTS = ["Apps", "Genie", "Mosaic AI", "Unity Catalog", "Delta Live Tables", "Vector Search", "Model Serving", "Lakeview"]
+SENTENCES = [
+    "このデモではDatabricks上でエンドツーエンドのRAGアプリケーションを構築します。",
+    "ドキュメントをチャンクに分割し、埋め込みを作成してVector Searchのインデックスに格納します。",
+    "Unity Catalogで権限を管理し、利用者ごとに参照できるテーブルを制御します。",
+    "Model Servingのエンドポイントに対して、評価用の質問セットを流して回答品質を確認します。",
+    "お客様のユースケースに合わせて、プロンプトと検索パラメータを調整してください。",
+    "注意：本番環境のデータは使用せず、サンプルデータのみで動作を確認しています。",
+]
+
+
+# ---- inputs -------------------------------------------------------------
+
+def japanese_description(rng: random.Random, paragraphs: int) -> str:
+    """Markdown description with headings, lists, a table and a code block"""
+    parts = []
+    for number in range(paragraphs):
+        parts.append(f"## セクション{number + 1}")
+        parts.append("".join(rng.choice(SENTENCES) for _ in range(6)))
+        parts.append("\n".join(f"- 手順{step + 1}: {rng.choice(SENTENCES)}" for step in range(4)))
+        if number % 5 == 0:
+            parts.append("| 項目 | 内容 |\n|------|------|\n" + "\n".join(f"| 項目{i} | {rng.choice(SENTENCES)} |" for i in range(5)))
+            parts.append("```python\nspark.table('catalog.schema.demos').limit(10).display()\n```")
+    return "\n\n".join(parts)
+
+
+def text_with_urls(rng: random.Random, count: int) -> str:
+    """Text with many URLs, wrapped in Japanese and ASCII punctuation the link regex has to trim"""
+    wrappers = ["{url} ", "（{url}）。", "「{url}」、", "({url})%E3%80%82", "{url}。", "[link]({url})", "{url}!"]
+    parts = []
+    for number in range(count):
+        url = f"https://example.com/docs/{number}/ページ?id={number}&lang=ja#section-{number % 7}"
+        parts.append(rng.choice(SENTENCES) + rng.choice(wrappers).format(url=url))
+    return "\n".join(parts)
+
+
+def text_with_footnotes(rng: random.Random, count: int) -> str:
+    """Text referring to many distinct footnotes, each referenced several times, with definitions"""
+    body = " ".join(f"{rng.choice(SENTENCES)}[^{rng.randrange(count) + 1}]" for _ in range(count * 3))
+    definitions = "\n".join(f"[^{number + 1}]: https://example.com/ref/{number + 1}" for number in range(count))
+    return body + "\n\n" + definitions
+
+
+def demo_record(rng: random.Random, demo_id: int, description_paragraphs: int = 3) -> Dict:
+    """One demo row as returned by the Statement API (strings), with products in the formats seen in the table"""
+    products = rng.sample(PRODUCTS, rng.randint(0, 4))
+    products_value = rng.choice([json.dumps(products), ", ".join(products), products])
+    updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(500000))
+    return {
+        "demo_id": str(demo_id),
+        "title": f"デモ{demo_id}: " + rng.choice(SENTENCES)[:30],
+        "summary": rng.choice(SENTENCES),
+        "description_md": japanese_description(rng, description_paragraphs),
+        "owner_emp_id": f"user{demo_id % 20 + 1:02d}@example.com",
+        "creator_emp_id": f"user{demo_id % 7 + 1:02d}@example.com",
+        "status": rng.choice(["draft", "published", "archived"]),
+        "demo_url": f"https://example.com/demos/{demo_id}",
+        "repo_url": f"https://github.com/example/demo-{demo_id}",
+        "products": products_value,
+        "confidentiality": rng.choice(["public", "internal", "confidential"]),
+        "remarks": rng.choice(["", "社内限定", "顧客向けに調整済み"]),
+        "created_at": updated_at - timedelta(days=30),
+        "updated_at": rng.choice([updated_at, updated_at.isoformat(), None]),
+    }
+
+
+def build_cases(seed: int) -> List[Dict]:
+    """Benchmark cases as {"name", "func", "args"}; inputs are generated once, outside the timed loop"""
+    rng = random.Random(seed)
+    manager = APIBasedDatabaseManager("benchmark")
+
+    typical_demo = demo_record(rng, 1)
+    long_demo = demo_record(rng, 2, description_paragraphs=200)
+    long_demo["products"] = PRODUCTS
+    long_description = long_demo["description_md"]
+    urls_300 = text_with_urls(rng, 300)
+    footnotes_9 = text_with_footnotes(rng, 9)
+    footnotes_200 = text_with_footnotes(rng, 200)
+    page = [demo_record(rng, number) for number in range(app.ITEMS_PER_PAGE)]
+    large_page = [demo_record(rng, number) for number in range(2000)]
+    formatted_page = pd.DataFrame(app.format_demo_rows(page, "ja"))
+    formatted_large_page = pd.DataFrame(app.format_demo_rows(large_page, "ja"))
+    aware = datetime(2024, 7, 15, 3, 4, 5, tzinfo=timezone.utc)
+    products_csv = ", ".join(PRODUCTS)
+    products_many = ", ".join(f" 製品{number} " for number in range(1000)) + ",,,"
+
+    return [
+        {"name": "generate_all_info_md[typical]", "func": app.generate_all_info_md, "args": (typical_demo,)},
+        {"name": "generate_all_info_md[long_ja]", "func": app.generate_all_info_md, "args": (long_demo,)},
+        {"name": "manager.generate_all_info_md[long_ja]", "func": manager.generate_all_info_md, "args": (long_demo,)},
+        {"name": "format_datetime[aware]", "func": app.format_datetime, "args": (aware,)},
+        {"name": "format_datetime[str]", "func": app.format_datetime, "args": ("2024-07-15T12:04:05",)},
+        {"name": "parse_products[typical]", "func": parse_products, "args": (products_csv,)},
+        {"name": "parse_products[1000]", "func": parse_products, "args": (products_many,)},
+        {"name": "render_markdown[typical]", "func": app.render_markdown, "args": (typical_demo["description_md"],)},
+        {"name": "render_markdown[long_ja]", "func": app.render_markdown, "args": (long_description,)},
+        {"name": "make_clickable_links[long_ja]", "func": app.make_clickable_links, "args": (long_description,)},
+        {"name": "make_clickable_links[300_urls]", "func": app.make_clickable_links, "args": (urls_300,)},
+        {"name": "make_clickable_links[trailing_punct]", "func": app.make_clickable_links,
+         "args": ("https://example.com/a" + "）" * 2000 + "。",)},
+        {"name": "convert_markdown_footnotes[none]", "func": app.convert_markdown_footnotes, "args": (long_description,)},
+        {"name": "convert_markdown_footnotes[9]", "func": app.convert_markdown_footnotes, "args": (footnotes_9,)},
+        {"name": "convert_markdown_footnotes[200]", "func": app.convert_markdown_footnotes, "args": (footnotes_200,)},
+        {"name": "rename_table_columns[page]", "func": app.rename_table_columns, "args": (formatted_page, "en")},
+        {"name": "rename_table_columns[2000]", "func": app.rename_table_columns, "args": (formatted_large_page, "en")},
+        {"name": "format_demo_rows[page]", "func": app.format_demo_rows, "args": (page, "ja")},
+        {"name": "format_demo_rows[2000]", "func": app.format_demo_rows, "args": (large_page, "ja")},
+    ]
+
+
+# ---- runner -------------------------------------------------------------
+
+def calibrate(func: Callable, args: tuple, min_round_seconds: float) -> int:
+    """Iterations per round so that one round takes at least min_round_seconds"""
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func(*args)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds:
+            return iterations
+        iterations = max(iterations * 2, int(iterations * min_round_seconds / max(elapsed, 1e-9) * 1.2))
+
+
+def run_case(case: Dict, rounds: int, min_round_seconds: float, max_seconds: float) -> Dict:
+    func, args = case["func"], case["args"]
+    func(*args)  # warm-up (lazy imports, regex compilation)
+    iterations = calibrate(func, args, min_round_seconds)
+
+    timings = []
+    deadline = time.perf_counter() + max_seconds
+    while len(timings) < rounds:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func(*args)
+        timings.append((time.perf_counter() - started) / iterations)
+        if len(timings) >= 3 and time.perf_counter() > deadline:
+            break
+
+    median = statistics.median(timings)
+    return {
+        "name": case["name"],
+        "rounds": len(timings),
+        "iterations": iterations,
+        "min_us": round(min(timings) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.mean(timings) * 1e6, 3),
+        "stddev_us": round(statistics.stdev(timings) * 1e6, 3) if len(timings) > 1 else 0.0,
+        "ops": round(1 / median, 1) if median else None,
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, max_regression: Optional[float]) -> List[str]:
+    """Print the median change per case; returns the names of cases that regressed beyond max_regression"""
+    previous = {item["name"]: item for item in baseline["benchmarks"]}
+    regressed = []
+    print(f"\n{'case':<44}{'baseline us':>14}{'now us':>14}{'change':>10}")
+    for result in results:
+        before = previous.get(result["name"])
+        if not before:
+            print(f"{result['name']:<44}{'-':>14}{result['median_us']:>14.1f}{'new':>10}")
+            continue
+        change = result["median_us"] / before["median_us"] - 1 if before["median_us"] else 0.0
+        flag = ""
+        if max_regression is not None and change > max_regression:
+            regressed.append(result["name"])
+            flag = "  ❌"
+        print(f"{result['name']:<44}{before['median_us']:>14.1f}{result['median_us']:>14.1f}{change * 100:>+9.1f}%{flag}")
+    return regressed
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the rendering and formatting functions")
+    parser.add_argument("-k", dest="keywords", action="append", default=[], help="only run cases whose name contains this (repeatable)")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-round-ms", type=float, default=20, help="calibrate iterations so that one round takes at least this long")
+    parser.add_argument("--max-seconds", type=float, default=3, help="stop a case after this long once it has 3 rounds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="micro_bench.json")
+    parser.add_argument("--compare", help="baseline results JSON (an earlier --output) to compare the medians against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit with status 1 if any case's median is slower than the baseline by more than this fraction")
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases(args.seed) if not args.keywords or any(k in case["name"] for k in args.keywords)]
+    results = []
+    print(f"{'case':<44}{'median us':>14}{'min us':>14}{'stddev us':>12}{'ops':>12}")
+    for case in cases:
+        result = run_case(case, args.rounds, args.min_round_ms / 1000, args.max_seconds)
+        results.append(result)
+        print(f"{result['name']:<44}{result['median_us']:>14.1f}{result['min_us']:>14.1f}{result['stddev_us']:>12.1f}{result['ops'] or 0:>12.0f}")
+
+    output = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+        "seed": args.seed,
+        "benchmarks": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressed = compare(results, baseline, args.max_regression)
+        if regressed:
+            print(f"\n❌ {len(regressed)} case(s) regressed by more than {args.max_regression * 100:.0f}%: {', '.join(regressed)}")
+            sys.exit(1)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
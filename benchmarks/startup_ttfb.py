@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: time from process start to the first byte of the page
+the app is started several times (fresh processes, no backend needed) with
+STARTUP_PROFILE enabled; the time-to-first-byte of GET / and the per-phase
+startup breakdown are reported and written as JSON, optionally failing when
+the median regresses against a baseline
+
+Usage:
+    python benchmarks/startup_ttfb.py --runs 5 --output startup.json
+    python benchmarks/startup_ttfb.py --compare startup_baseline.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once(port: int, workdir: str, timeout: float = 120) -> Dict:
+    """Start the app, wait for the first successful GET / and return the TTFB and the startup profile"""
+    profile_path = os.path.join(workdir, f"profile-{port}.json")
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("DATABRICKS_", "RAG_"))}
+    env.update({
+        # Startup must not depend on the backend; these only satisfy the checks in __main__
+        "DATABRICKS_TOKEN": "dev",
+        "DATABRICKS_HOST": "http://127.0.0.1:9",
+        "RAG_ENDPOINT": "http://127.0.0.1:9/serving-endpoints/rag/invocations",
+        "GRADIO_SERVER_NAME": "127.0.0.1",
+        "GRADIO_SERVER_PORT": str(port),
+        "STARTUP_PROFILE": "true",
+        "STARTUP_PROFILE_PATH": profile_path,
+    })
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "app.py")], env=env, cwd=workdir,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        with httpx.Client(timeout=5, follow_redirects=True) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"app exited with code {process.returncode}")
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"no response within {timeout:.0f}s")
+                try:
+                    response = client.get(f"http://127.0.0.1:{port}/")
+                    if response.status_code == 200:
+                        ttfb_ms = (time.perf_counter() - started) * 1000
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.02)
+
+        # The profile is written right after the server reports that it started
+        profile = None
+        for _ in range(100):
+            if os.path.exists(profile_path):
+                with open(profile_path, encoding="utf-8") as f:
+                    profile = json.load(f)
+                break
+            time.sleep(0.05)
+        return {"ttfb_ms": round(ttfb_ms, 1), "profile": profile}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def summarize(runs) -> Dict:
+    ttfbs = sorted(run["ttfb_ms"] for run in runs)
+    phases: Dict[str, list] = {}
+    for run in runs:
+        for item in (run["profile"] or {}).get("phases", []):
+            phases.setdefault(item["phase"], []).append(item["ms"])
+    return {
+        "ttfb_ms": {
+            "median": round(statistics.median(ttfbs), 1),
+            "min": ttfbs[0],
+            "max": ttfbs[-1],
+        },
+        "phases_median_ms": {name: round(statistics.median(values), 1) for name, values in phases.items()},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the app's time to first byte after a cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=7880)
+    parser.add_argument("--output", default="startup_ttfb.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare the median TTFB against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit with status 1 if the median TTFB is slower than the baseline by more than this fraction")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for number in range(args.runs):
+            run = measure_once(args.port, workdir)
+            runs.append(run)
+            print(f"  run {number + 1}: {run['ttfb_ms']:.0f}ms")
+
+    summary = summarize(runs)
+    results = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "runs": runs,
+        **summary,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f"\nTTFB median {summary['ttfb_ms']['median']:.0f}ms (min {summary['ttfb_ms']['min']:.0f}ms, max {summary['ttfb_ms']['max']:.0f}ms)")
+    for name, ms in summary["phases_median_ms"].items():
+        print(f"  {ms:9.1f}ms  {name}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["ttfb_ms"]["median"]
+        change = summary["ttfb_ms"]["median"] / baseline - 1
+        print(f"\nvs baseline {baseline:.0f}ms: {change * 100:+.1f}%")
+        if args.max_regression is not None and change > args.max_regression:
+            print(f"❌ Startup regressed by more than {args.max_regression * 100:.0f}%")
+            sys.exit(1)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
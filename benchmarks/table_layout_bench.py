@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Table layout benchmark: latency of the demo list's hot queries before and after a schema migration
+the newest page (ORDER BY created_at DESC LIMIT 10, with and without a status
+filter), the total count and point lookups by demo_id are run against the
+configured repository backend; with --migrate-to the pending migrations up to
+that version are applied between a "before" and an "after" run and the change
+per query is reported. Results are written as JSON.
+
+Each round changes the statement text (a no-op predicate) so that the
+warehouse's result cache cannot answer it.
+
+Usage:
+    # Local stand-in: a temporary SQLite database with synthetic demos
+    python benchmarks/table_layout_bench.py --backend sqlite --demos 20000 --migrate-to 2
+    # A real warehouse (DATABRICKS_HOST / DATABRICKS_TOKEN / DATABRICKS_WAREHOUSE_ID), run with the app stopped
+    python benchmarks/table_layout_bench.py --backend rest --rounds 20 --migrate-to 2
+    python benchmarks/table_layout_bench.py --backend rest --compare before.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from api_database_manager import DETAIL_COLUMNS  # noqa: E402
+from schema_migrations import default_dialect, migrate, migration_status, repository_executor  # noqa: E402
+
+TABLE = "hiroshi.ai_demo_hub.demos"
+# Same projection and order as APIBasedDatabaseManager.get_demos
+LIST_COLUMNS = ("demo_id, title, summary, owner_emp_id, creator_emp_id, created_at, updated_at, status, "
+                "demo_url, repo_url, products, confidentiality, remarks")
+
+
+def hot_queries(nonce: int, demo_id: int) -> Dict[str, str]:
+    """The statements behind the first list page and a row click (nonce only varies the text)"""
+    return {
+        "first_page": f"SELECT {LIST_COLUMNS} FROM {TABLE} WHERE {nonce} = {nonce} "
+                      f"ORDER BY created_at DESC, demo_id DESC LIMIT 10",
+        "filtered_page": f"SELECT {LIST_COLUMNS} FROM {TABLE} WHERE status = 'published' AND {nonce} = {nonce} "
+                         f"ORDER BY created_at DESC, demo_id DESC LIMIT 10",
+        "count": f"SELECT COUNT(*) AS total FROM {TABLE} WHERE {nonce} = {nonce}",
+        "point_lookup": f"SELECT {', '.join(DETAIL_COLUMNS)} FROM {TABLE} WHERE demo_id = {demo_id} AND {nonce} = {nonce}",
+    }
+
+
+def table_layout(execute: Callable[[str], List[Dict]], dialect: str) -> Dict:
+    """Files/size/partitioning/clustering (Delta) or the indexes (SQLite) of the demos table"""
+    if dialect == "sqlite":
+        rows = execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'demos'")
+        return {"indexes": [row["name"] for row in rows]}
+    detail = execute(f"DESCRIBE DETAIL {TABLE}")[0]
+    return {key: detail.get(key) for key in ("numFiles", "sizeInBytes", "partitionColumns", "clusteringColumns")}
+
+
+def measure(execute: Callable[[str], List[Dict]], rounds: int, seed: int = 42) -> Dict[str, Dict]:
+    """Run every hot query rounds times (after one warm-up round); latency summary per query"""
+    ids = [int(row["demo_id"]) for row in execute(f"SELECT demo_id FROM {TABLE} ORDER BY demo_id LIMIT 1000")]
+    if not ids:
+        raise SystemExit("The demos table is empty; seed it first (--demos for the sqlite backend)")
+    rng = random.Random(seed)
+    nonce = int(time.time() * 1000)
+    samples: Dict[str, List[float]] = {}
+    for round_number in range(rounds + 1):
+        for name, statement in hot_queries(nonce + round_number, rng.choice(ids)).items():
+            started = time.perf_counter()
+            execute(statement)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if round_number:
+                samples.setdefault(name, []).append(elapsed_ms)
+    results = {}
+    for name, values in samples.items():
+        values.sort()
+        results[name] = {
+            "median_ms": round(statistics.median(values), 2),
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "min_ms": round(values[0], 2),
+        }
+    return results
+
+
+def print_run(label: str, run: Dict):
+    print(f"\n{label}  {json.dumps(run['layout'], ensure_ascii=False)}")
+    for name, summary in run["queries"].items():
+        print(f"  {name:<14} median {summary['median_ms']:9.2f}ms   p95 {summary['p95_ms']:9.2f}ms")
+
+
+def print_comparison(before: Dict[str, Dict], after: Dict[str, Dict]):
+    print("\nChange of the median (after vs before)")
+    for name, summary in after.items():
+        if name in before and before[name]["median_ms"]:
+            change = summary["median_ms"] / before[name]["median_ms"] - 1
+            print(f"  {name:<14} {before[name]['median_ms']:9.2f}ms -> {summary['median_ms']:9.2f}ms  ({change * 100:+.1f}%)")
+
+
+def open_repository(backend: str, demos: int, workdir: str):
+    from demo_repository import create_demo_repository
+    if backend != "sqlite":
+        return create_demo_repository(backend=backend)
+    # A throwaway database, so that the migration does not touch SQLITE_DATABASE_PATH
+    from sqlite_database_manager import SQLiteDatabaseManager, open_database
+    path = os.path.join(workdir, "layout_bench.db")
+    open_database(path, seed=demos)
+    return SQLiteDatabaseManager(path=path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare hot-query latency of the demos table before and after a layout migration")
+    parser.add_argument("--backend", default=os.getenv("DEMO_REPOSITORY_BACKEND", "rest"))
+    parser.add_argument("--dialect", choices=["databricks", "sqlite"], help="migration dialect (default: sqlite for local stand-ins)")
+    parser.add_argument("--demos", type=int, default=20000, help="synthetic demos in the temporary sqlite database")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--migrate-to", type=int, help="apply the pending migrations up to this version between two runs")
+    parser.add_argument("--output", default="table_layout_bench.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare the (last) run against")
+    args = parser.parse_args()
+
+    dialect = args.dialect or default_dialect(args.backend)
+    with tempfile.TemporaryDirectory() as workdir:
+        execute = repository_executor(open_repository(args.backend, args.demos, workdir))
+        runs = {}
+        runs["before" if args.migrate_to else "current"] = {
+            "layout": table_layout(execute, dialect), "queries": measure(execute, args.rounds)
+        }
+        if args.migrate_to:
+            applied = migrate(execute, dialect, target=args.migrate_to)
+            runs["after"] = {"layout": table_layout(execute, dialect), "queries": measure(execute, args.rounds),
+                             "applied_migrations": applied}
+        status = migration_status(execute, dialect)
+
+    for label, run in runs.items():
+        print_run(label, run)
+    last = runs.get("after") or runs["current"]
+    if args.migrate_to:
+        print_comparison(runs["before"]["queries"], last["queries"])
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        baseline_runs = baseline["runs"]
+        print_comparison((baseline_runs.get("after") or baseline_runs.get("current"))["queries"], last["queries"])
+
+    results = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "dialect": dialect,
+        "rounds": args.rounds,
+        "migrations": status,
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
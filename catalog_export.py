@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Streaming export of the demo catalog to CSV, JSONL or Parquet
+rows are written chunk by chunk as the Statement API returns them,
+so memory stays constant regardless of the catalog size
+
+Usage:
+    python catalog_export.py --format csv --output demos.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from demo_repository import DemoRepository, create_demo_repository
+
+EXPORT_FORMATS = ["csv", "jsonl", "parquet"]
+# Export files offered for download in the UI; directories older than the retention are removed
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "demo_exports"))
+EXPORT_RETENTION_SECONDS = float(os.getenv("EXPORT_RETENTION_SECONDS", "3600"))
+
+# all_info_md is derived from the other columns, so it is not exported
+EXPORT_COLUMNS = [
+    "demo_id", "title", "summary", "description_md", "creator_emp_id", "owner_emp_id",
+    "created_at", "updated_at", "status", "demo_url", "repo_url", "products",
+    "confidentiality", "remarks"
+]
+
+EXPORT_QUERY = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM hiroshi.ai_demo_hub.demos ORDER BY demo_id"
+
+
+def parse_products_value(value) -> List[str]:
+    """products arrive as a JSON array string from the Statement API"""
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    try:
+        return json.loads(value)
+    except (ValueError, TypeError):
+        return [p.strip() for p in str(value).split(',') if p.strip()]
+
+
+def iter_demo_records(db_manager: DemoRepository) -> Iterator[List[Dict]]:
+    """Yield the catalog as lists of typed records, one list per result chunk"""
+    for columns, rows in db_manager.iter_query_chunks(EXPORT_QUERY, large_result=True):
+        records = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            record["demo_id"] = int(record["demo_id"]) if record.get("demo_id") is not None else None
+            record["products"] = parse_products_value(record.get("products"))
+            records.append(record)
+        yield records
+
+
+def new_export_dir(base: str = EXPORT_DIR, retention_seconds: float = EXPORT_RETENTION_SECONDS) -> str:
+    """A fresh directory for one export, after removing the exports older than retention_seconds"""
+    os.makedirs(base, exist_ok=True)
+    cutoff = time.time() - retention_seconds
+    for name in os.listdir(base):
+        path = os.path.join(base, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            # Removed by a concurrent sweep
+            continue
+    return tempfile.mkdtemp(prefix="export_", dir=base)
+
+
+class CsvWriter:
+    """products are joined with ", " (the format the registration form accepts)"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=EXPORT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, records: List[Dict]):
+        for record in records:
+            self.writer.writerow(dict(record, products=", ".join(record["products"])))
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, records: List[Dict]):
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """One row group per result chunk (requires the optional pyarrow package)"""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        self.pa = pa
+        fields = []
+        for column in EXPORT_COLUMNS:
+            if column == "demo_id":
+                fields.append(pa.field(column, pa.int64()))
+            elif column == "products":
+                fields.append(pa.field(column, pa.list_(pa.string())))
+            else:
+                # Timestamps are kept as the ISO strings the Statement API returns
+                fields.append(pa.field(column, pa.string()))
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, records: List[Dict]):
+        if records:
+            self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def export_catalog(db_manager: DemoRepository, path: str, export_format: str = "csv",
+                   progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream the whole demos table to path; returns the number of exported rows
+
+    progress is called with the running row count after each chunk.
+    """
+    if export_format not in WRITERS:
+        raise ValueError(f"Unsupported export format: {export_format} (choose from {', '.join(EXPORT_FORMATS)})")
+
+    writer = WRITERS[export_format](path)
+    total = 0
+    try:
+        for records in iter_demo_records(db_manager):
+            writer.write(records)
+            total += len(records)
+            if progress:
+                progress(total)
+    except Exception:
+        writer.close()
+        # Do not leave a truncated file behind that looks like a complete export
+        os.remove(path)
+        raise
+    writer.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the AI Demo Hub catalog")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="output format")
+    parser.add_argument("--output", help="output file (default: demos.<format>)")
+    args = parser.parse_args()
+
+    output = args.output or f"demos.{args.format}"
+    start = time.time()
+    try:
+        total = export_catalog(
+            create_demo_repository(), output, args.format,
+            progress=lambda count: print(f"  {count} rows...", file=sys.stderr)
+        )
+    except Exception as e:
+        print(f"❌ Export failed: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Exported {total} demos to {output} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
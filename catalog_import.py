@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Bulk import of demos from CSV or JSONL
+all rows are validated before anything is written, then inserted with
+batched multi-row INSERT statements (plus one UPDATE that fills in the
+demo IDs of all_info_md)
+
+Usage:
+    python catalog_import.py demos.csv [--batch-size 100] [--dry-run]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from demo_repository import DemoRepository, create_demo_repository
+from demo_utils import validate_demo_record
+
+IMPORT_FORMATS = ["csv", "jsonl"]
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "100"))
+
+
+class ImportValidationError(Exception):
+    """Raised when some rows of an import file are invalid (nothing is written)"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid rows")
+
+
+class ImportFailed(Exception):
+    """Raised when a batch fails after earlier batches were already written"""
+
+    def __init__(self, imported: int, total: int, cause: Exception):
+        self.imported = imported
+        self.total = total
+        self.cause = cause
+        super().__init__(f"imported {imported} of {total} rows before failing: {cause}")
+
+
+def read_records(path: str, import_format: Optional[str] = None) -> List[Dict]:
+    """Read the rows of a CSV (header row required) or JSONL file"""
+    import_format = import_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {import_format} (choose from {', '.join(IMPORT_FORMATS)})")
+
+    # utf-8-sig also accepts CSV files saved by Excel
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if import_format == "csv":
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def validate_records(records: List[Dict], owner: Optional[str] = None) -> Tuple[List[Dict], List[str]]:
+    """Validate all records; returns (demo data, error messages with row numbers)"""
+    rows = []
+    errors = []
+    for number, record in enumerate(records, start=1):
+        data, record_errors = validate_demo_record(record, owner)
+        if record_errors:
+            errors.extend(f"Row {number}: {message}" for message in record_errors)
+        rows.append(data)
+    return rows, errors
+
+
+def import_catalog(db_manager: DemoRepository, path: str, import_format: Optional[str] = None,
+                   batch_size: int = IMPORT_BATCH_SIZE,
+                   progress: Optional[Callable[[int, int], None]] = None, dry_run: bool = False,
+                   owner: Optional[str] = None) -> int:
+    """Validate and insert every row of path; returns the number of imported demos
+
+    progress is called with (imported rows, total rows) after each batch.
+    With owner every row must be owned by that user (empty owners are set to it).
+    Raises ImportValidationError without writing anything if any row is invalid,
+    and ImportFailed with the number of written rows if a later batch fails.
+    """
+    rows, errors = validate_records(read_records(path, import_format), owner)
+    if errors:
+        raise ImportValidationError(errors)
+    if dry_run or not rows:
+        return len(rows) if dry_run else 0
+
+    imported = 0
+    try:
+        for start in range(0, len(rows), batch_size):
+            imported += db_manager.insert_demos_batch(rows[start:start + batch_size])
+            if progress:
+                progress(imported, len(rows))
+    except Exception as e:
+        # Rows of the batches that did succeed must not keep "Demo ID: TBD"; a failure
+        # here (the warehouse is likely still failing) must not hide how many were written
+        if imported:
+            try:
+                db_manager.fill_pending_demo_ids()
+            except Exception as fill_error:
+                print(f"Warning: Failed to fill in demo IDs after a partial import: {str(fill_error)}")
+        raise ImportFailed(imported, len(rows), e) from e
+
+    db_manager.fill_pending_demo_ids()
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import demos into the AI Demo Hub")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="rows per INSERT statement")
+    parser.add_argument("--dry-run", action="store_true", help="validate only")
+    parser.add_argument("--owner", help="require every row to be owned by this user (empty owners are set to it)")
+    args = parser.parse_args()
+
+    start = time.time()
+    try:
+        total = import_catalog(
+            create_demo_repository(), args.path, args.format, args.batch_size,
+            progress=lambda done, total: print(f"  {done}/{total} rows...", file=sys.stderr),
+            dry_run=args.dry_run, owner=args.owner
+        )
+    except ImportValidationError as e:
+        print("❌ Validation failed (nothing was imported):", file=sys.stderr)
+        for message in e.errors:
+            print(f"   - {message}", file=sys.stderr)
+        sys.exit(1)
+    except ImportFailed as e:
+        print(f"❌ Import failed after {e.imported}/{e.total} rows: {str(e.cause)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Import failed: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.dry_run:
+        print(f"✅ {total} demos are valid")
+    else:
+        print(f"✅ Imported {total} demos in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+databricks-sql-connector backend of the demo repository (DEMO_REPOSITORY_BACKEND=connector)
+runs the same SQL as the REST backend through connector sessions instead of
+the Statement API; rows are converted to the Statement API form
+
+Sessions are kept in a pool per (host, warehouse, token) and reused across
+requests (health-checked after being idle, closed after CONNECTOR_POOL_IDLE_SECONDS),
+and results are fetched as Arrow batches instead of row by row. Each signed-in
+user's token has a pool of its own, so the sessions of all pools together are
+capped by CONNECTOR_MAX_SESSIONS: when it is reached, idle sessions of other
+pools are closed to make room, otherwise the caller waits.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from api_database_manager import APIBasedDatabaseManager
+from demo_repository import statement_value
+from metrics import record_cache, timed_sql
+from statement_log import record_statement
+from tracing import set_attribute, span, traced
+
+# Open sessions per (host, warehouse, token); callers wait when all are in use
+CONNECTOR_POOL_SIZE = int(os.getenv("CONNECTOR_POOL_SIZE", "4"))
+# Open sessions across all pools (one pool per user token)
+CONNECTOR_MAX_SESSIONS = int(os.getenv("CONNECTOR_MAX_SESSIONS", "16"))
+CONNECTOR_POOL_TIMEOUT_SECONDS = float(os.getenv("CONNECTOR_POOL_TIMEOUT_SECONDS", "30"))
+# Idle sessions are closed after this long (the warehouse may also expire them)
+CONNECTOR_POOL_IDLE_SECONDS = float(os.getenv("CONNECTOR_POOL_IDLE_SECONDS", "300"))
+# Sessions idle for longer than this are checked with SELECT 1 before reuse
+CONNECTOR_HEALTH_CHECK_SECONDS = float(os.getenv("CONNECTOR_HEALTH_CHECK_SECONDS", "60"))
+# Rows per Arrow batch when streaming large results (iter_query_chunks)
+CONNECTOR_FETCH_BATCH_ROWS = int(os.getenv("CONNECTOR_FETCH_BATCH_ROWS", "10000"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no session became free within CONNECTOR_POOL_TIMEOUT_SECONDS"""
+
+
+class SessionBudget:
+    """Count of open sessions shared by all pools"""
+
+    def __init__(self, limit: int = CONNECTOR_MAX_SESSIONS):
+        self.limit = limit
+        self._condition = threading.Condition()
+        self._open = 0
+
+    @property
+    def open(self) -> int:
+        with self._condition:
+            return self._open
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self._open >= self.limit:
+                return False
+            self._open += 1
+            return True
+
+    def release(self, count: int = 1):
+        if count:
+            with self._condition:
+                self._open -= count
+                self._condition.notify_all()
+
+    def wait(self, timeout: float):
+        """Wait until a session is released somewhere (or timeout)"""
+        with self._condition:
+            if self._open >= self.limit:
+                self._condition.wait(timeout)
+
+
+class ConnectionPool:
+    """Thread-safe pool of connector sessions for one set of credentials"""
+
+    def __init__(self, connect, max_size: int = CONNECTOR_POOL_SIZE, idle_seconds: float = CONNECTOR_POOL_IDLE_SECONDS,
+                 health_check_seconds: float = CONNECTOR_HEALTH_CHECK_SECONDS, budget: Optional[SessionBudget] = None,
+                 reclaim: Optional[Callable[["ConnectionPool"], int]] = None):
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.health_check_seconds = health_check_seconds
+        # Shared limit across pools, and how to close other pools' idle sessions when it is reached
+        self.budget = budget
+        self.reclaim = reclaim
+        self._condition = threading.Condition()
+        self._idle: List[Tuple[object, float]] = []  # (connection, released at), most recent last
+        self._open = 0
+
+    @property
+    def size(self) -> int:
+        with self._condition:
+            return self._open
+
+    def _released(self, count: int):
+        """count sessions were closed (caller holds the lock)"""
+        self._open -= count
+        if self.budget:
+            self.budget.release(count)
+        self._condition.notify_all()
+
+    def _evict_idle(self, idle_seconds: Optional[float] = None) -> List:
+        """Remove sessions idle for longer than idle_seconds (caller holds the lock); returns them for closing"""
+        cutoff = time.monotonic() - (self.idle_seconds if idle_seconds is None else idle_seconds)
+        expired = [connection for connection, released_at in self._idle if released_at < cutoff]
+        if expired:
+            self._idle = [(connection, released_at) for connection, released_at in self._idle if released_at >= cutoff]
+            self._released(len(expired))
+        return expired
+
+    def evict_idle(self, idle_seconds: Optional[float] = None) -> int:
+        """Close the sessions idle for longer than idle_seconds (0: every idle session); returns how many"""
+        with self._condition:
+            expired = self._evict_idle(idle_seconds)
+        self._close(expired)
+        return len(expired)
+
+    def _is_healthy(self, connection) -> bool:
+        try:
+            if not getattr(connection, "open", True):
+                return False
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except Exception as e:
+            print(f"Connector session health check failed: {str(e)}")
+            return False
+
+    def _close(self, connections: List):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _take(self, timeout: float):
+        """An idle session (with the time it was released) or None after reserving a slot for a new one"""
+        deadline = time.monotonic() + timeout
+        while True:
+            expired = []
+            try:
+                with self._condition:
+                    expired.extend(self._evict_idle())
+                    if self._idle:
+                        return self._idle.pop()
+                    below_pool_size = self._open < self.max_size
+                    if below_pool_size and (self.budget is None or self.budget.try_acquire()):
+                        self._open += 1
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No connector session free within {timeout:g}s "
+                                          f"(pool size {self.max_size}, {self.budget.open if self.budget else self._open} open in total)")
+                    if not below_pool_size:
+                        self._condition.wait(remaining)
+                        continue
+            finally:
+                # Closing talks to the warehouse, so it happens outside the lock
+                self._close(expired)
+
+            # The shared limit is reached: close other users' idle sessions, or wait for one to be released
+            # (outside this pool's lock, since reclaiming takes the other pools' locks)
+            if not (self.reclaim and self.reclaim(self)):
+                self.budget.wait(min(remaining, 1.0))
+
+    def _discard(self, connection):
+        with self._condition:
+            self._released(1)
+        if connection is not None:
+            self._close([connection])
+
+    @contextmanager
+    def connection(self, timeout: float = CONNECTOR_POOL_TIMEOUT_SECONDS):
+        """Borrow a session; it is returned to the pool unless the block raised"""
+        while True:
+            taken = self._take(timeout)
+            if taken is None:
+                record_cache("connector_session", False)
+                try:
+                    with span("sql.connector.connect"):
+                        connection = self.connect()
+                except Exception:
+                    self._discard(None)
+                    raise
+                break
+            connection, released_at = taken
+            if time.monotonic() - released_at <= self.health_check_seconds or self._is_healthy(connection):
+                record_cache("connector_session", True)
+                break
+            self._discard(connection)
+
+        try:
+            yield connection
+        except BaseException:
+            # The session may be broken (or a statement still running); do not hand it out again
+            self._discard(connection)
+            raise
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+
+_pools: Dict[Tuple[str, str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_session_budget = SessionBudget()
+_last_sweep = {"at": 0.0}
+
+
+def _reclaim_idle_sessions(requester: ConnectionPool) -> int:
+    """Close every idle session of the pools other than requester; returns how many"""
+    with _pools_lock:
+        others = [pool for pool in _pools.values() if pool is not requester]
+    return sum(pool.evict_idle(0) for pool in others)
+
+
+def sweep_pools():
+    """Close sessions idle for longer than CONNECTOR_POOL_IDLE_SECONDS in every pool and drop empty pools"""
+    with _pools_lock:
+        pools = list(_pools.items())
+        _last_sweep["at"] = time.monotonic()
+    for _, pool in pools:
+        pool.evict_idle()
+    with _pools_lock:
+        for key in [key for key, pool in _pools.items() if pool.size == 0]:
+            del _pools[key]
+
+
+def get_pool(server_hostname: str, http_path: str, access_token: str) -> ConnectionPool:
+    """The shared pool for these credentials (handlers create a manager per request)
+
+    Pools are per user token; idle pools (including those of rotated tokens) are swept
+    at most every CONNECTOR_HEALTH_CHECK_SECONDS.
+    """
+    key = (server_hostname, http_path, access_token)
+    if time.monotonic() - _last_sweep["at"] > CONNECTOR_HEALTH_CHECK_SECONDS:
+        sweep_pools()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            def connect():
+                from databricks import sql
+                return sql.connect(server_hostname=server_hostname, http_path=http_path, access_token=access_token)
+            pool = _pools[key] = ConnectionPool(connect, budget=_session_budget, reclaim=_reclaim_idle_sessions)
+        return pool
+
+
+def _arrow_rows(table) -> List[List]:
+    """Rows of a pyarrow Table in the Statement API form (converted column by column)"""
+    columns = [[statement_value(value) for value in column.to_pylist()] for column in table.columns]
+    return [list(row) for row in zip(*columns)]
+
+
+class ConnectorDatabaseManager(APIBasedDatabaseManager):
+    """Demo repository on databricks-sql-connector (the SQL is shared with the REST backend)"""
+
+    def __init__(self, user_token: str = None):
+        super().__init__(user_token)
+        # The connector takes the bare hostname
+        self.connector_hostname = self.server_url.split("://", 1)[-1]
+        self.http_path = f"/sql/1.0/warehouses/{self.warehouse_id}"
+
+    @property
+    def pool(self) -> ConnectionPool:
+        if not self.access_token:
+            raise ValueError("No access token available for database operations. Please ensure user authentication is properly configured.")
+        return get_pool(self.connector_hostname, self.http_path, self.access_token)
+
+    def _iter_batches(self, cursor, batch_rows: int) -> Iterator[List[List]]:
+        """Result rows in batches: Arrow when pyarrow is installed, plain fetchmany otherwise"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            while True:
+                rows = cursor.fetchmany(batch_rows)
+                if not rows:
+                    return
+                yield [[statement_value(value) for value in row] for row in rows]
+        while True:
+            table = cursor.fetchmany_arrow(batch_rows)
+            if table.num_rows == 0:
+                return
+            yield _arrow_rows(table)
+
+    def _execute(self, query: str) -> Tuple[List[str], List[List]]:
+        """Run a statement; DML answers with num_affected_rows like the Statement API"""
+        with self.pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query)
+            if cursor.description is None:
+                return ["num_affected_rows"], [[str(cursor.rowcount)]]
+            columns = [desc[0] for desc in cursor.description]
+            rows = []
+            # Small results are fetched in one Arrow round trip
+            for batch in self._iter_batches(cursor, CONNECTOR_FETCH_BATCH_ROWS):
+                rows.extend(batch)
+            return columns, rows
+
+    @timed_sql
+    @traced("sql.connector.execute")
+    def execute_query_api(self, query: str, timeout: Optional[float] = None, query_name: Optional[str] = None) -> List[Dict]:
+        """Execute query and return rows as dicts (errors are logged and answered with no rows)"""
+        set_attribute("statement", " ".join(query.split())[:120])
+        started = time.perf_counter()
+        columns, rows, error = [], [], None
+        try:
+            columns, rows = self._execute(query)
+            return [dict(zip(columns, row)) for row in rows]
+        except Exception as e:
+            error = str(e)
+            set_attribute("error", error)
+            print(f"Connector query error: {error}")
+            return []
+        finally:
+            record_statement(query, (time.perf_counter() - started) * 1000, state="FAILED" if error else "SUCCEEDED",
+                             rows=len(rows), error=error)
+
+    def iter_query_chunks(self, query: str, timeout: Optional[float] = 60, poll_interval: float = 1.0,
+                          large_result: bool = False) -> Iterator[Tuple[List[str], List[List]]]:
+        """Execute query and yield (columns, rows) one Arrow batch at a time, raising on failure
+
+        The session stays borrowed until the consumer has read the last batch.
+        """
+        started = time.perf_counter()
+        recorded = False
+        try:
+            with self.pool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute(query)
+                # Timed until the first batch is available, like the REST backend
+                record_statement(query, (time.perf_counter() - started) * 1000, state="SUCCEEDED")
+                recorded = True
+                if cursor.description is None:
+                    yield ["num_affected_rows"], [[str(cursor.rowcount)]]
+                    return
+                columns = [desc[0] for desc in cursor.description]
+                yielded = False
+                for batch in self._iter_batches(cursor, CONNECTOR_FETCH_BATCH_ROWS):
+                    yielded = True
+                    yield columns, batch
+                if not yielded:
+                    yield columns, []
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            if not recorded:
+                record_statement(query, (time.perf_counter() - started) * 1000, state="FAILED", error=str(e))
+            raise Exception(f"Database error: {str(e)}")
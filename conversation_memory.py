@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted conversation memory for the RAG chat
+keeps raw Markdown turns (not the rendered HTML shown in the chatbot)
+and rolls older turns into a compact running summary
+"""
+
+import math
+import re
+from typing import Dict, List, Optional
+
+CJK_CHAR_PATTERN = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+BOLD_PATTERN = re.compile(r'\*\*([^*\n]+)\*\*')
+SENTENCE_END_PATTERN = re.compile(r'(?<=[。．!?！？])\s*|(?<=\.)\s+')
+
+ROLE_LABELS = {"user": "ユーザー", "assistant": "アシスタント"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about 1 token per CJK character, 4 characters per token otherwise)"""
+    if not text:
+        return 0
+    cjk_count = len(CJK_CHAR_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + math.ceil(other_count / 4)
+
+
+def summarize_turn(role: str, content: str, max_chars: int = 80) -> str:
+    """Compress one turn into a single summary line without calling an LLM"""
+    label = ROLE_LABELS.get(role, role)
+    text = re.sub(r'\s+', ' ', content or '').strip()
+
+    if role == "assistant":
+        # Assistant answers usually list demo titles in bold, which is what later turns refer to
+        highlights = list(dict.fromkeys(BOLD_PATTERN.findall(content or '')))
+        if highlights:
+            text = "言及: " + ", ".join(highlights)
+        else:
+            text = SENTENCE_END_PATTERN.split(text, maxsplit=1)[0]
+
+    if len(text) > max_chars:
+        text = text[:max_chars - 1] + "…"
+    return f"- {label}: {text}"
+
+
+class ConversationMemory:
+    """Raw Markdown chat history with a token budget and running summary"""
+
+    def __init__(self, token_budget: int = 2000, summary_token_budget: int = 500):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.turns: List[Dict[str, str]] = []
+        self.summary_lines: List[str] = []
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(self.summary_lines)
+
+    def add(self, role: str, content: str):
+        """Append a raw Markdown turn and compact the history if it exceeds the budget"""
+        if not content:
+            return
+        self.turns.append({"role": role, "content": content})
+        self.compact()
+
+    def history_tokens(self) -> int:
+        return sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+    def compact(self):
+        """Roll the oldest turns into the summary until the history fits the token budget"""
+        # Always keep the latest turn verbatim even if it alone exceeds the budget
+        while len(self.turns) > 1 and self.history_tokens() > self.token_budget:
+            turn = self.turns.pop(0)
+            self.summary_lines.append(summarize_turn(turn["role"], turn["content"]))
+
+        # The summary itself is bounded too; the oldest lines go first
+        while len(self.summary_lines) > 1 and estimate_tokens(self.summary) > self.summary_token_budget:
+            self.summary_lines.pop(0)
+
+    def build_messages(self, message: str) -> List[Dict[str, str]]:
+        """Messages to send for a new user message (recent turns plus the message itself)"""
+        messages = [dict(turn) for turn in self.turns]
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def request_tokens(self, message: str) -> int:
+        """Approximate tokens of the conversation part of the next request"""
+        return estimate_tokens(self.summary) + self.history_tokens() + estimate_tokens(message)
+
+    def clear(self):
+        self.turns = []
+        self.summary_lines = []
+
+    def context_summary(self) -> Optional[str]:
+        """Running summary of rolled-up turns, or None if nothing has been rolled up yet"""
+        if not self.summary_lines:
+            return None
+        return "これまでの会話の要約:\n" + self.summary
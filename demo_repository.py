@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Data-access interface used by the handlers, with interchangeable backends
+selected by DEMO_REPOSITORY_BACKEND:
+
+    rest       SQL Statement API over HTTPS (APIBasedDatabaseManager, default)
+    connector  databricks-sql-connector sessions (ConnectorDatabaseManager)
+    sqlite     embedded SQLite file for local development and benchmarks (SQLiteDatabaseManager)
+
+The backends share the SQL of APIBasedDatabaseManager and differ only in how a
+statement is executed; rows always come back in the Statement API form (values
+as strings, arrays as JSON), so callers do not depend on the backend.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEMO_REPOSITORY_BACKEND = os.getenv("DEMO_REPOSITORY_BACKEND", "rest").strip().lower()
+REPOSITORY_BACKENDS = ("rest", "connector", "sqlite")
+
+
+class DemoNotFound(Exception):
+    """Raised by a conditional write when the demo does not exist"""
+
+
+class NotDemoOwner(Exception):
+    """Raised by a write restricted to the demo's owner when someone else owns it"""
+
+    def __init__(self, demo_id: int, owner_emp_id: str):
+        super().__init__(f"Demo {demo_id} is owned by {owner_emp_id}")
+        self.demo_id = demo_id
+        self.owner_emp_id = owner_emp_id
+
+
+class UpdateConflict(Exception):
+    """Raised when a demo was changed after the version an update was based on was loaded"""
+
+    def __init__(self, demo_id: int, expected_updated_at):
+        super().__init__(f"Demo {demo_id} was modified after it was loaded (expected updated_at {expected_updated_at})")
+        self.demo_id = demo_id
+        self.expected_updated_at = expected_updated_at
+
+
+def statement_value(value) -> Optional[str]:
+    """A value as the Statement API returns it in JSON_ARRAY results (a string, or None for NULL)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        # numpy arrays from the connector's Arrow results
+        value = value.tolist()
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+class DemoRepository(ABC):
+    """Operations on the demos table used by the handlers, the search index and catalog import/export"""
+
+    @abstractmethod
+    def test_connection(self) -> bool:
+        """Whether statements can be executed with the current credentials"""
+
+    # Lists and search
+    @abstractmethod
+    def get_demos(self, page: int = 1, sort_column: str = "created_at", sort_order: str = "ASC",
+                  filters: Optional[Dict[str, str]] = None) -> Tuple[List[Dict], int]:
+        """One page of the demo list and the total count"""
+
+    @abstractmethod
+    def get_facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """{facet: {value: count}} for the list filters"""
+
+    @abstractmethod
+    def get_demo_versions(self, timeout: Optional[float] = None) -> List[Dict]:
+        """(demo_id, updated_at) of all demos"""
+
+    @abstractmethod
+    def get_search_documents(self, demo_ids: Optional[List[int]] = None, timeout: Optional[float] = None) -> List[Dict]:
+        """Rows for the local search index (all demos, or only demo_ids)"""
+
+    # Single demos
+    @abstractmethod
+    def get_demo_detail(self, demo_id: int) -> Optional[Dict]:
+        """demo_id and all_info_md"""
+
+    @abstractmethod
+    def get_demo_owner(self, demo_id: int) -> Optional[Dict]:
+        """demo_id and owner_emp_id"""
+
+    @abstractmethod
+    def get_demo_for_update(self, demo_id: int) -> Optional[Dict]:
+        """The editable columns"""
+
+    # Writes
+    @abstractmethod
+    def insert_demo(self, data: Dict, created_at: Optional[datetime] = None) -> int:
+        """Insert one demo; returns its demo_id"""
+
+    @abstractmethod
+    def update_demo(self, demo_id: int, data: Dict, updated_at: Optional[datetime] = None,
+                    expected_version: Optional[Dict] = None, required_owner: Optional[str] = None) -> bool:
+        """Update one demo; with expected_version ({"created_at", "updated_at"} as loaded) only if it is
+        unchanged and with required_owner only if that user owns it, raising UpdateConflict,
+        NotDemoOwner or DemoNotFound otherwise"""
+
+    @abstractmethod
+    def delete_demo(self, demo_id: int, required_owner: Optional[str] = None) -> bool:
+        """Delete one demo (with required_owner only if that user owns it), raising NotDemoOwner or DemoNotFound"""
+
+    @abstractmethod
+    def find_demo_by_write_key(self, title: str, owner_emp_id: str, created_at: datetime) -> Optional[int]:
+        """demo_id of the demo inserted with (title, owner_emp_id, created_at), or None"""
+
+    @abstractmethod
+    def is_demo_updated_at(self, demo_id: int, updated_at: datetime) -> bool:
+        """Whether demo_id has already been updated at updated_at"""
+
+    # Bulk operations
+    @abstractmethod
+    def insert_demos_batch(self, rows: List[Dict], timeout: Optional[float] = 120) -> int:
+        """Insert many validated demos; returns the number of rows"""
+
+    @abstractmethod
+    def fill_pending_demo_ids(self, timeout: Optional[float] = 120):
+        """Write the assigned demo_id into all_info_md of batch-inserted rows"""
+
+    @abstractmethod
+    def iter_query_chunks(self, query: str, timeout: Optional[float] = 60, poll_interval: float = 1.0,
+                          large_result: bool = False) -> Iterator[Tuple[List[str], List[List]]]:
+        """Execute query and yield (columns, rows) one chunk at a time, raising on failure
+
+        large_result marks results that may exceed the Statement API's 25 MiB inline limit.
+        """
+
+
+def create_demo_repository(user_token: Optional[str] = None, backend: Optional[str] = None) -> DemoRepository:
+    """Repository for the configured backend (user_token is ignored by sqlite)"""
+    backend = (backend or DEMO_REPOSITORY_BACKEND).strip().lower()
+    # Imported here so that only the selected backend's dependencies are loaded
+    if backend == "rest":
+        from api_database_manager import APIBasedDatabaseManager
+        return APIBasedDatabaseManager(user_token)
+    if backend == "connector":
+        from connector_database_manager import ConnectorDatabaseManager
+        return ConnectorDatabaseManager(user_token)
+    if backend == "sqlite":
+        from sqlite_database_manager import SQLiteDatabaseManager
+        return SQLiteDatabaseManager(user_token)
+    raise ValueError(f"Unknown DEMO_REPOSITORY_BACKEND '{backend}' (expected one of: {', '.join(REPOSITORY_BACKENDS)})")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Validation helpers for demo records
+shared by the registration form, the update form and bulk import
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+REQUIRED_FIELDS = ["title", "owner_emp_id", "status", "demo_url"]
+STATUS_VALUES = ["draft", "in_review", "published", "archived"]
+CONFIDENTIALITY_VALUES = ["public", "internal"]
+
+
+def validate_email(email: str) -> bool:
+    """Validate email format"""
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+
+def parse_products(products_str: str) -> List[str]:
+    """Parse products string to list"""
+    if not products_str:
+        return []
+    # Handle comma-separated values
+    return [p.strip() for p in products_str.split(',') if p.strip()]
+
+
+def validate_demo_record(record: Dict, owner: Optional[str] = None) -> Tuple[Dict, List[str]]:
+    """Apply the registration form rules to one record; returns (demo data, error messages)
+
+    products may be a list or a comma-separated string. With owner (the
+    signed-in user) an empty owner_emp_id is set to owner and any other
+    owner is rejected, as the registration form does.
+    """
+    values = {key: (value.strip() if isinstance(value, str) else value) for key, value in record.items()}
+    if owner and not values.get("owner_emp_id"):
+        values["owner_emp_id"] = owner
+
+    errors = []
+    missing = [field for field in REQUIRED_FIELDS if not values.get(field)]
+    if missing:
+        errors.append(f"Required fields ({', '.join(missing)}) cannot be empty.")
+    if values.get("owner_emp_id") and not validate_email(values["owner_emp_id"]):
+        errors.append("Invalid email format for owner_emp_id.")
+    if owner and values.get("owner_emp_id") and values["owner_emp_id"].lower() != owner.lower():
+        errors.append(f"owner_emp_id must be the importing user ({owner}).")
+    if values.get("creator_emp_id") and not validate_email(values["creator_emp_id"]):
+        errors.append("Invalid email format for creator_emp_id.")
+    if values.get("status") and values["status"] not in STATUS_VALUES:
+        errors.append(f"Invalid status: {values['status']} (choose from {', '.join(STATUS_VALUES)}).")
+    if values.get("confidentiality") and values["confidentiality"] not in CONFIDENTIALITY_VALUES:
+        errors.append(f"Invalid confidentiality: {values['confidentiality']} (choose from {', '.join(CONFIDENTIALITY_VALUES)}).")
+
+    products = values.get("products")
+    if not isinstance(products, list):
+        products = parse_products(products or "")
+
+    data = {
+        "title": values.get("title") or "",
+        "summary": values.get("summary") or "",
+        "description_md": values.get("description_md") or "",
+        "owner_emp_id": values.get("owner_emp_id") or "",
+        "creator_emp_id": values.get("creator_emp_id") or "",
+        "status": values.get("status") or "draft",
+        "demo_url": values.get("demo_url") or "",
+        "repo_url": values.get("repo_url") or "",
+        "products": [str(p).strip() for p in products if str(p).strip()],
+        "confidentiality": values.get("confidentiality") or "internal",
+        "remarks": values.get("remarks") or ""
+    }
+    return data, errors
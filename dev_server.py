@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Databricks endpoints used by the app
+the SQL Statement API subset (on top of SQLite, sharing the SQL translation
+of sqlite_database_manager.py) and query history,
+/oidc/v1/token, the OpenAI-compatible chat endpoint used by TitleGenerator
+and the RAG invocation format, with latency, failure and cold-start injection,
+and a TRIGGERED Vector Search index (the RAG answers only see demos as of the
+last completed sync)
+
+Usage:
+    python dev_server.py --seed 500 --port 8000
+
+    DATABRICKS_SERVER_HOSTNAME=http://127.0.0.1:8000 DATABRICKS_HOST=http://127.0.0.1:8000 \\
+    DATABRICKS_TOKEN=dev DATABRICKS_WAREHOUSE_ID=dev \\
+    RAG_ENDPOINT=http://127.0.0.1:8000/serving-endpoints/rag/invocations python app.py
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from demo_repository import statement_value
+from sqlite_database_manager import SCHEMA, seed_demos, translate_sql
+
+DEV_SERVER_DB_PATH = os.getenv("DEV_SERVER_DB_PATH", "dev_server.db")
+DEV_SERVER_CHUNK_ROWS = int(os.getenv("DEV_SERVER_CHUNK_ROWS", "1000"))
+# Injected latency per request (milliseconds), for the SQL and the model endpoints
+DEV_SERVER_SQL_LATENCY_MS = float(os.getenv("DEV_SERVER_SQL_LATENCY_MS", "0"))
+DEV_SERVER_LLM_LATENCY_MS = float(os.getenv("DEV_SERVER_LLM_LATENCY_MS", "0"))
+DEV_SERVER_JITTER_MS = float(os.getenv("DEV_SERVER_JITTER_MS", "0"))
+# Fraction of requests answered with 503 (like a warehouse or endpoint being overloaded)
+DEV_SERVER_FAILURE_RATE = float(os.getenv("DEV_SERVER_FAILURE_RATE", "0"))
+# The first request after DEV_SERVER_COLD_IDLE_SECONDS without traffic waits this long (warehouse start-up)
+DEV_SERVER_COLD_START_SECONDS = float(os.getenv("DEV_SERVER_COLD_START_SECONDS", "0"))
+DEV_SERVER_COLD_IDLE_SECONDS = float(os.getenv("DEV_SERVER_COLD_IDLE_SECONDS", "600"))
+# How long a triggered Vector Search index sync takes
+DEV_SERVER_VS_SYNC_SECONDS = float(os.getenv("DEV_SERVER_VS_SYNC_SECONDS", "2"))
+
+STATEMENT_CACHE_SIZE = 1000
+
+
+# --- State ---------------------------------------------------------------------
+
+class DevWarehouse:
+    """SQLite database plus the statements whose results are still being fetched"""
+
+    def __init__(self, path: str = DEV_SERVER_DB_PATH, chunk_rows: int = DEV_SERVER_CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(SCHEMA)
+        self._statements: "OrderedDict[str, Dict]" = OrderedDict()
+        self._last_request = 0.0
+
+    def seed(self, count: int):
+        """Insert count synthetic demos (only into an empty table)"""
+        with self._lock:
+            inserted = seed_demos(self._connection, count)
+        if inserted:
+            print(f"Seeded {inserted} demos")
+
+    def cold_start_delay(self) -> float:
+        """Seconds the current request has to wait for the (simulated) warehouse to start"""
+        now = time.monotonic()
+        with self._lock:
+            idle = now - self._last_request if self._last_request else float("inf")
+            self._last_request = now
+        return DEV_SERVER_COLD_START_SECONDS if idle >= DEV_SERVER_COLD_IDLE_SECONDS else 0.0
+
+    def execute(self, statement: str) -> Dict:
+        """Run a statement and keep its result; returns the stored statement"""
+        statement_id = uuid.uuid4().hex
+        stored = {"statement_id": statement_id, "statement": statement, "columns": [], "rows": [], "error": None,
+                  "ready_at": 0.0, "is_query": False, "affected": 0, "start_time_ms": int(time.time() * 1000)}
+        started = time.perf_counter()
+        try:
+            sql = translate_sql(statement)
+            with self._lock:
+                cursor = self._connection.execute(sql)
+                if cursor.description:
+                    stored["is_query"] = True
+                    stored["columns"] = [column[0] for column in cursor.description]
+                    stored["rows"] = cursor.fetchall()
+                else:
+                    stored["affected"] = cursor.rowcount
+        except (sqlite3.Error, ValueError) as e:
+            stored["error"] = str(e)
+        stored["execution_ms"] = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._statements[statement_id] = stored
+            while len(self._statements) > STATEMENT_CACHE_SIZE:
+                self._statements.popitem(last=False)
+        return stored
+
+    def get(self, statement_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._statements.get(statement_id)
+
+
+class DevVectorIndex:
+    """A TRIGGERED Vector Search index over the demos: a snapshot replaced by each completed sync"""
+
+    COLUMNS = ("demo_id", "title", "summary", "all_info_md", "demo_url", "updated_at")
+
+    def __init__(self, name: str, sync_seconds: float = DEV_SERVER_VS_SYNC_SECONDS):
+        self.name = name
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._rows: List[tuple] = []
+        self._pending: Optional[List[tuple]] = None
+        self._sync_done_at = 0.0
+        self.syncs = 0
+
+    def _read_demos(self) -> List[tuple]:
+        with warehouse._lock:
+            return warehouse._connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM demos").fetchall()
+
+    def _complete_sync(self):
+        """Apply a finished sync (caller holds the lock)"""
+        if self._pending is not None and time.monotonic() >= self._sync_done_at:
+            self._rows, self._pending = self._pending, None
+            self.syncs += 1
+
+    def load(self):
+        """Index the current table right away (the state at server start)"""
+        rows = self._read_demos()
+        with self._lock:
+            self._rows = rows
+
+    def trigger_sync(self) -> bool:
+        """Start a sync of the table as it is now; False when one is still running"""
+        with self._lock:
+            self._complete_sync()
+            if self._pending is not None:
+                return False
+        rows = self._read_demos()
+        with self._lock:
+            self._pending = rows
+            self._sync_done_at = time.monotonic() + self.sync_seconds
+        return True
+
+    def status(self) -> Dict:
+        with self._lock:
+            self._complete_sync()
+            syncing = self._pending is not None
+            indexed = len(self._rows)
+        return {
+            "name": self.name,
+            "index_type": "DELTA_SYNC",
+            "delta_sync_index_spec": {"source_table": "hiroshi.ai_demo_hub.demos", "pipeline_type": "TRIGGERED"},
+            "status": {"ready": True, "indexed_row_count": indexed,
+                       "detailed_state": "ONLINE_TRIGGERED_UPDATE" if syncing else "ONLINE_NO_PENDING_UPDATE",
+                       "message": "Index is syncing" if syncing else "Index is up to date"},
+        }
+
+    def search(self, terms: List[str], limit: int = 3) -> List[tuple]:
+        """Demos containing any term in title, summary or all_info_md, newest first (like LIKE '%term%')"""
+        with self._lock:
+            self._complete_sync()
+            rows = list(self._rows)
+        terms = [term.lower() for term in terms]
+        if terms:
+            rows = [row for row in rows if any(term in (field or "").lower() for term in terms for field in row[1:4])]
+        rows.sort(key=lambda row: row[5] or "", reverse=True)
+        return rows[:limit]
+
+
+warehouse: Optional[DevWarehouse] = None
+vector_index: Optional[DevVectorIndex] = None
+
+
+# --- Responses -----------------------------------------------------------------
+
+def _chunk_data(stored: Dict, index: int) -> List[List]:
+    if not stored["is_query"]:
+        return [[str(stored["affected"])]]
+    size = warehouse.chunk_rows
+    return [[statement_value(value) for value in row] for row in stored["rows"][index * size:(index + 1) * size]]
+
+
+def _chunk(stored: Dict, index: int) -> Dict:
+    """Chunk index of the result, inline or (disposition EXTERNAL_LINKS) as a link to download it from"""
+    statement_id = stored["statement_id"]
+    data_array = _chunk_data(stored, index)
+    chunk = {"chunk_index": index, "row_offset": index * warehouse.chunk_rows if stored["is_query"] else 0,
+             "row_count": len(data_array)}
+    if stored["is_query"] and (index + 1) * warehouse.chunk_rows < len(stored["rows"]):
+        chunk["next_chunk_index"] = index + 1
+        chunk["next_chunk_internal_link"] = f"/api/2.0/sql/statements/{statement_id}/result/chunks/{index + 1}"
+    if stored["disposition"] == "EXTERNAL_LINKS":
+        link = dict(chunk, external_link=f"{stored['base_url']}/external-results/{statement_id}/{index}")
+        return {"external_links": [link]}
+    return dict(chunk, data_array=data_array)
+
+
+def _statement_response(stored: Dict) -> Dict:
+    statement_id = stored["statement_id"]
+    if stored["error"]:
+        return {"statement_id": statement_id,
+                "status": {"state": "FAILED", "error": {"error_code": "BAD_REQUEST", "message": stored["error"]}}}
+    if time.monotonic() < stored["ready_at"]:
+        return {"statement_id": statement_id, "status": {"state": "RUNNING"}}
+
+    if stored["is_query"]:
+        columns = [{"name": name, "position": position, "type_name": "STRING"} for position, name in enumerate(stored["columns"])]
+        total_rows = len(stored["rows"])
+    else:
+        # DML answers with the affected row count like the real warehouse
+        columns = [{"name": "num_affected_rows", "position": 0, "type_name": "LONG"}]
+        total_rows = 1
+    chunk_count = max(1, -(-total_rows // warehouse.chunk_rows))
+    return {
+        "statement_id": statement_id,
+        "status": {"state": "SUCCEEDED"},
+        "manifest": {
+            "format": "JSON_ARRAY",
+            "schema": {"column_count": len(columns), "columns": columns},
+            "total_row_count": total_rows,
+            "total_chunk_count": chunk_count,
+            "truncated": False,
+        },
+        "result": _chunk(stored, 0),
+    }
+
+
+def _wait_timeout_seconds(value: Optional[str]) -> float:
+    """Statement API wait_timeout ("0s" or "5s".."50s", default 10s)"""
+    match = re.fullmatch(r'(\d+)s', value or "10s")
+    return float(match.group(1)) if match else 10.0
+
+
+def _delay(latency_ms: float) -> float:
+    """Injected latency in seconds, with jitter"""
+    return max(0.0, latency_ms + random.uniform(-DEV_SERVER_JITTER_MS, DEV_SERVER_JITTER_MS)) / 1000
+
+
+def _inject(latency_ms: float) -> Optional[JSONResponse]:
+    """Sleep for the configured latency; returns a 503 response for injected failures"""
+    delay = _delay(latency_ms)
+    if delay:
+        time.sleep(delay)
+    return _injected_failure()
+
+
+def _injected_failure() -> Optional[JSONResponse]:
+    if random.random() < DEV_SERVER_FAILURE_RATE:
+        return JSONResponse({"error_code": "TEMPORARILY_UNAVAILABLE", "message": "Injected failure"}, status_code=503)
+    return None
+
+
+def _require_token(request: Request):
+    if not request.headers.get("authorization", "").startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+
+
+# --- Model endpoints -----------------------------------------------------------
+
+def _last_user_message(messages: List[Dict]) -> str:
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return str(content or "")
+    return ""
+
+
+def _chat_answer(messages: List[Dict], max_tokens: Optional[int]) -> str:
+    """Deterministic stand-in answer: the user's text (after the instruction line), shortened"""
+    text = _last_user_message(messages)
+    body = text.split("\n\n", 1)[-1].strip()
+    first_line = next((line.strip("# ").strip() for line in body.splitlines() if line.strip()), "")
+    limit = min(max_tokens or 256, 80)
+    return first_line[:limit] or "（dev server）"
+
+
+def _rag_answer(messages: List[Dict]) -> str:
+    """Keyword match over the Vector Search index snapshot, formatted like the RAG endpoint's markdown answer"""
+    question = _last_user_message(messages)
+    terms = [term for term in re.split(r'[\s、。,.?？!！]+', question) if len(term) >= 2][:5]
+    rows = vector_index.search(terms)
+    if not rows:
+        return "該当するデモは見つかりませんでした。"
+    lines = ["関連するデモは以下の通りです。", ""]
+    lines.extend(f"- **{title}** (Demo ID: {demo_id}): {summary} {demo_url}" for demo_id, title, summary, _, demo_url, _ in rows)
+    return "\n".join(lines)
+
+
+def _completion(model: str, content: str) -> Dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content), "total_tokens": len(content)},
+    }
+
+
+# --- App -----------------------------------------------------------------------
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="AI Demo Hub dev server")
+
+    # Plain (non-async) handlers run in the thread pool, so injected sleeps overlap like real latency
+    @app.post("/api/2.0/sql/statements")
+    def submit_statement(request: Request, payload: Dict):
+        _require_token(request)
+        failure = _injected_failure()
+        if failure:
+            return failure
+        started = time.monotonic()
+        cold_start = warehouse.cold_start_delay()
+        latency = _delay(DEV_SERVER_SQL_LATENCY_MS)
+        stored = warehouse.execute(payload.get("statement", ""))
+        stored["disposition"] = payload.get("disposition", "INLINE")
+        stored["base_url"] = str(request.base_url).rstrip("/")
+        stored["ready_at"] = started + cold_start + latency
+        stored["queued_ms"] = cold_start * 1000
+        stored["execution_ms"] += latency * 1000
+        delay = cold_start + latency
+        # Like the real API, a statement slower than wait_timeout is answered as PENDING and polled
+        # (with on_wait_timeout=CANCEL the caller would rather wait, so the full delay is slept)
+        wait = _wait_timeout_seconds(payload.get("wait_timeout"))
+        if payload.get("on_wait_timeout", "CONTINUE") == "CONTINUE" and delay > wait:
+            time.sleep(wait)
+            return dict(_statement_response(stored), status={"state": "PENDING"})
+        time.sleep(max(0.0, stored["ready_at"] - time.monotonic()))
+        return _statement_response(stored)
+
+    @app.get("/api/2.0/sql/statements/{statement_id}")
+    def get_statement(request: Request, statement_id: str):
+        _require_token(request)
+        stored = warehouse.get(statement_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail=f"Statement {statement_id} not found")
+        return _statement_response(stored)
+
+    @app.get("/api/2.0/sql/statements/{statement_id}/result/chunks/{chunk_index}")
+    def get_chunk(request: Request, statement_id: str, chunk_index: int):
+        _require_token(request)
+        stored = warehouse.get(statement_id)
+        if stored is None or stored["error"]:
+            raise HTTPException(status_code=404, detail=f"Statement {statement_id} not found")
+        failure = _inject(DEV_SERVER_SQL_LATENCY_MS / 4)
+        if failure:
+            return failure
+        return _chunk(stored, chunk_index)
+
+    @app.get("/external-results/{statement_id}/{chunk_index}")
+    def get_external_result(request: Request, statement_id: str, chunk_index: int):
+        """The rows of an EXTERNAL_LINKS chunk (a presigned URL: sending credentials is an error, as in cloud storage)"""
+        if request.headers.get("authorization"):
+            raise HTTPException(status_code=400, detail="Presigned URLs must be fetched without an Authorization header")
+        stored = warehouse.get(statement_id)
+        if stored is None or stored["error"]:
+            raise HTTPException(status_code=404, detail=f"Statement {statement_id} not found")
+        return _chunk_data(stored, chunk_index)
+
+    @app.get("/api/2.0/sql/history/queries")
+    def query_history(request: Request):
+        """Query history with metrics, filtered by filter_by.statement_ids (as the app looks up slow statements)"""
+        _require_token(request)
+        statement_ids = request.query_params.getlist("filter_by.statement_ids")
+        queries = []
+        for statement_id in statement_ids:
+            stored = warehouse.get(statement_id)
+            if stored is None:
+                continue
+            queued_ms = int(stored.get("queued_ms", 0))
+            execution_ms = int(stored["execution_ms"])
+            queue_start = stored["start_time_ms"]
+            queries.append({
+                "query_id": statement_id,
+                "status": "FAILED" if stored["error"] else "FINISHED",
+                "query_text": stored["statement"],
+                "query_start_time_ms": queue_start,
+                "query_end_time_ms": queue_start + queued_ms + execution_ms,
+                "duration": queued_ms + execution_ms,
+                "error_message": stored["error"],
+                "metrics": {
+                    "total_time_ms": queued_ms + execution_ms,
+                    "provisioning_queue_start_timestamp": queue_start if queued_ms else None,
+                    "query_compilation_start_timestamp": queue_start + queued_ms,
+                    "compilation_time_ms": 0,
+                    "execution_time_ms": execution_ms,
+                    "result_fetch_time_ms": 0,
+                    "rows_produced_count": len(stored["rows"]),
+                    "read_bytes": 0,
+                },
+            })
+        return {"res": queries, "has_next_page": False}
+
+    @app.post("/oidc/v1/token")
+    def mint_token():
+        failure = _inject(DEV_SERVER_LLM_LATENCY_MS / 10)
+        if failure:
+            return failure
+        return {"access_token": f"dev-{uuid.uuid4().hex}", "token_type": "Bearer", "expires_in": 3600, "scope": "all-apis"}
+
+    @app.get("/oidc/.well-known/oauth-authorization-server")
+    def oauth_metadata(request: Request):
+        base = str(request.base_url).rstrip("/")
+        return {"issuer": f"{base}/oidc", "token_endpoint": f"{base}/oidc/v1/token",
+                "authorization_endpoint": f"{base}/oidc/v1/authorize"}
+
+    @app.get("/api/2.0/vector-search/indexes/{index_name}")
+    def get_index(request: Request, index_name: str):
+        _require_token(request)
+        if index_name != vector_index.name:
+            raise HTTPException(status_code=404, detail=f"Index {index_name} does not exist")
+        return vector_index.status()
+
+    @app.post("/api/2.0/vector-search/indexes/{index_name}/sync")
+    def sync_index(request: Request, index_name: str):
+        _require_token(request)
+        if index_name != vector_index.name:
+            raise HTTPException(status_code=404, detail=f"Index {index_name} does not exist")
+        failure = _injected_failure()
+        if failure:
+            return failure
+        if not vector_index.trigger_sync():
+            return JSONResponse(status_code=409, content={"error_code": "RESOURCE_CONFLICT",
+                                                          "message": f"Index {index_name} is already syncing"})
+        return {}
+
+    @app.post("/serving-endpoints/chat/completions")
+    def chat_completions(request: Request, payload: Dict):
+        _require_token(request)
+        failure = _inject(DEV_SERVER_LLM_LATENCY_MS)
+        if failure:
+            return failure
+        return _completion(payload.get("model", "dev"), _chat_answer(payload.get("messages"), payload.get("max_tokens")))
+
+    @app.post("/serving-endpoints/{endpoint_name}/invocations")
+    def invoke_endpoint(request: Request, endpoint_name: str, payload: Dict):
+        _require_token(request)
+        failure = _inject(DEV_SERVER_LLM_LATENCY_MS)
+        if failure:
+            return failure
+        if "input" in payload:
+            # Agent (responses) format used by RAGClient
+            return {"output": [{"type": "message", "role": "assistant",
+                                "content": [{"type": "output_text", "text": _rag_answer(payload["input"])}]}]}
+        return _completion(endpoint_name, _chat_answer(payload.get("messages"), payload.get("max_tokens")))
+
+    return app
+
+
+def main():
+    global warehouse, vector_index
+    parser = argparse.ArgumentParser(description="Local stand-in for the Databricks endpoints used by AI Demo Hub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--db", default=DEV_SERVER_DB_PATH, help="SQLite file (:memory: for a throwaway database)")
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic demos into an empty table")
+    parser.add_argument("--vector-index", default="hiroshi.ai_demo_hub.demos_vs_gte", help="name of the Vector Search index")
+    args = parser.parse_args()
+
+    warehouse = DevWarehouse(args.db)
+    if args.seed:
+        warehouse.seed(args.seed)
+    vector_index = DevVectorIndex(args.vector_index)
+    vector_index.load()
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Workload classes for Gradio events
+each class (DB reads, DB writes, LLM generation, chat) gets its own
+concurrency limit, queue depth and priority so that slow AI work cannot
+starve interactive browsing
+"""
+
+import functools
+import inspect
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+from tracing import span
+
+
+class WorkloadRejected(Exception):
+    """Raised when a workload class queue is full or the wait timed out"""
+
+
+class WorkloadClass:
+    """Scheduling settings for one class of events (lower priority value runs first)"""
+
+    def __init__(self, name: str, concurrency_limit: int, max_queue: int, priority: int, max_wait_seconds: float):
+        prefix = f"WORKLOAD_{name.upper()}"
+        self.name = name
+        self.concurrency_limit = int(os.getenv(f"{prefix}_CONCURRENCY", concurrency_limit))
+        self.max_queue = int(os.getenv(f"{prefix}_QUEUE", max_queue))
+        self.priority = int(os.getenv(f"{prefix}_PRIORITY", priority))
+        self.max_wait_seconds = float(os.getenv(f"{prefix}_MAX_WAIT_SECONDS", max_wait_seconds))
+
+    @property
+    def admitted_limit(self) -> int:
+        """Events Gradio may hand to worker threads (running plus waiting in the scheduler)"""
+        return self.concurrency_limit + self.max_queue
+
+
+WORKLOAD_CLASSES: Dict[str, WorkloadClass] = {
+    "db_read": WorkloadClass("db_read", concurrency_limit=16, max_queue=32, priority=0, max_wait_seconds=30),
+    "db_write": WorkloadClass("db_write", concurrency_limit=4, max_queue=16, priority=1, max_wait_seconds=60),
+    "chat": WorkloadClass("chat", concurrency_limit=8, max_queue=16, priority=2, max_wait_seconds=60),
+    "llm": WorkloadClass("llm", concurrency_limit=2, max_queue=8, priority=3, max_wait_seconds=60),
+    "export": WorkloadClass("export", concurrency_limit=2, max_queue=4, priority=4, max_wait_seconds=120),
+}
+
+# Events of all classes share this many execution slots; when they are
+# exhausted the waiting event with the lowest priority value runs next
+TOTAL_WORKLOAD_SLOTS = int(os.getenv("WORKLOAD_TOTAL_SLOTS", "20"))
+
+
+class WorkloadScheduler:
+    """Priority admission with per-class concurrency limits and queue depths"""
+
+    def __init__(self, classes: Dict[str, WorkloadClass], total_slots: int):
+        self.classes = classes
+        self.total_slots = total_slots
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._running = {name: 0 for name in classes}
+        self._waiting: Dict[int, WorkloadClass] = {}
+
+    @property
+    def total_running(self) -> int:
+        return sum(self._running.values())
+
+    def queue_depth(self, name: str) -> int:
+        with self._condition:
+            return sum(1 for workload in self._waiting.values() if workload.name == name)
+
+    def running(self, name: str) -> int:
+        with self._condition:
+            return self._running[name]
+
+    def _next_runnable(self):
+        """Ticket of the waiting event that should run next, or None"""
+        if self.total_running >= self.total_slots:
+            return None
+        best = None
+        for ticket, workload in self._waiting.items():
+            if self._running[workload.name] >= workload.concurrency_limit:
+                continue
+            if best is None or (workload.priority, ticket) < (self._waiting[best].priority, best):
+                best = ticket
+        return best
+
+    def acquire(self, name: str):
+        """Block until an event of class name may run"""
+        workload = self.classes[name]
+        with self._condition:
+            if sum(1 for waiting in self._waiting.values() if waiting.name == name) >= workload.max_queue:
+                raise WorkloadRejected(f"{name} queue is full")
+
+            ticket = next(self._sequence)
+            self._waiting[ticket] = workload
+            deadline = time.monotonic() + workload.max_wait_seconds
+            try:
+                while self._next_runnable() != ticket:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise WorkloadRejected(f"{name} waited longer than {workload.max_wait_seconds:.0f}s")
+                    self._condition.wait(remaining)
+            finally:
+                del self._waiting[ticket]
+                # Another waiter may have become runnable (e.g. after a timeout)
+                self._condition.notify_all()
+            self._running[name] += 1
+
+    def release(self, name: str):
+        with self._condition:
+            self._running[name] -= 1
+            self._condition.notify_all()
+
+
+workload_scheduler = WorkloadScheduler(WORKLOAD_CLASSES, TOTAL_WORKLOAD_SLOTS)
+
+
+def run_as_workload(name: str, fn: Callable, on_rejected: Callable[[WorkloadRejected], None] = None) -> Callable:
+    """Wrap an event handler so that it runs under the scheduler of workload class name
+
+    on_rejected is called with the WorkloadRejected error when the event is not admitted
+    (e.g. to raise gr.Error); by default the error propagates.
+    """
+    def admit():
+        try:
+            with span("workload.acquire", workload=name):
+                workload_scheduler.acquire(name)
+        except WorkloadRejected as e:
+            print(f"Workload rejected: {str(e)}")
+            if on_rejected:
+                on_rejected(e)
+            raise
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            admit()
+            try:
+                yield from fn(*args, **kwargs)
+            finally:
+                workload_scheduler.release(name)
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        admit()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            workload_scheduler.release(name)
+    return wrapper
+
+
+def event_options(name: str) -> Dict:
+    """Gradio event listener arguments that give workload class name its own queue"""
+    return {
+        "concurrency_id": name,
+        "concurrency_limit": WORKLOAD_CLASSES[name].admitted_limit,
+    }
+
+
+def required_threads() -> int:
+    """Worker threads needed so that every admitted event can wait in the scheduler"""
+    return sum(workload.admitted_limit for workload in WORKLOAD_CLASSES.values()) + 8
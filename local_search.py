@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+"""
+In-process hybrid retrieval over the demos' all_info_md
+(BM25 inverted index with CJK character n-grams, optionally fused with
+locally computed embeddings) used for candidate retrieval without a network
+hop and as a fast fallback when the RAG endpoint is slow or unavailable,
+plus precomputed TF-IDF nearest neighbours for the "related demos" panel
+and a MinHash LSH index for near-duplicate warnings at registration
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+# Runs of CJK characters (kanji, hiragana, katakana) are split into bigrams,
+# everything else is split into lowercase words
+CJK_RUN_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff66-\uff9f]+')
+WORD_PATTERN = re.compile(r'[a-z0-9][a-z0-9_.+-]*')
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant
+RRF_K = 60
+
+# Katakana folds to hiragana so that "データ" and "でーた" match
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# Extra weight of the short fields, applied by repeating their terms
+FIELD_WEIGHTS = {"title": 3, "products": 2, "summary": 2}
+
+# Related demos: neighbours kept per demo, and the most distinctive terms of a
+# demo used to find candidates (instead of comparing with every demo)
+RELATED_TOP_K = 5
+RELATED_QUERY_TERMS = 25
+RELATED_CANDIDATES = 50
+# Terms in more than this fraction of the demos (template headings) do not select candidates
+RELATED_MAX_DF_RATIO = 0.5
+# Recompute all neighbours (with fresh IDF) when a sync changes more than this fraction
+RELATED_REBUILD_RATIO = 0.2
+
+# Near-duplicate detection: character shingles of title + description,
+# MinHash bins and LSH bands (42 bands of 3 bins find pairs with a Jaccard
+# similarity of 0.5 with a probability of about 99%)
+NEAR_DUPLICATE_SHINGLE_SIZE = 4
+MINHASH_BINS = 128
+LSH_ROWS_PER_BAND = 3
+# Added to a value borrowed by an empty bin per bin of distance (above any hash value)
+DENSIFY_OFFSET = 1 << 58
+# The description part of all_info_md (see generate_all_info_md)
+DESCRIPTION_SECTION = re.compile(r'^## 詳細説明\n(.*?)\n## リンク$', re.S | re.M)
+
+
+def normalize_text(text: str) -> str:
+    """NFKC (full/half width) normalization, lowercase and katakana-to-hiragana folding"""
+    if not text:
+        return ""
+    return unicodedata.normalize('NFKC', text).lower().translate(KATAKANA_TO_HIRAGANA)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into search terms (lowercase words and CJK bigrams)"""
+    if not text:
+        return []
+    text = normalize_text(text)
+    terms = WORD_PATTERN.findall(text)
+    for run in CJK_RUN_PATTERN.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def document_text(row: Dict) -> str:
+    """Body text indexed for a demo row"""
+    return row.get('all_info_md') or "\n".join(
+        str(row.get(column) or '') for column in ('title', 'summary', 'description_md')
+    )
+
+
+def duplicate_text(row: Dict) -> str:
+    """Title and description of a demo row (the description is cut out of all_info_md when needed)"""
+    description = row.get('description_md')
+    if description is None:
+        body = row.get('all_info_md') or ''
+        match = DESCRIPTION_SECTION.search(body)
+        description = match.group(1) if match else body
+    return f"{row.get('title') or ''}\n{description or ''}"
+
+
+def document_terms(row: Dict) -> List[str]:
+    """Terms of a demo row: the body plus weighted title, products and summary"""
+    terms = tokenize(document_text(row))
+    for field, weight in FIELD_WEIGHTS.items():
+        value = row.get(field)
+        if isinstance(value, list):
+            value = " ".join(str(item) for item in value)
+        # The body already contains each field once
+        terms.extend(tokenize(value or '') * (weight - 1))
+    return terms
+
+
+class BM25Index:
+    """Incrementally maintained BM25 inverted index"""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.doc_terms: Dict[int, Dict[str, int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, terms: Sequence[str]):
+        """Index a document, replacing any previous version"""
+        self.remove(doc_id)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        self.doc_terms[doc_id] = counts
+        self.doc_lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+
+    def remove(self, doc_id: int):
+        counts = self.doc_terms.pop(doc_id, None)
+        if counts is None:
+            return
+        for term in counts:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id, 0)
+
+    def search(self, terms: Iterable[str], limit: Optional[int] = 10, min_should_match: float = 0.0) -> List[tuple]:
+        """Return (score, doc_id) pairs for the query terms, best first
+
+        min_should_match is the fraction of distinct query terms a document must contain.
+        """
+        total = len(self.doc_lengths)
+        if total == 0:
+            return []
+        average_length = self.total_length / total or 1
+
+        query_terms = set(terms)
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for term in query_terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        required = math.ceil(len(query_terms) * min_should_match)
+        ranked = sorted(
+            ((score, doc_id) for doc_id, score in scores.items() if matched[doc_id] >= required),
+            key=lambda item: (-item[0], item[1])
+        )
+        return ranked if limit is None else ranked[:limit]
+
+
+class TfidfNeighbors:
+    """Top-k most similar documents per document by TF-IDF cosine, precomputed and updated incrementally
+
+    Candidates are the documents sharing a document's most distinctive terms
+    ("more like this"), so updating one document reads a few short posting
+    lists instead of comparing it with every document.
+    """
+
+    def __init__(self, k: int = RELATED_TOP_K, query_terms: int = RELATED_QUERY_TERMS,
+                 candidates: int = RELATED_CANDIDATES, max_df_ratio: float = RELATED_MAX_DF_RATIO,
+                 rebuild_ratio: float = RELATED_REBUILD_RATIO):
+        self.k = k
+        self.query_terms = query_terms
+        self.candidates = candidates
+        self.max_df_ratio = max_df_ratio
+        self.rebuild_ratio = rebuild_ratio
+        self.vectors: Dict[int, Dict[str, float]] = {}
+        self.weights: Dict[str, Dict[int, float]] = {}
+        self.neighbors: Dict[int, List[tuple]] = {}
+
+    def _set_vector(self, doc_id: int, bm25: BM25Index):
+        """(Re)compute the unit TF-IDF vector of doc_id from the BM25 term counts"""
+        self._drop_vector(doc_id)
+        total = len(bm25)
+        vector = {}
+        for term, count in bm25.doc_terms.get(doc_id, {}).items():
+            idf = math.log((1 + total) / (1 + len(bm25.postings.get(term, ())))) + 1
+            vector[term] = (1 + math.log(count)) * idf
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm == 0:
+            return
+        vector = {term: value / norm for term, value in vector.items()}
+        self.vectors[doc_id] = vector
+        for term, value in vector.items():
+            self.weights.setdefault(term, {})[doc_id] = value
+
+    def _drop_vector(self, doc_id: int):
+        for term in self.vectors.pop(doc_id, {}):
+            posting = self.weights.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.weights[term]
+
+    def _candidates(self, doc_id: int) -> List[tuple]:
+        """(cosine, doc_id) of the documents sharing doc_id's most distinctive terms, best first"""
+        vector = self.vectors.get(doc_id)
+        if not vector:
+            return []
+        max_df = max(2, self.max_df_ratio * len(self.vectors))
+        distinctive = sorted(((term, value) for term, value in vector.items() if len(self.weights[term]) <= max_df),
+                             key=lambda item: (-item[1], item[0]))[:self.query_terms]
+        partial: Dict[int, float] = {}
+        for term, value in distinctive:
+            for other_id, other_value in self.weights.get(term, {}).items():
+                if other_id != doc_id:
+                    partial[other_id] = partial.get(other_id, 0.0) + value * other_value
+        shortlist = sorted(partial, key=lambda other_id: (-partial[other_id], other_id))[:self.candidates]
+        scored = [(cosine(vector, self.vectors[other_id]), other_id) for other_id in shortlist]
+        return sorted(scored, key=lambda item: (-item[0], item[1]))
+
+    def _offer(self, doc_id: int, score: float, other_id: int):
+        """Insert other_id into doc_id's neighbours if it ranks in the top k"""
+        neighbors = self.neighbors.setdefault(doc_id, [])
+        if len(neighbors) >= self.k and (score, -other_id) <= (neighbors[-1][0], -neighbors[-1][1]):
+            return
+        neighbors.append((score, other_id))
+        neighbors.sort(key=lambda item: (-item[0], item[1]))
+        del neighbors[self.k:]
+
+    def rebuild(self, bm25: BM25Index):
+        """Recompute every vector and neighbour list"""
+        self.vectors, self.weights, self.neighbors = {}, {}, {}
+        for doc_id in bm25.doc_terms:
+            self._set_vector(doc_id, bm25)
+        for doc_id in self.vectors:
+            self.neighbors[doc_id] = self._candidates(doc_id)[:self.k]
+
+    def update(self, bm25: BM25Index, changed_ids: Iterable[int] = (), removed_ids: Iterable[int] = ()):
+        """Apply changed and removed documents (already applied to bm25)"""
+        changed = {doc_id for doc_id in changed_ids if doc_id in bm25.doc_terms}
+        gone = changed | set(removed_ids)
+        if not gone:
+            return
+        if not self.neighbors or len(gone) > self.rebuild_ratio * max(len(self.vectors), 1):
+            self.rebuild(bm25)
+            return
+
+        for doc_id in gone:
+            self._drop_vector(doc_id)
+            self.neighbors.pop(doc_id, None)
+        for doc_id in changed:
+            self._set_vector(doc_id, bm25)
+        # Lists that contained a changed or removed document are recomputed
+        stale = {doc_id for doc_id, neighbors in self.neighbors.items()
+                 if any(other_id in gone for _, other_id in neighbors)}
+        for doc_id in changed:
+            candidates = self._candidates(doc_id)
+            self.neighbors[doc_id] = candidates[:self.k]
+            for score, other_id in candidates:
+                if other_id not in stale:
+                    self._offer(other_id, score, doc_id)
+        for doc_id in stale - changed:
+            self.neighbors[doc_id] = self._candidates(doc_id)[:self.k]
+
+    def related(self, doc_id: int, limit: Optional[int] = None) -> List[tuple]:
+        """(cosine, doc_id) of the precomputed neighbours, best first"""
+        return list(self.neighbors.get(doc_id, [])[:limit or self.k])
+
+
+class NearDuplicateIndex:
+    """MinHash LSH over character shingles for near-duplicate lookups without comparing every document
+
+    One-permutation MinHash: each shingle is hashed once into one of `bins`
+    bins keeping the minimum per bin, and empty bins borrow the value of the
+    next non-empty bin. Documents sharing all bins of any band are candidates,
+    scored by the fraction of equal bins (the estimated Jaccard similarity).
+    """
+
+    def __init__(self, shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE, bins: int = MINHASH_BINS,
+                 rows_per_band: int = LSH_ROWS_PER_BAND):
+        self.shingle_size = shingle_size
+        self.bins = bins
+        self.rows_per_band = rows_per_band
+        self.bands = bins // rows_per_band
+        self.signatures: Dict[int, tuple] = {}
+        self.buckets: Dict[tuple, set] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> Optional[tuple]:
+        text = re.sub(r'\s+', ' ', normalize_text(text)).strip()
+        if not text:
+            return None
+        size = min(self.shingle_size, len(text))
+        minimums: List[Optional[int]] = [None] * self.bins
+        for i in range(len(text) - size + 1):
+            digest = hashlib.blake2b(text[i:i + size].encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            index, value = value % self.bins, value // self.bins
+            if minimums[index] is None or value < minimums[index]:
+                minimums[index] = value
+        signature = []
+        for index in range(self.bins):
+            value = minimums[index]
+            offset = 0
+            while value is None:
+                offset += 1
+                value = minimums[(index + offset) % self.bins]
+            signature.append(value + offset * DENSIFY_OFFSET)
+        return tuple(signature)
+
+    def _band_keys(self, signature: tuple) -> List[tuple]:
+        rows = self.rows_per_band
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, doc_id: int, text: str):
+        """Index a document, replacing any previous version"""
+        self.remove(doc_id)
+        signature = self.signature(text)
+        if signature is None:
+            return
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id: int):
+        signature = self.signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def query(self, text: str, threshold: float, limit: Optional[int] = None) -> List[tuple]:
+        """(estimated similarity, doc_id) of the documents at or above threshold, most similar first"""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self.buckets.get(key, set())
+        scored = []
+        for doc_id in candidates:
+            similarity = sum(a == b for a, b in zip(signature, self.signatures[doc_id])) / self.bins
+            if similarity >= threshold:
+                scored.append((similarity, doc_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored if limit is None else scored[:limit]
+
+
+class HashingEmbedder:
+    """Local embedding by feature-hashing character trigrams into a fixed-size unit vector"""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def __call__(self, text: str) -> Dict[int, float]:
+        text = re.sub(r'\s+', ' ', normalize_text(text))
+        vector: Dict[int, float] = {}
+        for i in range(max(0, len(text) - 2)):
+            digest = hashlib.blake2b(text[i:i + 3].encode('utf-8'), digest_size=4).digest()
+            bucket = int.from_bytes(digest, 'little')
+            index = bucket % self.dimensions
+            sign = 1.0 if bucket & 0x80000000 else -1.0
+            vector[index] = vector.get(index, 0.0) + sign
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm == 0:
+            return {}
+        return {index: value / norm for index, value in vector.items()}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Dot product of two sparse unit vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+class DemoSearchIndex:
+    """In-memory hybrid (BM25 + embedding) retrieval index over demo rows"""
+
+    def __init__(self, ttl_seconds: float = 300, embedder: Optional[Callable[[str], Dict[int, float]]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder
+        self.bm25 = BM25Index()
+        self.neighbors = TfidfNeighbors()
+        self.duplicates = NearDuplicateIndex()
+        self._documents: Dict[int, Dict] = {}
+        self._fingerprints: Dict[int, str] = {}
+        self._embeddings: Dict[int, Dict[int, float]] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+        self._refreshing = False
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def is_stale(self) -> bool:
+        """Check whether the index should be synchronized with the table"""
+        return not self._documents or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def invalidate(self):
+        """Force the next refresh, e.g. after a write to the demos table"""
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def fingerprint(row: Dict) -> str:
+        """Change marker for a row (updated_at when available, otherwise a content hash)"""
+        if row.get('updated_at'):
+            return str(row['updated_at'])
+        return hashlib.md5(document_text(row).encode('utf-8')).hexdigest()
+
+    def _add(self, row: Dict) -> Optional[int]:
+        """Index one demo row without updating the related-demo neighbours; returns its demo_id"""
+        try:
+            demo_id = int(row.get('demo_id'))
+        except (TypeError, ValueError):
+            return None
+        terms = document_terms(row)
+        embedding = self.embedder(document_text(row)) if self.embedder else None
+        with self._lock:
+            self.bm25.add(demo_id, terms)
+            self.duplicates.add(demo_id, duplicate_text(row))
+            self._documents[demo_id] = row
+            self._fingerprints[demo_id] = self.fingerprint(row)
+            if embedding is not None:
+                self._embeddings[demo_id] = embedding
+        return demo_id
+
+    def _remove(self, demo_id: int):
+        with self._lock:
+            self.bm25.remove(demo_id)
+            self.duplicates.remove(demo_id)
+            self._documents.pop(demo_id, None)
+            self._fingerprints.pop(demo_id, None)
+            self._embeddings.pop(demo_id, None)
+
+    def upsert(self, row: Dict):
+        """Index or re-index one demo row"""
+        with self._lock:
+            demo_id = self._add(row)
+            if demo_id is not None:
+                self.neighbors.update(self.bm25, changed_ids=[demo_id])
+
+    def remove(self, demo_id: int):
+        with self._lock:
+            self._remove(demo_id)
+            self.neighbors.update(self.bm25, removed_ids=[demo_id])
+
+    def changed_ids(self, versions: List[Dict]) -> tuple:
+        """Compare (demo_id, updated_at) rows with the index; returns (changed ids, removed ids)"""
+        current = {}
+        for row in versions:
+            try:
+                current[int(row.get('demo_id'))] = str(row.get('updated_at') or '')
+            except (TypeError, ValueError):
+                continue
+        with self._lock:
+            changed = [demo_id for demo_id, version in current.items()
+                       if not version or self._fingerprints.get(demo_id) != version]
+            removed = [demo_id for demo_id in self._documents if demo_id not in current]
+        return changed, removed
+
+    def sync(self, rows: List[Dict], removed_ids: Iterable[int] = ()):
+        """Apply changed rows and deletions incrementally"""
+        changed = [self._add(row) for row in rows]
+        removed_ids = list(removed_ids)
+        for demo_id in removed_ids:
+            self._remove(demo_id)
+        with self._lock:
+            self.neighbors.update(self.bm25, [demo_id for demo_id in changed if demo_id is not None], removed_ids)
+        self._loaded_at = time.monotonic()
+
+    def load(self, rows: List[Dict]):
+        """Replace the index contents with the given demo rows"""
+        new_ids = set()
+        for row in rows:
+            try:
+                new_ids.add(int(row.get('demo_id')))
+            except (TypeError, ValueError):
+                continue
+        self.sync(rows, [demo_id for demo_id in list(self._documents) if demo_id not in new_ids])
+
+    def refresh(self, loader: Callable[[], List[Dict]]) -> bool:
+        """Reload the index from loader, keeping the old contents on failure"""
+        try:
+            rows = loader()
+        except Exception as e:
+            print(f"Warning: Failed to refresh local search index: {str(e)}")
+            return False
+        if not rows:
+            return False
+        self.load(rows)
+        return True
+
+    def refresh_incremental(self, version_loader: Callable[[], List[Dict]],
+                            rows_loader: Callable[[List[int]], List[Dict]]) -> bool:
+        """Fetch only rows whose updated_at changed since the last sync"""
+        try:
+            versions = version_loader()
+            if not versions and len(self) > 0:
+                # An empty answer is more likely a failed query than an empty table
+                return False
+            changed, removed = self.changed_ids(versions)
+            rows = rows_loader(changed) if changed else []
+        except Exception as e:
+            print(f"Warning: Failed to refresh local search index: {str(e)}")
+            return False
+        self.sync(rows, removed)
+        return True
+
+    def refresh_in_background(self, refresh: Callable[[], bool]):
+        """Run refresh in a daemon thread if the index is stale"""
+        with self._lock:
+            if self._refreshing or not self.is_stale():
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="local-search-refresh", daemon=True).start()
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """Return the best matching demo rows for query, best first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            candidate_count = max(limit * 4, 20)
+            lexical = self.bm25.search(terms, candidate_count)
+            rankings = [[doc_id for _, doc_id in lexical]]
+
+            if self.embedder and self._embeddings and lexical:
+                # The embeddings only re-rank the BM25 candidates: hashed trigrams of unrelated
+                # texts still have a small positive cosine by chance, which must not make a hit
+                query_vector = self.embedder(query)
+                semantic = sorted(
+                    ((cosine(query_vector, self._embeddings[doc_id]), doc_id)
+                     for _, doc_id in lexical if doc_id in self._embeddings),
+                    key=lambda item: (-item[0], item[1])
+                )
+                rankings.append([doc_id for _, doc_id in semantic])
+
+            # Reciprocal rank fusion of the lexical and semantic rankings
+            fused: Dict[int, float] = {}
+            for ranking in rankings:
+                for rank, doc_id in enumerate(ranking, 1):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank)
+
+            ranked = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+            return [self._documents[doc_id] for doc_id, _ in ranked[:limit] if doc_id in self._documents]
+
+    def search_page(self, query: str, page: int = 1, page_size: int = 10,
+                    row_filter: Optional[Callable[[Dict], bool]] = None,
+                    min_should_match: float = 0.6) -> tuple:
+        """Keyword search for the search box; returns (rows of the page, total hits)
+
+        Ranked by BM25 only so that hits are deterministic, and documents must
+        contain most of the query terms.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+
+        with self._lock:
+            ranked = self.bm25.search(terms, None, min_should_match)
+            hits = [self._documents[doc_id] for _, doc_id in ranked]
+        if row_filter:
+            hits = [row for row in hits if row_filter(row)]
+
+        page = max(1, page)
+        start = (page - 1) * page_size
+        return hits[start:start + page_size], len(hits)
+
+    def related(self, demo_id: int, limit: int = RELATED_TOP_K) -> List[Dict]:
+        """The demo rows most similar to demo_id (precomputed, no query), best first"""
+        with self._lock:
+            return [self._documents[other_id] for _, other_id in self.neighbors.related(int(demo_id), limit)
+                    if other_id in self._documents]
+
+    def near_duplicates(self, title: str, description: str, threshold: float, limit: int = 3) -> List[tuple]:
+        """(estimated similarity, demo row) of indexed demos whose title + description nearly match, most similar first"""
+        text = duplicate_text({"title": title, "description_md": description})
+        with self._lock:
+            return [(similarity, self._documents[demo_id])
+                    for similarity, demo_id in self.duplicates.query(text, threshold, limit)
+                    if demo_id in self._documents]
+
+
+def format_candidates(results: List[Dict]) -> str:
+    """Format search results as a Markdown list of candidate demos"""
+    lines = []
+    for i, row in enumerate(results, 1):
+        title = row.get('title') or 'タイトル未設定'
+        lines.append(f"{i}. **{title}** (Demo ID: {row.get('demo_id')})")
+        if row.get('summary'):
+            lines.append(f"    - {row['summary']}")
+        if row.get('demo_url'):
+            lines.append(f"    - デモURL: {row['demo_url']}")
+    return "\n".join(lines)
+
+
+def format_fallback_answer(query: str, results: List[Dict], reason: Optional[str] = None,
+                           index_ready: bool = True) -> str:
+    """Format local search results as a Markdown answer clearly marked as a fallback"""
+    notice = "⚠️ **AIアシスタントから時間内に応答を得られなかったため、ローカルのキーワード検索結果を表示しています。**"
+    if reason:
+        notice += f"\n\n_({reason})_"
+
+    if not index_ready:
+        return f"{notice}\n\nローカル検索インデックスを準備中です。しばらくしてからもう一度お試しください。"
+
+    if not results:
+        return f"{notice}\n\n「{query}」に一致するデモは見つかりませんでした。キーワードを変えてお試しください。"
+
+    return "\n".join([notice, "", f"「{query}」に関連しそうなデモ:", "", format_candidates(results)])
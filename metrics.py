@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Operational metrics in the Prometheus text exposition format
+(latency histograms per handler, SQL statement class and LLM operation,
+warehouse errors, token mints, in-flight requests, queue depth, chat
+sessions and cache hit ratios), served at /metrics next to the Gradio app
+"""
+
+import functools
+import inspect
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from event_workloads import WORKLOAD_CLASSES, workload_scheduler
+
+# Opt-in: serving /metrics replaces interface.launch() with uvicorn, and /metrics and
+# /statements are not behind the app's authentication
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+# Seconds; covers cached reads (ms) up to slow LLM calls (a minute)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bytes; a narrow single-row read (hundreds) up to a large result chunk (MBs)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+STATEMENT_PATTERN = re.compile(r'^\s*(\w+)', re.IGNORECASE)
+TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([\w.`]+)', re.IGNORECASE)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """Base class; values are kept per label tuple"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.metric_type}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(Metric):
+    """A gauge set directly, or computed at scrape time by function (returning {label tuple: value})"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.function:
+            items = list(self.function().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {bucket_count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+HANDLER_LATENCY = Histogram("demo_hub_handler_latency_seconds", "Gradio event handler latency", ["handler", "workload"])
+SQL_LATENCY = Histogram("demo_hub_sql_latency_seconds", "Statement API call latency by statement class", ["statement_class"])
+SQL_RESPONSE_BYTES = Histogram("demo_hub_sql_response_bytes", "Statement API response size by named query (or statement class)", ["query"], buckets=BYTE_BUCKETS)
+LLM_LATENCY = Histogram("demo_hub_llm_latency_seconds", "LLM and RAG request latency by operation", ["operation"])
+WAREHOUSE_ERRORS = Counter("demo_hub_warehouse_errors_total", "Failed Statement API calls by status", ["status"])
+TOKEN_MINTS = Counter("demo_hub_token_mints_total", "OAuth tokens minted", ["kind"])
+IN_FLIGHT = Gauge("demo_hub_in_flight_requests", "Handlers currently running or waiting for a slot", ["workload"])
+CHAT_SESSIONS_STARTED = Counter("demo_hub_chat_sessions_started_total", "Chat sessions started")
+CACHE_REQUESTS = Counter("demo_hub_cache_requests_total", "Cache lookups by cache and result (hit / miss)", ["cache", "result"])
+VECTOR_SEARCH_SYNCS = Counter("demo_hub_vector_search_syncs_total", "Vector Search index syncs by result (triggered / completed / failed / error)", ["result"])
+
+# Conversation memories are held by gr.State, so live ones are the open chat sessions
+_chat_sessions = weakref.WeakSet()
+CHAT_SESSIONS = Gauge("demo_hub_chat_sessions", "Open chat sessions", function=lambda: {(): len(_chat_sessions)})
+
+
+QUEUE_DEPTH = Gauge(
+    "demo_hub_queue_depth", "Events waiting in the workload scheduler", ["workload"],
+    function=lambda: {(name,): workload_scheduler.queue_depth(name) for name in WORKLOAD_CLASSES}
+)
+
+
+def track_chat_session(memory):
+    CHAT_SESSIONS_STARTED.inc()
+    _chat_sessions.add(memory)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def statement_class(query: str) -> str:
+    """Coarse statement shape, e.g. "SELECT demos", "SELECT demos aggregate", "UPDATE demos" """
+    verb_match = STATEMENT_PATTERN.match(query or "")
+    verb = verb_match.group(1).upper() if verb_match else "UNKNOWN"
+    table_match = TABLE_PATTERN.search(query or "")
+    table = table_match.group(1).strip("`").split(".")[-1] if table_match else ""
+    shape = f"{verb} {table}".strip()
+    if verb == "SELECT" and re.search(r'\bCOUNT\s*\(|\bGROUP\s+BY\b', query, re.IGNORECASE):
+        shape += " aggregate"
+    return shape
+
+
+def _timed(histogram: Histogram, before: Callable = None, after: Callable = None, **labels) -> Callable:
+    """Decorator observing the duration of a call (generators until they are exhausted)"""
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                if before:
+                    before()
+                try:
+                    yield from fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, **labels)
+                    if after:
+                        after()
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            if before:
+                before()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+                if after:
+                    after()
+        return wrapper
+    return decorator
+
+
+def timed_handler(handler: str, workload: str) -> Callable:
+    """Latency histogram and in-flight gauge for a Gradio handler"""
+    return _timed(
+        HANDLER_LATENCY,
+        before=lambda: IN_FLIGHT.inc(workload=workload),
+        after=lambda: IN_FLIGHT.dec(workload=workload),
+        handler=handler, workload=workload
+    )
+
+
+def timed_llm(operation: str) -> Callable:
+    return _timed(LLM_LATENCY, operation=operation)
+
+
+def timed_sql(fn: Callable) -> Callable:
+    """Latency histogram for a method taking the statement as its first argument"""
+    @functools.wraps(fn)
+    def wrapper(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(self, query, *args, **kwargs)
+        finally:
+            SQL_LATENCY.observe(time.perf_counter() - started, statement_class=statement_class(query))
+    return wrapper
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text format"""
+    return "".join(metric.render() for metric in REGISTRY)
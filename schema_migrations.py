@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the demos table (replaces the table cells of Create Table.ipynb)
+
+Each migration has a version, a name and its statements per SQL dialect:
+
+    databricks  Delta table on a SQL warehouse (or spark.sql in a notebook)
+    sqlite      the local stand-ins (sqlite backend and dev_server.py)
+
+Applied versions are recorded in hiroshi.ai_demo_hub.schema_migrations with a
+checksum of their statements, so `status` shows what is pending and whether an
+applied migration was edited afterwards. Statements run one at a time; a
+migration is recorded only after all of its statements succeeded. A statement
+may be a Step that is skipped when the table state shows it already ran, so a
+migration that stopped partway is resumed by running `migrate` again.
+
+Usage:
+    python schema_migrations.py status
+    python schema_migrations.py migrate [--target 2] [--dry-run]
+    python schema_migrations.py migrate --dialect sqlite   # against dev_server.py
+
+In a notebook (run through spark instead of the Statement API):
+    from schema_migrations import migrate
+    migrate(lambda statement: [row.asDict() for row in spark.sql(statement).collect()], "databricks")
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pytz
+
+from sqlite_database_manager import SCHEMA as SQLITE_SCHEMA
+
+JST = pytz.timezone('Asia/Tokyo')
+DIALECTS = ("databricks", "sqlite")
+MIGRATIONS_TABLE = "hiroshi.ai_demo_hub.schema_migrations"
+
+# Bootstrap of the history table itself (idempotent, run before every status/migrate)
+BOOTSTRAP = {
+    "databricks": [
+        "CREATE CATALOG IF NOT EXISTS hiroshi",
+        "CREATE SCHEMA IF NOT EXISTS hiroshi.ai_demo_hub",
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} "
+        "(version INT NOT NULL, name STRING NOT NULL, checksum STRING NOT NULL, applied_at TIMESTAMP NOT NULL)",
+    ],
+    "sqlite": [
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} "
+        "(version INT NOT NULL, name STRING NOT NULL, checksum STRING NOT NULL, applied_at TIMESTAMP NOT NULL)",
+    ],
+}
+
+# Columns of the Delta table (shared by the initial table and its clustered rebuild)
+DEMOS_COLUMNS = """
+  demo_id BIGINT GENERATED BY DEFAULT AS IDENTITY COMMENT '自動採番 ID',
+  title STRING NOT NULL COMMENT 'デモのタイトル',
+  summary STRING COMMENT 'カード表示用の要約',
+  description_md STRING COMMENT '詳細説明 (Markdown)',
+  creator_emp_id STRING COMMENT 'デモの作成者の社員ID',
+  owner_emp_id STRING NOT NULL COMMENT '代表投稿者の社員ID',
+  created_at TIMESTAMP NOT NULL DEFAULT current_timestamp() COMMENT '登録日時',
+  updated_at TIMESTAMP COMMENT '最終編集日時',
+  status STRING NOT NULL COMMENT 'draft / in_review / published / archived',
+  demo_url STRING NOT NULL COMMENT '実デモ URL',
+  repo_url STRING COMMENT 'ソースコードリポジトリ',
+  products ARRAY<STRING> NOT NULL COMMENT '利用製品名の配列',
+  confidentiality STRING COMMENT 'public / internal',
+  remarks STRING COMMENT '備考',
+  all_info_md STRING COMMENT 'すべての情報をマークダウン形式で記述'"""
+
+COLUMN_NAMES = (
+    "demo_id, title, summary, description_md, creator_emp_id, owner_emp_id, created_at, updated_at, "
+    "status, demo_url, repo_url, products, confidentiality, remarks, all_info_md"
+)
+
+DEMOS_PROPERTIES = """
+  delta.feature.allowColumnDefaults = 'supported',
+  delta.feature.identityColumns = 'supported',
+  delta.columnMapping.mode = 'name',
+  delta.enableChangeDataFeed = true,
+  delta.logRetentionDuration = 'interval 30 days'"""
+
+
+def check_constraints(table: str) -> List[str]:
+    """(Re)create the CHECK constraints of table; dropping first makes this idempotent"""
+    return [
+        f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS status_chk",
+        f"ALTER TABLE {table} ADD CONSTRAINT status_chk CHECK (status IN ('draft','in_review','published','archived'))",
+        f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS conf_chk",
+        f"ALTER TABLE {table} ADD CONSTRAINT conf_chk CHECK (confidentiality IN ('public','internal'))",
+    ]
+
+
+def table_exists(table: str) -> str:
+    """Query returning a row if table (in hiroshi.ai_demo_hub) exists"""
+    return (f"SELECT 1 FROM hiroshi.information_schema.tables "
+            f"WHERE table_schema = 'ai_demo_hub' AND table_name = '{table}'")
+
+
+def table_missing(table: str) -> str:
+    """Query returning a row if table (in hiroshi.ai_demo_hub) does not exist"""
+    return (f"SELECT COUNT(*) AS tables FROM hiroshi.information_schema.tables "
+            f"WHERE table_schema = 'ai_demo_hub' AND table_name = '{table}' HAVING COUNT(*) = 0")
+
+
+class Step:
+    """A statement that is skipped when one of its skip_if queries returns a row (checked in order)"""
+
+    def __init__(self, statement: str, skip_if: Optional[List[str]] = None):
+        self.statement = statement
+        self.skip_if = skip_if or []
+
+    def __str__(self) -> str:
+        return self.statement
+
+
+class Migration:
+    """One schema version: statements per dialect and optional notes (per dialect) shown after applying it"""
+
+    def __init__(self, version: int, name: str, statements: Dict[str, List[str]], notes: Optional[Dict[str, str]] = None):
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.notes = notes or {}
+
+    def checksum(self, dialect: str) -> str:
+        return hashlib.sha256("\n;\n".join(str(statement) for statement in self.statements[dialect]).encode("utf-8")).hexdigest()[:16]
+
+
+MIGRATIONS = [
+    # The table as the notebook created it (partitioned by status)
+    Migration(1, "initial_schema", {
+        "databricks": [
+            f"""CREATE TABLE IF NOT EXISTS hiroshi.ai_demo_hub.demos ({DEMOS_COLUMNS},
+  CONSTRAINT demos_pk PRIMARY KEY (demo_id)
+)
+USING DELTA
+PARTITIONED BY (status)
+TBLPROPERTIES ({DEMOS_PROPERTIES}
+)
+COMMENT '社内 AI デモのメタデータカタログ'""",
+            *check_constraints("hiroshi.ai_demo_hub.demos"),
+        ],
+        "sqlite": [SQLITE_SCHEMA.strip()],
+    }),
+    # The hot reads are the newest page across all statuses (ORDER BY created_at DESC LIMIT 10)
+    # and point lookups by demo_id; a handful of status partitions helps neither. Partitioning
+    # cannot be altered in place, so the table is rebuilt with liquid clustering and swapped in.
+    # Stats are collected only for the filter/sort columns (not the long Markdown columns), and
+    # deletion vectors keep single-row UPDATE/DELETE from rewriting whole files.
+    # demos stays in place until the copy is validated; every step before the swap is skipped
+    # once the backup exists, so a rerun after a failure continues where it stopped.
+    Migration(2, "liquid_clustering", {
+        "databricks": [
+            Step(f"""CREATE TABLE IF NOT EXISTS hiroshi.ai_demo_hub.demos_clustered ({DEMOS_COLUMNS},
+  CONSTRAINT demos_id_pk PRIMARY KEY (demo_id)
+)
+USING DELTA
+CLUSTER BY (created_at, demo_id)
+TBLPROPERTIES ({DEMOS_PROPERTIES},
+  delta.enableDeletionVectors = true,
+  delta.dataSkippingStatsColumns = 'demo_id,created_at,updated_at,status,owner_emp_id,confidentiality'
+)
+COMMENT '社内 AI デモのメタデータカタログ'""", skip_if=[table_exists("demos_partitioned_backup")]),
+            # One INSERT is one Delta commit: the copy is either complete or absent
+            Step(f"INSERT INTO hiroshi.ai_demo_hub.demos_clustered ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM hiroshi.ai_demo_hub.demos",
+                 skip_if=[table_exists("demos_partitioned_backup"),
+                          "SELECT 1 FROM hiroshi.ai_demo_hub.demos_clustered LIMIT 1"]),
+            # New demos must continue after the copied IDs
+            Step("ALTER TABLE hiroshi.ai_demo_hub.demos_clustered ALTER COLUMN demo_id SYNC IDENTITY",
+                 skip_if=[table_exists("demos_partitioned_backup")]),
+            *(Step(statement, skip_if=[table_exists("demos_partitioned_backup")])
+              for statement in check_constraints("hiroshi.ai_demo_hub.demos_clustered")),
+            # Fails (and stops the migration before the swap) unless the copy has every row
+            Step("SELECT assert_true((SELECT COUNT(*) FROM hiroshi.ai_demo_hub.demos_clustered) = "
+                 "(SELECT COUNT(*) FROM hiroshi.ai_demo_hub.demos), 'demos_clustered does not match demos')",
+                 skip_if=[table_exists("demos_partitioned_backup")]),
+            Step("ALTER TABLE hiroshi.ai_demo_hub.demos RENAME TO hiroshi.ai_demo_hub.demos_partitioned_backup",
+                 skip_if=[table_exists("demos_partitioned_backup")]),
+            Step("ALTER TABLE hiroshi.ai_demo_hub.demos_clustered RENAME TO hiroshi.ai_demo_hub.demos",
+                 skip_if=[table_missing("demos_clustered")]),
+            "OPTIMIZE hiroshi.ai_demo_hub.demos",
+        ],
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS demos_created_at ON hiroshi.ai_demo_hub.demos (created_at, demo_id)",
+        ],
+    }, notes={"databricks": (
+        "Writes made while the table was copied are not in the new table: run with the app stopped. "
+        "The Vector Search index syncs from the table's change feed; run a full sync (or recreate it). "
+        "The old table is kept as demos_partitioned_backup; drop it once the app works. "
+        "If the migration stops partway, fix the cause and run migrate again: it resumes from the table state "
+        "(if it stopped between the two renames, demos is missing until the rerun finishes the swap)."
+    )}),
+]
+
+
+def ensure_history(execute: Callable[[str], List[Dict]], dialect: str):
+    for statement in BOOTSTRAP[dialect]:
+        execute(statement)
+
+
+def applied_migrations(execute: Callable[[str], List[Dict]]) -> Dict[int, Dict]:
+    """{version: {name, checksum, applied_at}} from the history table"""
+    rows = execute(f"SELECT version, name, checksum, applied_at FROM {MIGRATIONS_TABLE} ORDER BY version")
+    return {int(row["version"]): row for row in rows}
+
+
+def migration_status(execute: Callable[[str], List[Dict]], dialect: str) -> List[Dict]:
+    """State of every known migration: applied, pending or changed (applied with other statements)"""
+    ensure_history(execute, dialect)
+    applied = applied_migrations(execute)
+    status = []
+    for migration in MIGRATIONS:
+        row = applied.get(migration.version)
+        if row is None:
+            state = "pending"
+        elif row["checksum"] != migration.checksum(dialect):
+            state = "changed"
+        else:
+            state = "applied"
+        status.append({"version": migration.version, "name": migration.name, "state": state,
+                       "applied_at": row["applied_at"] if row else None})
+    return status
+
+
+def migrate(execute: Callable[[str], List[Dict]], dialect: str, target: Optional[int] = None,
+            dry_run: bool = False) -> List[int]:
+    """Apply the pending migrations up to target (default: latest) in version order; returns the applied versions"""
+    if dialect not in DIALECTS:
+        raise ValueError(f"Unknown dialect '{dialect}' (expected one of: {', '.join(DIALECTS)})")
+    if dry_run:
+        # Nothing is created in a dry run; without a history table every migration is pending
+        try:
+            applied = applied_migrations(execute)
+        except Exception:
+            applied = {}
+    else:
+        ensure_history(execute, dialect)
+        applied = applied_migrations(execute)
+    done = []
+    for migration in MIGRATIONS:
+        if migration.version in applied or (target is not None and migration.version > target):
+            continue
+        print(f"{'[dry run] ' if dry_run else ''}Applying {migration.version}_{migration.name} ({dialect})")
+        for statement in migration.statements[dialect]:
+            print(f"  {' '.join(str(statement).split())[:100]}")
+            if dry_run:
+                continue
+            if isinstance(statement, Step):
+                if any(execute(query) for query in statement.skip_if):
+                    print("    (already done, skipped)")
+                    continue
+                statement = statement.statement
+            execute(statement)
+        if dry_run:
+            continue
+        applied_at = datetime.now(JST).strftime('%Y-%m-%d %H:%M:%S')
+        execute(
+            f"INSERT INTO {MIGRATIONS_TABLE} (version, name, checksum, applied_at) "
+            f"VALUES ({migration.version}, '{migration.name}', '{migration.checksum(dialect)}', '{applied_at}')"
+        )
+        done.append(migration.version)
+        if migration.notes.get(dialect):
+            print(f"  Note: {migration.notes[dialect]}")
+    return done
+
+
+def repository_executor(repository) -> Callable[[str], List[Dict]]:
+    """Run statements through a DemoRepository, raising on failure"""
+    def execute(statement: str) -> List[Dict]:
+        return [dict(zip(columns, row)) for columns, rows in repository.iter_query_chunks(statement) for row in rows]
+    return execute
+
+
+def default_dialect(backend: str) -> str:
+    """sqlite for the embedded backend and dev_server.py on this machine, databricks otherwise"""
+    # The Statement API host (as in APIBasedDatabaseManager)
+    host = os.getenv("DATABRICKS_SERVER_HOSTNAME", "")
+    if backend == "sqlite" or any(local in host for local in ("://127.0.0.1", "://localhost")):
+        return "sqlite"
+    return "databricks"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from demo_repository import DEMO_REPOSITORY_BACKEND, create_demo_repository
+
+    parser = argparse.ArgumentParser(description="Show or apply the schema migrations of the demos table")
+    parser.add_argument("command", choices=["status", "migrate"])
+    parser.add_argument("--backend", default=DEMO_REPOSITORY_BACKEND, help="repository backend (rest, connector, sqlite)")
+    parser.add_argument("--dialect", choices=DIALECTS, help="SQL dialect (default: sqlite for local stand-ins)")
+    parser.add_argument("--target", type=int, help="apply migrations up to this version")
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    args = parser.parse_args()
+
+    dialect = args.dialect or default_dialect(args.backend)
+    execute = repository_executor(create_demo_repository(backend=args.backend))
+    if args.command == "status":
+        for item in migration_status(execute, dialect):
+            print(f"{item['version']:>4}  {item['name']:<24} {item['state']:<8} {item['applied_at'] or ''}")
+    else:
+        versions = migrate(execute, dialect, target=args.target, dry_run=args.dry_run)
+        if not args.dry_run:
+            print(f"✅ Applied {len(versions)} migration(s)" if versions else "✅ Schema is up to date")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite backend of the demo repository (DEMO_REPOSITORY_BACKEND=sqlite)
+runs the same Databricks SQL as the REST backend, translated to SQLite, against a
+local file; for development without a warehouse and for benchmarks. The SQL
+translation and the schema are shared with dev_server.py.
+"""
+
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from api_database_manager import APIBasedDatabaseManager
+from demo_repository import statement_value
+from metrics import timed_sql
+from statement_log import record_statement
+from tracing import set_attribute, traced
+
+SQLITE_DATABASE_PATH = os.getenv("SQLITE_DATABASE_PATH", "demo_hub.db")
+# Synthetic demos inserted when the database is opened with an empty table (0: none)
+SQLITE_SEED_DEMOS = int(os.getenv("SQLITE_SEED_DEMOS", "0"))
+# Rows per chunk yielded by iter_query_chunks (like the Statement API's result chunks)
+SQLITE_CHUNK_ROWS = 1000
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS demos (
+    demo_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    summary TEXT,
+    description_md TEXT NOT NULL,
+    owner_emp_id TEXT NOT NULL,
+    creator_emp_id TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    status TEXT NOT NULL,
+    demo_url TEXT NOT NULL,
+    repo_url TEXT,
+    products TEXT,
+    confidentiality TEXT,
+    remarks TEXT,
+    all_info_md TEXT
+)
+"""
+
+SEED_PRODUCTS = ["Unity Catalog", "Mosaic AI", "Vector Search", "Model Serving", "Delta Lake", "Databricks SQL", "Genie", "Lakeflow"]
+SEED_TOPICS = ["チャットボット", "需要予測", "文書検索", "画像分類", "異常検知", "議事録要約", "コード生成", "レコメンド"]
+SEED_OWNERS = [f"user{number:02d}@example.com" for number in range(1, 21)]
+
+
+# --- Databricks SQL -> SQLite -------------------------------------------------
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+THREE_PART_NAME = re.compile(r'\b[A-Za-z_]\w*\.[A-Za-z_]\w*\.([A-Za-z_]\w*)\b')
+EXPLODE_PATTERN = re.compile(
+    r'\bFROM\s+(\w+)\s+LATERAL\s+VIEW\s+explode\s*\(\s*(\w+)\s*\)\s+(\w+)\s+AS\s+(\w+)', re.IGNORECASE
+)
+CAST_STRING_PATTERN = re.compile(r'\bAS\s+STRING\b', re.IGNORECASE)
+FUNCTION_PATTERN = re.compile(r'\b(array_contains|array|concat)\s*\(', re.IGNORECASE)
+
+
+def _outside_strings(sql: str, rewrite) -> str:
+    """Apply rewrite to the parts of sql that are not string literals"""
+    parts = []
+    position = 0
+    for match in STRING_LITERAL.finditer(sql):
+        parts.append(rewrite(sql[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(rewrite(sql[position:]))
+    return "".join(parts)
+
+
+def _split_call(sql: str, start: int) -> Tuple[List[str], int]:
+    """Arguments of the call whose "(" is at start, and the index after its ")" """
+    args = []
+    depth = 0
+    current = start + 1
+    index = start + 1
+    while index < len(sql):
+        char = sql[index]
+        if char == "'":
+            literal = STRING_LITERAL.match(sql, index)
+            if literal is None:
+                raise ValueError("unterminated string literal")
+            index = literal.end()
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            if depth == 0:
+                args.append(sql[current:index])
+                return [arg.strip() for arg in args if arg.strip()], index + 1
+            depth -= 1
+        elif char == "," and depth == 0:
+            args.append(sql[current:index])
+            current = index + 1
+        index += 1
+    raise ValueError("unbalanced parentheses")
+
+
+def _rewrite_functions(sql: str) -> str:
+    """array(...), array_contains(col, v) and concat(...) in SQLite (json1) form"""
+    output = []
+    position = 0
+    while True:
+        # Function names inside string literals are data, so search only outside them
+        literals = [literal.span() for literal in STRING_LITERAL.finditer(sql)]
+        match = None
+        for candidate in FUNCTION_PATTERN.finditer(sql, position):
+            if not any(start < candidate.start() < end for start, end in literals):
+                match = candidate
+                break
+        if match is None:
+            output.append(sql[position:])
+            return "".join(output)
+
+        output.append(sql[position:match.start()])
+        args, end = _split_call(sql, match.end() - 1)
+        args = [_rewrite_functions(arg) for arg in args]
+        name = match.group(1).lower()
+        if name == "array":
+            output.append(f"json_array({', '.join(args)})")
+        elif name == "array_contains":
+            output.append(f"EXISTS (SELECT 1 FROM json_each({args[0]}) WHERE json_each.value = {args[1]})")
+        else:
+            output.append("(" + " || ".join(args) + ")")
+        position = end
+
+
+def translate_sql(statement: str) -> str:
+    """Translate the Databricks SQL the app sends into SQLite (ValueError on malformed SQL)"""
+    if "'" in STRING_LITERAL.sub("", statement):
+        raise ValueError("unterminated string literal")
+
+    def rewrite(segment: str) -> str:
+        segment = THREE_PART_NAME.sub(r'\1', segment)
+        segment = EXPLODE_PATTERN.sub(
+            r'FROM (SELECT \3.value AS \4 FROM \1, json_each(\1.\2) AS \3)', segment
+        )
+        return CAST_STRING_PATTERN.sub("AS TEXT", segment)
+
+    return _rewrite_functions(_outside_strings(statement, rewrite))
+
+
+def seed_demos(connection: sqlite3.Connection, count: int) -> int:
+    """Insert count synthetic demos into an empty table; returns the number inserted"""
+    if connection.execute("SELECT COUNT(*) FROM demos").fetchone()[0]:
+        return 0
+    rng = random.Random(42)
+    start = datetime(2024, 4, 1, 9, 0, 0)
+    rows = []
+    for number in range(1, count + 1):
+        topic = rng.choice(SEED_TOPICS)
+        products = rng.sample(SEED_PRODUCTS, rng.randint(1, 3))
+        created_at = (start + timedelta(hours=number * 7)).strftime(TIMESTAMP_FORMAT)
+        title = f"{topic}デモ {number}"
+        summary = f"{', '.join(products)} を使った{topic}のデモ"
+        description = f"## 概要\n{summary}です。\n\n## 構成\n" + "\n".join(f"- {product}" for product in products)
+        owner = rng.choice(SEED_OWNERS)
+        all_info_md = (
+            f"# {title}\n\n## 基本情報\n- **Demo ID**: {number}\n- **代表投稿者**: {owner}\n\n"
+            f"## 概要\n{summary}\n\n## 詳細説明\n{description}\n\n## 利用製品\n{', '.join(products)}\n"
+        )
+        rows.append((
+            title, summary, description, owner, owner, created_at, created_at,
+            rng.choice(["draft", "published", "published", "archived"]),
+            f"https://example.com/demos/{number}", f"https://github.com/example/demo-{number}",
+            json.dumps(products, ensure_ascii=False), rng.choice(["internal", "confidential", "public"]),
+            "", all_info_md
+        ))
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO demos (title, summary, description_md, owner_emp_id, creator_emp_id, created_at, updated_at, "
+        "status, demo_url, repo_url, products, confidentiality, remarks, all_info_md) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+    )
+    connection.execute("COMMIT")
+    return count
+
+
+# --- Repository ----------------------------------------------------------------
+
+# One connection per database file, shared by all managers (handlers create one per request)
+_databases: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_databases_lock = threading.Lock()
+
+
+def open_database(path: str = SQLITE_DATABASE_PATH, seed: int = SQLITE_SEED_DEMOS) -> Tuple[sqlite3.Connection, threading.Lock]:
+    """Shared (connection, lock) for path, creating the schema (and seed rows) on first use"""
+    with _databases_lock:
+        if path not in _databases:
+            connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            connection.execute(SCHEMA)
+            if seed:
+                seed_demos(connection, seed)
+            _databases[path] = (connection, threading.Lock())
+        return _databases[path]
+
+
+class SQLiteDatabaseManager(APIBasedDatabaseManager):
+    """Demo repository on an embedded SQLite file (the SQL is shared with the REST backend)"""
+
+    def __init__(self, user_token: str = None, path: str = SQLITE_DATABASE_PATH):
+        super().__init__(user_token)
+        self.path = path
+        self.connection, self.lock = open_database(path)
+
+    def _execute(self, query: str) -> Tuple[List[str], List[List]]:
+        """Run a statement; DML answers with num_affected_rows like the Statement API"""
+        sql = translate_sql(query)
+        with self.lock:
+            cursor = self.connection.execute(sql)
+            if cursor.description is None:
+                return ["num_affected_rows"], [[str(cursor.rowcount)]]
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        return columns, [[statement_value(value) for value in row] for row in rows]
+
+    @timed_sql
+    @traced("sql.sqlite.execute")
+    def execute_query_api(self, query: str, timeout: Optional[float] = None, query_name: Optional[str] = None) -> List[Dict]:
+        """Execute query and return rows as dicts (errors are logged and answered with no rows)"""
+        set_attribute("statement", " ".join(query.split())[:120])
+        started = time.perf_counter()
+        columns, rows, error = [], [], None
+        try:
+            columns, rows = self._execute(query)
+            return [dict(zip(columns, row)) for row in rows]
+        except (sqlite3.Error, ValueError) as e:
+            error = str(e)
+            set_attribute("error", error)
+            print(f"SQLite query error: {error}")
+            return []
+        finally:
+            record_statement(query, (time.perf_counter() - started) * 1000, state="FAILED" if error else "SUCCEEDED",
+                             rows=len(rows), error=error)
+
+    def iter_query_chunks(self, query: str, timeout: Optional[float] = 60, poll_interval: float = 1.0,
+                          large_result: bool = False) -> Iterator[Tuple[List[str], List[List]]]:
+        """Execute query and yield (columns, rows) in chunks, raising on failure"""
+        started = time.perf_counter()
+        try:
+            columns, rows = self._execute(query)
+        except (sqlite3.Error, ValueError) as e:
+            record_statement(query, (time.perf_counter() - started) * 1000, state="FAILED", error=str(e))
+            raise Exception(f"Statement failed: {str(e)}")
+        record_statement(query, (time.perf_counter() - started) * 1000, state="SUCCEEDED", rows=len(rows))
+        for offset in range(0, max(len(rows), 1), SQLITE_CHUNK_ROWS):
+            yield columns, rows[offset:offset + SQLITE_CHUNK_ROWS]
+
+    def get_statement_metrics(self, statement_id: str, timeout: float = 30) -> Optional[Dict]:
+        """No query history for the embedded database"""
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create (and optionally seed) the SQLite demo database")
+    parser.add_argument("--path", default=SQLITE_DATABASE_PATH)
+    parser.add_argument("--seed", type=int, default=0, help="synthetic demos to insert into an empty table")
+    args = parser.parse_args()
+    connection, _ = open_database(args.path, seed=args.seed)
+    print(f"{args.path}: {connection.execute('SELECT COUNT(*) FROM demos').fetchone()[0]} demos")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Startup-time profiler
+app.py times its startup phases (imports, module initialization, interface
+construction, server start) with phase(); with STARTUP_PROFILE=true the
+breakdown is printed once the server accepts requests, and optionally
+written as JSON for benchmarks/startup_ttfb.py
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+# JSON file the phase breakdown is written to (empty: print only)
+STARTUP_PROFILE_PATH = os.getenv("STARTUP_PROFILE_PATH", "")
+
+_started = time.perf_counter()
+_phases: List[Dict] = []
+
+
+@contextmanager
+def phase(name: str):
+    """Time one startup phase"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append({"phase": name, "ms": round((time.perf_counter() - started) * 1000, 1)})
+
+
+def startup_report() -> Dict:
+    """Phases so far and the time since this module was imported (the first line of app.py)"""
+    return {"phases": list(_phases), "total_ms": round((time.perf_counter() - _started) * 1000, 1)}
+
+
+def print_startup_report(report: Dict):
+    print("Startup profile:")
+    for item in report["phases"]:
+        print(f"  {item['ms']:9.1f}ms  {item['phase']}")
+    print(f"  {report['total_ms']:9.1f}ms  total until the server accepted requests")
+
+
+def report_when_ready(is_ready: Callable[[], bool], on_ready: Callable[[], None] = None, timeout: float = 300):
+    """Once is_ready() holds, record the server start phase, report (if enabled) and run on_ready (deferred warm-up)"""
+    server_started = time.perf_counter()
+
+    def wait():
+        deadline = time.monotonic() + timeout
+        while not is_ready():
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+        _phases.append({"phase": "server start", "ms": round((time.perf_counter() - server_started) * 1000, 1)})
+        if STARTUP_PROFILE:
+            report = startup_report()
+            print_startup_report(report)
+            if STARTUP_PROFILE_PATH:
+                with open(STARTUP_PROFILE_PATH, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+        if on_ready:
+            on_ready()
+
+    threading.Thread(target=wait, name="startup-report", daemon=True).start()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Statement fingerprints, per-shape timing aggregates and the slow-statement log
+every statement is fingerprinted (literals normalized) and timed client-side;
+those slower than SLOW_STATEMENT_MS are written to a JSONL slow log together
+with the warehouse-reported timing from the query history API
+
+Usage:
+    python statement_log.py [slow_statements.jsonl] [--top 20]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+SLOW_STATEMENT_MS = float(os.getenv("SLOW_STATEMENT_MS", "1000"))
+SLOW_STATEMENT_LOG_PATH = os.getenv("SLOW_STATEMENT_LOG_PATH", "slow_statements.jsonl")
+# Look up the warehouse timing breakdown of slow statements (one extra API call each, in the background)
+SLOW_STATEMENT_WAREHOUSE_METRICS = os.getenv("SLOW_STATEMENT_WAREHOUSE_METRICS", "true").lower() == "true"
+
+# Latencies kept per fingerprint for the percentiles
+LATENCY_SAMPLES = 1000
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+VALUES_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+REPEATED_TUPLES = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+
+_lock = threading.Lock()
+_file_lock = threading.Lock()
+_stats: Dict[str, Dict] = {}
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement with literals replaced by ?, value lists collapsed and whitespace squeezed
+
+    Statements that differ only in their values (demo_id, page offset, number of
+    inserted rows or IN list entries) normalize to the same text.
+    """
+    text = STRING_LITERAL.sub("?", statement or "")
+    text = NUMBER_LITERAL.sub("?", text)
+    text = " ".join(text.split())
+    text = IN_LIST.sub("IN (...)", text)
+    text = VALUES_LIST.sub("(...)", text)
+    return REPEATED_TUPLES.sub("(...)+", text)
+
+
+def fingerprint(statement: str) -> str:
+    """Short stable id of the normalized statement"""
+    return hashlib.sha1(normalize_statement(statement).encode("utf-8")).hexdigest()[:12]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list (also used by benchmarks/load_test.py)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def record_statement(statement: str, elapsed_ms: float, statement_id: Optional[str] = None, state: Optional[str] = None,
+                     rows: Optional[int] = None, response_bytes: Optional[int] = None, error: Optional[str] = None,
+                     fetch_warehouse_metrics: Optional[Callable[[str], Optional[Dict]]] = None):
+    """Add one executed statement to the aggregates, and to the slow log if it took at least SLOW_STATEMENT_MS
+
+    fetch_warehouse_metrics(statement_id) returns the warehouse timing breakdown; it is only
+    called for slow statements, in a background thread so that the caller is not delayed.
+    """
+    normalized = normalize_statement(statement)
+    key = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    failed = error is not None or (state is not None and state != "SUCCEEDED")
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = {
+                "fingerprint": key, "statement": normalized, "count": 0, "errors": 0, "slow": 0,
+                "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "bytes": 0, "latencies": deque(maxlen=LATENCY_SAMPLES),
+            }
+        stats["count"] += 1
+        stats["errors"] += int(failed)
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["rows"] += rows or 0
+        stats["bytes"] += response_bytes or 0
+        stats["latencies"].append(elapsed_ms)
+        if elapsed_ms >= SLOW_STATEMENT_MS:
+            stats["slow"] += 1
+
+    if elapsed_ms < SLOW_STATEMENT_MS:
+        return
+
+    entry = {
+        "timestamp": time.time(),
+        "fingerprint": key,
+        "statement_id": statement_id,
+        "client_ms": round(elapsed_ms, 1),
+        "state": state,
+        "rows": rows,
+        "bytes": response_bytes,
+        "error": error,
+        "statement": " ".join((statement or "").split())[:2000],
+        "warehouse": None,
+    }
+    if statement_id and fetch_warehouse_metrics and SLOW_STATEMENT_WAREHOUSE_METRICS:
+        def write_with_metrics():
+            try:
+                entry["warehouse"] = fetch_warehouse_metrics(statement_id)
+            except Exception as e:
+                print(f"Warehouse metrics lookup failed for {statement_id}: {str(e)}")
+            write_slow_entry(entry)
+        threading.Thread(target=write_with_metrics, name="slow-statement-log", daemon=True).start()
+    else:
+        write_slow_entry(entry)
+
+
+def write_slow_entry(entry: Dict):
+    try:
+        with _file_lock, open(SLOW_STATEMENT_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    except Exception as e:
+        print(f"Slow statement log error: {str(e)}")
+
+
+def summarize(stats: Dict) -> Dict:
+    latencies = sorted(stats["latencies"])
+    return {
+        "fingerprint": stats["fingerprint"],
+        "statement": stats["statement"],
+        "count": stats["count"],
+        "errors": stats["errors"],
+        "slow": stats["slow"],
+        "total_ms": round(stats["total_ms"], 1),
+        "mean_ms": round(stats["total_ms"] / stats["count"], 1) if stats["count"] else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "max_ms": round(stats["max_ms"], 1),
+        "rows": stats["rows"],
+        "bytes": stats["bytes"],
+    }
+
+
+def statement_stats(limit: Optional[int] = None) -> List[Dict]:
+    """Per-fingerprint aggregates of this process, the shapes with the most total time first"""
+    with _lock:
+        summaries = [summarize(stats) for stats in _stats.values()]
+    summaries.sort(key=lambda item: item["total_ms"], reverse=True)
+    return summaries[:limit] if limit else summaries
+
+
+def aggregate_slow_log(path: str = SLOW_STATEMENT_LOG_PATH) -> List[Dict]:
+    """Per-fingerprint aggregates of a slow log file (client and warehouse time)"""
+    groups: Dict[str, Dict] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            group = groups.setdefault(entry["fingerprint"], {
+                "fingerprint": entry["fingerprint"], "statement": normalize_statement(entry["statement"]),
+                "latencies": [], "warehouse_total_ms": 0.0, "warehouse_execution_ms": 0.0, "warehouse_queued_ms": 0.0,
+            })
+            group["latencies"].append(entry["client_ms"])
+            warehouse = entry.get("warehouse") or {}
+            group["warehouse_total_ms"] += warehouse.get("total_time_ms") or 0
+            group["warehouse_execution_ms"] += warehouse.get("execution_time_ms") or 0
+            group["warehouse_queued_ms"] += warehouse.get("queued_time_ms") or 0
+
+    results = []
+    for group in groups.values():
+        latencies = sorted(group.pop("latencies"))
+        group.update({
+            "count": len(latencies),
+            "client_total_ms": round(sum(latencies), 1),
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+        })
+        results.append(group)
+    results.sort(key=lambda item: item["client_total_ms"], reverse=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the slow-statement log by fingerprint")
+    parser.add_argument("path", nargs="?", default=SLOW_STATEMENT_LOG_PATH)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    results = aggregate_slow_log(args.path)
+    print(f"{'fingerprint':<14}{'count':>7}{'client s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'wh exec s':>11}{'wh queue s':>11}  statement")
+    for group in results[:args.top]:
+        print(f"{group['fingerprint']:<14}{group['count']:>7}{group['client_total_ms'] / 1000:>10.1f}"
+              f"{group['p50_ms']:>10.1f}{group['p95_ms']:>10.1f}{group['p99_ms']:>10.1f}"
+              f"{group['warehouse_execution_ms'] / 1000:>11.1f}{group['warehouse_queued_ms'] / 1000:>11.1f}  {group['statement'][:100]}")
+
+
+if __name__ == "__main__":
+    main()
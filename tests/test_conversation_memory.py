@@ -0,0 +1,88 @@
+"""
+Token-budgeted chat memory and what the chat tab sends to the RAG endpoint
+"""
+
+import pytest
+
+import app
+from conversation_memory import ConversationMemory, estimate_tokens
+from local_search import DemoSearchIndex
+
+ANSWER = "おすすめは **需要予測デモ** と **在庫最適化デモ** です。\n\n- 小売向け\n- [詳細](https://example.com/demo)"
+
+
+def test_compact_keeps_the_history_within_the_budget():
+    memory = ConversationMemory(token_budget=100, summary_token_budget=1000)
+    for i in range(20):
+        memory.add("user", f"質問{i}: 需要予測のデモはありますか")
+        memory.add("assistant", ANSWER)
+        assert memory.history_tokens() <= 100
+    # Every turn is either kept verbatim or rolled into the summary
+    assert len(memory.turns) + len(memory.summary_lines) == 40
+    assert memory.summary_lines[0] == "- ユーザー: 質問0: 需要予測のデモはありますか"
+    assert memory.summary_lines[1] == "- アシスタント: 言及: 需要予測デモ, 在庫最適化デモ"
+
+
+def test_summary_stays_within_its_budget():
+    memory = ConversationMemory(token_budget=50, summary_token_budget=60)
+    for i in range(30):
+        memory.add("user", f"質問{i}: 需要予測のデモはありますか")
+        assert estimate_tokens(memory.summary) <= 60
+    # The oldest summary lines are dropped first
+    assert memory.summary_lines[-1].startswith("- ユーザー: 質問")
+    assert "質問0:" not in memory.summary
+    assert memory.context_summary() == "これまでの会話の要約:\n" + memory.summary
+
+
+def test_latest_turn_is_kept_even_if_it_exceeds_the_budget():
+    memory = ConversationMemory(token_budget=10, summary_token_budget=100)
+    memory.add("user", "短い質問")
+    memory.add("assistant", ANSWER)
+    assert memory.turns == [{"role": "assistant", "content": ANSWER}]
+    assert memory.build_messages("次の質問") == [
+        {"role": "assistant", "content": ANSWER},
+        {"role": "user", "content": "次の質問"},
+    ]
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Requests that chat_with_rag sends to the RAG endpoint"""
+    requests = []
+
+    def chat_completion(messages, timeout=None, context_summary=None):
+        requests.append({"messages": messages, "context_summary": context_summary})
+        return ANSWER
+
+    index = DemoSearchIndex()
+    index.load([{"demo_id": 1, "title": "需要予測デモ", "description_md": "需要予測"}])
+    monkeypatch.setattr(app, "demo_search_index", index)
+    monkeypatch.setattr(app.rag_client, "chat_completion", chat_completion)
+    monkeypatch.setattr(app, "CHAT_HISTORY_TOKEN_BUDGET", 120)
+    monkeypatch.setattr(app, "CHAT_SUMMARY_TOKEN_BUDGET", 40)
+    return requests
+
+
+def chat(message, history, memory):
+    for _, history, memory, _ in app.chat_with_rag(message, history, memory):
+        pass
+    return history, memory
+
+
+def test_chat_sends_raw_markdown_within_the_budgets(sent):
+    history, memory = [], None
+    for i in range(8):
+        history, memory = chat(f"質問{i}: 需要予測のデモはありますか", history, memory)
+
+    # The chatbot shows rendered HTML, the endpoint gets the Markdown answers
+    assert "<strong>需要予測デモ</strong>" in history[-1]["content"]
+    last = sent[-1]
+    answers = [message["content"] for message in last["messages"] if message["role"] == "assistant"]
+    assert answers and all(answer == ANSWER for answer in answers)
+    assert not any("<" in message["content"] for message in last["messages"])
+
+    history_tokens = sum(estimate_tokens(message["content"]) for message in last["messages"][:-1])
+    assert history_tokens <= 120
+    assert last["context_summary"].startswith("これまでの会話の要約:\n")
+    assert estimate_tokens(last["context_summary"].split("\n", 1)[1]) <= 40
+    assert last["messages"][-1] == {"role": "user", "content": "質問7: 需要予測のデモはありますか"}
@@ -0,0 +1,129 @@
+"""
+Priority admission of Gradio events by workload class
+"""
+
+import threading
+import time
+
+import pytest
+
+from event_workloads import WorkloadClass, WorkloadRejected, WorkloadScheduler
+
+
+def scheduler(total_slots=10, **limits):
+    """Scheduler with classes name=(concurrency_limit, max_queue, priority)"""
+    return WorkloadScheduler({
+        name: WorkloadClass(name, concurrency_limit, max_queue, priority, max_wait_seconds=5)
+        for name, (concurrency_limit, max_queue, priority) in limits.items()
+    }, total_slots)
+
+
+class Event(threading.Thread):
+    """An event of class name that runs until finish() is called"""
+
+    def __init__(self, scheduler, name, started):
+        super().__init__(daemon=True)
+        self.scheduler = scheduler
+        self.workload = name
+        self.started = started
+        self.done = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            self.scheduler.acquire(self.workload)
+        except WorkloadRejected as e:
+            self.error = e
+            return
+        self.started.append(self)
+        self.done.wait(5)
+        self.scheduler.release(self.workload)
+
+    def finish(self):
+        self.done.set()
+        self.join(5)
+
+
+def start_waiting(scheduler, name, started):
+    """Start an event and return once it is queued in the scheduler"""
+    depth = scheduler.queue_depth(name)
+    event = Event(scheduler, name, started)
+    event.start()
+    wait_until(lambda: scheduler.queue_depth(name) > depth)
+    return event
+
+
+def wait_until(condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_class_concurrency_limit():
+    workloads = scheduler(read=(2, 4, 0))
+    workloads.acquire("read")
+    workloads.acquire("read")
+    started = []
+    event = start_waiting(workloads, "read", started)
+    time.sleep(0.05)
+    assert started == [] and workloads.running("read") == 2
+
+    workloads.release("read")
+    wait_until(lambda: started == [event])
+    assert workloads.running("read") == 2 and workloads.queue_depth("read") == 0
+    event.finish()
+    assert workloads.running("read") == 1
+
+
+def test_full_queue_rejects_at_once():
+    workloads = scheduler(llm=(1, 1, 0))
+    workloads.acquire("llm")
+    started = []
+    event = start_waiting(workloads, "llm", started)
+    with pytest.raises(WorkloadRejected, match="queue is full"):
+        workloads.acquire("llm")
+
+    workloads.release("llm")
+    wait_until(lambda: started == [event])
+    event.finish()
+
+
+def test_wait_longer_than_max_wait_is_rejected():
+    workloads = WorkloadScheduler({"llm": WorkloadClass("llm", 1, 1, 0, max_wait_seconds=0.1)}, 10)
+    workloads.acquire("llm")
+    started_at = time.monotonic()
+    with pytest.raises(WorkloadRejected, match="waited longer"):
+        workloads.acquire("llm")
+    assert time.monotonic() - started_at < 1
+    assert workloads.queue_depth("llm") == 0
+
+
+def test_freed_slot_goes_to_the_highest_priority_class():
+    workloads = scheduler(total_slots=1, read=(4, 4, 0), export=(4, 4, 4))
+    workloads.acquire("export")
+    started = []
+    exports = [start_waiting(workloads, "export", started) for _ in range(2)]
+    reads = [start_waiting(workloads, "read", started) for _ in range(2)]
+
+    # Each event finishes right after it starts, handing the single slot on
+    workloads.release("export")
+    for count in range(1, 5):
+        wait_until(lambda: len(started) == count)
+        started[-1].finish()
+    assert started == reads + exports
+
+
+def test_total_slots_cap_all_classes():
+    workloads = scheduler(total_slots=2, read=(5, 4, 0), chat=(5, 4, 2))
+    workloads.acquire("read")
+    workloads.acquire("chat")
+    started = []
+    event = start_waiting(workloads, "read", started)
+    time.sleep(0.05)
+    assert started == [] and workloads.running("read") == 1
+
+    workloads.release("chat")
+    wait_until(lambda: started == [event])
+    assert workloads.running("read") == 2
+    event.finish()
@@ -0,0 +1,172 @@
+"""
+Local hybrid search over demo rows
+"""
+
+import pytest
+
+from app import demo_matches_filters
+from local_search import DemoSearchIndex, HashingEmbedder
+from sqlite_database_manager import SQLiteDatabaseManager
+
+ROWS = [
+    {"demo_id": 1, "title": "RAGチャットボット", "summary": "社内文書に答えるチャットボット",
+     "description_md": "Vector Searchで社内文書を検索して回答します", "products": ["Mosaic AI"]},
+    {"demo_id": 2, "title": "Genieで売上分析", "summary": "自然言語でSQLを生成",
+     "description_md": "Genie スペースで売上データを分析します", "products": ["AI/BI"]},
+    {"demo_id": 3, "title": "需要予測", "summary": "小売の需要予測",
+     "description_md": "時系列モデルで店舗ごとの需要を予測します", "products": ["Mosaic AI"]},
+]
+
+
+@pytest.fixture
+def index():
+    index = DemoSearchIndex(embedder=HashingEmbedder())
+    index.load(ROWS)
+    return index
+
+
+def ids(rows):
+    return [row["demo_id"] for row in rows]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("rag", [1]),
+    ("ｒａｇ", [1]),
+    ("ちゃっとぼっと", [1]),
+    ("genie", [2]),
+    ("需要予測", [3]),
+])
+def test_search_returns_only_matching_demos(index, query, expected):
+    assert ids(index.search(query)) == expected
+
+
+def test_search_without_any_matching_term_is_empty(index):
+    assert index.search("在庫最適化") == []
+    assert index.search("") == []
+
+
+@pytest.mark.parametrize("query", ["ｒａｇ", "ちゃっとぼっと", "売上分析 社内文書", "店舗の需要"])
+def test_embeddings_only_rerank_keyword_hits(index, query):
+    keyword_only = DemoSearchIndex()
+    keyword_only.load(ROWS)
+    assert sorted(ids(index.search(query))) == sorted(ids(keyword_only.search(query)))
+
+
+@pytest.mark.parametrize("query", ["genie", "ＧＥＮＩＥ", "Ｇｅｎｉｅ"])
+def test_full_width_and_half_width_queries_match_alike(index, query):
+    assert ids(index.search_page(query)[0]) == [2]
+
+
+@pytest.mark.parametrize("query", ["チャットボット", "ちゃっとぼっと", "ﾁｬｯﾄﾎﾞｯﾄ"])
+def test_katakana_and_hiragana_queries_match_alike(index, query):
+    assert ids(index.search_page(query)[0]) == [1]
+
+
+def test_search_page_requires_most_query_terms(index):
+    # 3 of the 7 bigrams (需要, 要予, 予測) are in the demo
+    assert index.search_page("需要予測 在庫最適化") == ([], 0)
+    assert ids(index.search_page("需要予測 在庫最適化", min_should_match=0.4)[0]) == [3]
+
+
+def test_search_page_totals():
+    index = DemoSearchIndex()
+    index.load([{"demo_id": demo_id, "title": f"需要予測 {demo_id}", "status": "draft" if demo_id % 2 else "public"}
+                for demo_id in range(1, 26)])
+
+    pages = [index.search_page("需要予測", page, page_size=10) for page in (1, 2, 3, 4)]
+    assert [len(rows) for rows, _ in pages] == [10, 10, 5, 0]
+    assert {total for _, total in pages} == {25}
+    assert sorted(demo_id for rows, _ in pages for demo_id in ids(rows)) == list(range(1, 26))
+
+    rows, total = index.search_page("需要予測", 2, page_size=10, row_filter=lambda row: row["status"] == "draft")
+    assert total == 13
+    assert len(rows) == 3
+
+
+FILTER_DEMOS = [
+    {"status": "draft", "confidentiality": "internal", "owner_emp_id": "a@example.com", "products": ["Mosaic AI"]},
+    {"status": "public", "confidentiality": "internal", "owner_emp_id": "b@example.com", "products": ["AI/BI", "Mosaic AI"]},
+    {"status": "public", "confidentiality": "confidential", "owner_emp_id": "a@example.com", "products": ["O'Reilly, Inc."]},
+    {"status": "archived", "confidentiality": "public", "owner_emp_id": "c@example.com", "products": []},
+]
+
+
+@pytest.mark.parametrize("filters", [
+    None,
+    {},
+    {"status": "public"},
+    {"status": "public", "confidentiality": "internal"},
+    {"owner": "a@example.com"},
+    {"product": "Mosaic AI"},
+    {"product": "AI"},
+    {"product": "O'Reilly, Inc."},
+    {"status": "", "product": "AI/BI"},
+    {"status": "draft", "product": "AI/BI"},
+    {"unknown": "x"},
+])
+def test_demo_matches_filters_agrees_with_build_where_clause(tmp_path, filters):
+    manager = SQLiteDatabaseManager(path=str(tmp_path / "demos.db"))
+    for i, demo in enumerate(FILTER_DEMOS):
+        manager.insert_demo({"title": f"デモ{i}", "summary": "", "description_md": "", "creator_emp_id": "",
+                             "demo_url": "", "repo_url": "", "remarks": "", **demo})
+
+    listed, total = manager.get_demos(filters=filters)
+    indexed = [row for row in manager.get_search_documents() if demo_matches_filters(row, filters)]
+    assert sorted(map(int, ids(listed))) == sorted(map(int, ids(indexed)))
+    assert total == len(indexed)
+
+
+TOPICS = {
+    "需要予測": "時系列モデルで店舗ごとの需要予測と在庫の最適化",
+    "チャットボット": "社内文書を検索して回答するチャットボットと問い合わせ対応",
+    "画像検査": "工場の製品画像から外観不良を検出する画像検査",
+}
+
+
+def topic_row(demo_id, topic):
+    return {"demo_id": demo_id, "title": f"{topic}デモ{demo_id}", "summary": TOPICS[topic],
+            "description_md": f"## 概要\n{TOPICS[topic]}"}
+
+
+@pytest.fixture
+def related_index():
+    # Four demos per topic, so one change is applied incrementally rather than by a rebuild
+    index = DemoSearchIndex()
+    index.load([topic_row(demo_id, topic) for demo_id, topic in enumerate(list(TOPICS) * 4, 1)])
+    return index
+
+
+def related_ids(index, demo_id):
+    return set(ids(index.related(demo_id)))
+
+
+def test_related_demos_share_the_topic(related_index):
+    # Demos 1, 4, 7 and 10 are about 需要予測
+    assert set(ids(related_index.related(1))[:3]) == {4, 7, 10}
+
+
+def test_upserted_demo_appears_among_related(related_index):
+    related_index.upsert(topic_row(13, "需要予測"))
+    assert 13 in related_ids(related_index, 1)
+    assert set(ids(related_index.related(13))[:4]) == {1, 4, 7, 10}
+
+
+def test_updated_demo_moves_to_its_new_topic(related_index):
+    related_index.upsert(topic_row(1, "画像検査"))
+    assert 1 not in related_ids(related_index, 4)
+    assert 1 in related_ids(related_index, 3)
+    assert set(ids(related_index.related(1))[:4]) == {3, 6, 9, 12}
+
+
+def test_removed_demo_disappears_from_related(related_index):
+    related_index.remove(4)
+    assert related_index.related(4) == []
+    assert all(4 not in related_ids(related_index, demo_id) for demo_id in range(1, 13) if demo_id != 4)
+    assert set(ids(related_index.related(1))[:2]) == {7, 10}
+
+
+def test_related_demos_follow_a_rebuild(related_index):
+    # Changing most demos at once recomputes every neighbour list
+    related_index.load([topic_row(demo_id, "チャットボット" if demo_id <= 6 else "画像検査") for demo_id in range(1, 13)])
+    assert set(ids(related_index.related(1))[:5]) == {2, 3, 4, 5, 6}
+    assert related_ids(related_index, 12).isdisjoint({1, 2, 3, 4, 5, 6})
@@ -0,0 +1,95 @@
+"""
+Near-duplicate warnings at registration
+"""
+
+import pytest
+
+import app
+from local_search import DemoSearchIndex, NearDuplicateIndex, normalize_text
+
+TITLE = "小売向け需要予測デモ"
+DESCRIPTION = "店舗ごとの販売実績と天候データから翌週の需要を予測し、発注量の提案までを行うデモです。"
+# The same demo with its description reworded a little
+EDITED_DESCRIPTION = "店舗ごとの販売実績と天候データから来週の需要を予測し、発注量を提案するデモです。"
+OTHER_TITLE = "製造ラインの画像検査"
+OTHER_DESCRIPTION = "カメラで撮影した製品画像から傷や欠けを検出し、不良品を自動で振り分けます。"
+
+
+def jaccard(index, a, b):
+    def shingles(text):
+        text = normalize_text(text)
+        return {text[i:i + index.shingle_size] for i in range(len(text) - index.shingle_size + 1)}
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b)
+
+
+def test_estimated_similarity_is_close_to_the_jaccard_similarity():
+    index = NearDuplicateIndex()
+    index.add(1, f"{TITLE}\n{DESCRIPTION}")
+    [(similarity, doc_id)] = index.query(f"{TITLE}\n{EDITED_DESCRIPTION}", threshold=0.0)
+    assert doc_id == 1
+    assert abs(similarity - jaccard(index, f"{TITLE} {DESCRIPTION}", f"{TITLE} {EDITED_DESCRIPTION}")) < 0.15
+
+
+def test_threshold_separates_near_duplicates_from_other_demos():
+    index = NearDuplicateIndex()
+    index.add(1, f"{TITLE}\n{DESCRIPTION}")
+    index.add(2, f"{OTHER_TITLE}\n{OTHER_DESCRIPTION}")
+    assert [doc_id for _, doc_id in index.query(f"{TITLE}\n{DESCRIPTION}", 0.5)] == [1]
+    assert [doc_id for _, doc_id in index.query(f"{TITLE}\n{EDITED_DESCRIPTION}", 0.5)] == [1]
+    [(similarity, _)] = index.query(f"{TITLE}\n{EDITED_DESCRIPTION}", 0.5)
+    assert index.query(f"{TITLE}\n{EDITED_DESCRIPTION}", similarity + 0.01) == []
+    assert index.query("在庫を最適化するダッシュボード", 0.5) == []
+
+
+@pytest.fixture
+def search_index(monkeypatch):
+    index = DemoSearchIndex()
+    index.load([{"demo_id": 1, "title": TITLE, "description_md": DESCRIPTION},
+                {"demo_id": 2, "title": OTHER_TITLE, "description_md": OTHER_DESCRIPTION}])
+    monkeypatch.setattr(app, "demo_search_index", index)
+    # index_demo_row marks the index stale; the test has no table to refresh from
+    monkeypatch.setattr(app, "refresh_demo_search_index", lambda timeout=None: False)
+    return index
+
+
+def duplicate_ids(title, description):
+    return [row["demo_id"] for _, row in app.find_near_duplicate_demos(title, description)]
+
+
+def test_registered_and_deleted_demos_update_the_check(search_index):
+    assert duplicate_ids(TITLE, EDITED_DESCRIPTION) == [1]
+    assert duplicate_ids("在庫最適化", "倉庫ごとの在庫を最適化します。") == []
+
+    app.index_demo_row(3, {"title": "在庫最適化", "description_md": "倉庫ごとの在庫を最適化します。"})
+    assert duplicate_ids("在庫最適化", "倉庫ごとの在庫を最適化します。") == [3]
+
+    app.index_demo_row(1)
+    assert duplicate_ids(TITLE, EDITED_DESCRIPTION) == []
+
+
+def test_only_demos_at_or_above_the_threshold_are_reported(search_index, monkeypatch):
+    [(similarity, _)] = app.find_near_duplicate_demos(TITLE, EDITED_DESCRIPTION)
+    assert similarity >= app.NEAR_DUPLICATE_THRESHOLD
+    monkeypatch.setattr(app, "NEAR_DUPLICATE_THRESHOLD", similarity + 0.01)
+    assert duplicate_ids(TITLE, EDITED_DESCRIPTION) == []
+
+
+def test_threshold_zero_turns_the_check_off(search_index, monkeypatch):
+    monkeypatch.setattr(app, "NEAR_DUPLICATE_THRESHOLD", 0.0)
+    assert duplicate_ids(TITLE, DESCRIPTION) == []
+
+
+def test_near_duplicate_asks_for_confirmation_instead_of_registering(search_index, monkeypatch):
+    registered = []
+    monkeypatch.setattr(app, "register_demo", lambda *args: registered.append(args) or ("登録しました",))
+
+    result = app.check_duplicates_or_register(TITLE, "", EDITED_DESCRIPTION, "owner@example.com", "", "draft",
+                                              "https://example.com/demo", "", "", "internal", "", None, None)
+    assert registered == []
+    assert result[-2] == {"visible": True, "__type__": "update"}
+    assert "Demo ID: 1" in result[-1]
+
+    app.check_duplicates_or_register(OTHER_TITLE + "2", "", "まったく別の説明です。", "owner@example.com", "", "draft",
+                                     "https://example.com/demo", "", "", "internal", "", None, None)
+    assert len(registered) == 1
@@ -0,0 +1,102 @@
+"""
+RAG requests against a stalled endpoint fall back to the local search in time
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import app
+from local_search import DemoSearchIndex
+
+TIMEOUT = 0.5
+MESSAGES = [{"role": "user", "content": "需要予測"}]
+
+
+class StalledHandler(BaseHTTPRequestHandler):
+    """Sends the headers and then one byte every stall_seconds / 10, never finishing the body"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server.headers_first:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "1000000")
+            self.end_headers()
+        try:
+            for _ in range(10):
+                time.sleep(self.server.stall_seconds / 10)
+                if self.server.headers_first:
+                    self.wfile.write(b" ")
+                    self.wfile.flush()
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(params=[False, True], ids=["no-headers", "slow-body"])
+def endpoint(request):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StalledHandler)
+    server.daemon_threads = True
+    server.headers_first = request.param
+    server.stall_seconds = 5
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/invocations"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(endpoint, monkeypatch):
+    index = DemoSearchIndex()
+    index.load([{"demo_id": 1, "title": "需要予測デモ", "summary": "小売の需要予測", "description_md": "需要予測"}])
+    monkeypatch.setattr(app, "demo_search_index", index)
+    client = app.RAGClient(max_workers=2)
+    client.endpoint = endpoint
+    client.use_oauth = False
+    client.pat_token = "token"
+    return client
+
+
+def test_stalled_endpoint_falls_back_within_the_deadline(client):
+    started = time.monotonic()
+    answer = client.chat_completion(MESSAGES, timeout=TIMEOUT)
+    assert time.monotonic() - started < TIMEOUT + 0.5
+    assert "⚠️" in answer
+    assert "需要予測デモ" in answer
+
+
+def test_abandoned_request_releases_its_worker(client):
+    client.chat_completion(MESSAGES, timeout=TIMEOUT)
+    # The worker gives up at its first read after the deadline, at most one read timeout later
+    assert wait_for_free_workers(client, 2, TIMEOUT * 2 + 1)
+
+
+def test_busy_workers_fall_back_at_once(client):
+    # Both workers are still stuck in earlier requests
+    for _ in range(2):
+        assert client.workers.acquire(blocking=False)
+    started = time.monotonic()
+    answer = client.chat_completion(MESSAGES, timeout=TIMEOUT)
+    assert time.monotonic() - started < TIMEOUT / 2
+    assert "混雑" in answer
+    assert "需要予測デモ" in answer
+
+
+def wait_for_free_workers(client, count, seconds):
+    """Whether count workers are free within seconds"""
+    deadline = time.monotonic() + seconds
+    while True:
+        acquired = 0
+        while acquired < count and client.workers.acquire(blocking=False):
+            acquired += 1
+        for _ in range(acquired):
+            client.workers.release()
+        if acquired == count or time.monotonic() > deadline:
+            return acquired == count
+        time.sleep(0.05)
@@ -0,0 +1,161 @@
+"""
+Conditional and owner-checked writes, bulk import and SQL translation on the SQLite backend
+(the same SQL the REST backend sends to the warehouse)
+"""
+
+import json
+
+import pytest
+
+from catalog_import import ImportFailed, ImportValidationError, import_catalog
+from demo_repository import DemoNotFound, NotDemoOwner, UpdateConflict
+from sqlite_database_manager import SQLiteDatabaseManager, translate_sql
+
+OWNER = "owner@example.com"
+
+
+def demo_data(**overrides):
+    data = {
+        "title": "RAGチャットボット", "summary": "社内文書の検索", "description_md": "## 概要\nRAGのデモ",
+        "owner_emp_id": OWNER, "creator_emp_id": "", "status": "draft", "demo_url": "https://example.com/demo",
+        "repo_url": "", "products": ["Vector Search"], "confidentiality": "internal", "remarks": "",
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SQLiteDatabaseManager(path=str(tmp_path / "demos.db"))
+
+
+@pytest.fixture
+def demo_id(manager):
+    manager.insert_demo(demo_data())
+    return int(manager.execute_query_api("SELECT MAX(demo_id) AS demo_id FROM demos")[0]["demo_id"])
+
+
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(record, ensure_ascii=False) for record in records), encoding="utf-8")
+    return str(path)
+
+
+def test_translate_sql_keeps_quoted_literals():
+    sql = translate_sql(
+        "SELECT array('O''Brien', 'concat(x)') FROM hiroshi.ai_demo_hub.demos "
+        "WHERE title = 'a.b.c array(' AND array_contains(products, 'Genie')"
+    )
+    assert sql == (
+        "SELECT json_array('O''Brien', 'concat(x)') FROM demos "
+        "WHERE title = 'a.b.c array(' AND EXISTS (SELECT 1 FROM json_each(products) WHERE json_each.value = 'Genie')"
+    )
+
+
+def test_translate_sql_rejects_unterminated_literal():
+    with pytest.raises(ValueError):
+        translate_sql("INSERT INTO demos (products) VALUES (array('O'Brien'))")
+
+
+def test_products_with_quotes_are_stored(manager, demo_id):
+    manager.update_demo(demo_id, demo_data(products=["O'Brien", "Genie"]))
+    row = manager.execute_query_api(f"SELECT products FROM demos WHERE demo_id = {demo_id}")[0]
+    assert json.loads(row["products"]) == ["O'Brien", "Genie"]
+
+
+def test_update_with_current_version_is_applied(manager, demo_id):
+    version = manager.get_demo_for_update(demo_id)
+    manager.update_demo(demo_id, demo_data(title="更新後"), expected_version=version)
+    assert manager.get_demo_for_update(demo_id)["title"] == "更新後"
+
+
+def test_update_after_concurrent_save_conflicts(manager, demo_id):
+    version = manager.get_demo_for_update(demo_id)
+    manager.update_demo(demo_id, demo_data(title="Bの変更"), expected_version=version)
+    # Usually within the same second as the load: the version must still differ
+    with pytest.raises(UpdateConflict):
+        manager.update_demo(demo_id, demo_data(title="Aの変更"), expected_version=version)
+    assert manager.get_demo_for_update(demo_id)["title"] == "Bの変更"
+
+
+def test_owner_checked_update_is_applied(manager, demo_id):
+    version = manager.get_demo_for_update(demo_id)
+    manager.update_demo(demo_id, demo_data(title="更新後"), expected_version=version, required_owner=OWNER)
+    assert manager.get_demo_for_update(demo_id)["title"] == "更新後"
+
+
+def test_update_by_other_user_is_rejected(manager, demo_id):
+    with pytest.raises(NotDemoOwner):
+        manager.update_demo(demo_id, demo_data(title="乗っ取り"), required_owner="other@example.com")
+    with pytest.raises(NotDemoOwner):
+        manager.delete_demo(demo_id, required_owner="other@example.com")
+    assert manager.get_demo_for_update(demo_id)["title"] == "RAGチャットボット"
+
+
+def test_write_to_missing_demo_raises_not_found(manager, demo_id):
+    with pytest.raises(DemoNotFound):
+        manager.update_demo(demo_id + 1, demo_data(), required_owner=OWNER)
+    manager.delete_demo(demo_id, required_owner=OWNER)
+    with pytest.raises(DemoNotFound):
+        manager.delete_demo(demo_id, required_owner=OWNER)
+
+
+def test_import_fills_demo_ids(manager, tmp_path):
+    path = write_jsonl(tmp_path / "demos.jsonl", [demo_data(title=f"デモ {n}") for n in range(5)])
+    assert import_catalog(manager, path, batch_size=2, owner=OWNER) == 5
+    rows = manager.execute_query_api("SELECT demo_id, all_info_md FROM demos ORDER BY demo_id")
+    assert len(rows) == 5
+    for row in rows:
+        assert f"- **Demo ID**: {row['demo_id']}" in row["all_info_md"]
+
+
+def test_import_rejects_other_owners_and_unknown_values(manager, tmp_path):
+    path = write_jsonl(tmp_path / "demos.jsonl", [
+        demo_data(owner_emp_id="other@example.com"),
+        demo_data(status="done"),
+        demo_data(confidentiality="secret"),
+    ])
+    with pytest.raises(ImportValidationError) as error:
+        import_catalog(manager, path, owner=OWNER)
+    assert [message.split(":")[0] for message in error.value.errors] == ["Row 1", "Row 2", "Row 3"]
+    assert manager.execute_query_api("SELECT COUNT(*) AS count FROM demos")[0]["count"] == "0"
+
+
+def test_import_failure_keeps_written_batches_consistent(manager, tmp_path, monkeypatch):
+    path = write_jsonl(tmp_path / "demos.jsonl", [demo_data(title=f"デモ {n}") for n in range(4)])
+    insert_demos_batch = manager.insert_demos_batch
+    calls = []
+
+    def fail_second_batch(rows):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise Exception("warehouse unavailable")
+        return insert_demos_batch(rows)
+
+    monkeypatch.setattr(manager, "insert_demos_batch", fail_second_batch)
+    with pytest.raises(ImportFailed) as error:
+        import_catalog(manager, path, batch_size=2, owner=OWNER)
+    assert (error.value.imported, error.value.total) == (2, 4)
+    rows = manager.execute_query_api("SELECT all_info_md FROM demos")
+    assert len(rows) == 2
+    assert not any("Demo ID**: TBD" in row["all_info_md"] for row in rows)
+
+
+def test_import_failure_is_reported_when_filling_ids_fails_too(manager, tmp_path, monkeypatch):
+    path = write_jsonl(tmp_path / "demos.jsonl", [demo_data(title=f"デモ {n}") for n in range(4)])
+    insert_demos_batch = manager.insert_demos_batch
+    calls = []
+
+    def fail_second_batch(rows):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise Exception("warehouse unavailable")
+        return insert_demos_batch(rows)
+
+    def fail_fill():
+        raise Exception("warehouse still unavailable")
+
+    monkeypatch.setattr(manager, "insert_demos_batch", fail_second_batch)
+    monkeypatch.setattr(manager, "fill_pending_demo_ids", fail_fill)
+    with pytest.raises(ImportFailed) as error:
+        import_catalog(manager, path, batch_size=2, owner=OWNER)
+    assert (error.value.imported, error.value.total) == (2, 4)
@@ -0,0 +1,20 @@
+"""
+Statement fingerprints and the nearest-rank percentile shared with the load test
+"""
+
+from statement_log import fingerprint, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(number) for number in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([3.0], 0.99) == 3.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint("SELECT * FROM demos WHERE demo_id = 1") == fingerprint("SELECT * FROM demos WHERE demo_id = 42")
+    assert fingerprint("SELECT * FROM demos WHERE title = 'a'") != fingerprint("SELECT * FROM demos WHERE owner_emp_id = 'a'")
@@ -0,0 +1,50 @@
+"""
+Write-behind journal applied to the SQLite backend
+"""
+
+import pytest
+
+from sqlite_database_manager import SQLiteDatabaseManager
+from write_journal import WriteJournal
+
+OWNER = "owner@example.com"
+
+
+def demo_data(**overrides):
+    data = {
+        "title": "需要予測デモ", "summary": "", "description_md": "## 概要\n需要予測", "owner_emp_id": OWNER,
+        "creator_emp_id": "", "status": "draft", "demo_url": "https://example.com/demo", "repo_url": "",
+        "products": ["Mosaic AI"], "confidentiality": "internal", "remarks": "",
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SQLiteDatabaseManager(path=str(tmp_path / "demos.db"))
+    manager.insert_demo(demo_data())
+    return manager
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return WriteJournal(str(tmp_path / "journal.db"))
+
+
+def test_edits_from_the_same_form_are_chained(manager, journal):
+    version = manager.get_demo_for_update(1)
+    journal.append_update(1, demo_data(title="1回目"), expected_version=version)
+    journal.append_update(1, demo_data(title="2回目"), expected_version=version)
+    assert journal.flush(manager) == 2
+    assert journal.failed_count() == 0
+    assert manager.get_demo_for_update(1)["title"] == "2回目"
+
+
+def test_edit_based_on_a_stale_version_still_conflicts(manager, journal):
+    version = manager.get_demo_for_update(1)
+    manager.update_demo(1, demo_data(title="他のユーザー"))
+    journal.append_update(1, demo_data(title="古いフォーム"), expected_version=version)
+    assert journal.flush(manager) == 0
+    assert journal.failed_count() == 1
+    assert manager.get_demo_for_update(1)["title"] == "他のユーザー"
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Lightweight tracing for the hot paths
+nested spans are tracked with contextvars; when a root span (usually a
+Gradio handler) finishes, the whole trace is exported to the console
+and/or a JSONL file so that slow requests can be explained at a glance
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Comma-separated exporters: console, file (empty disables tracing)
+TRACING_EXPORTERS = [name.strip() for name in os.getenv("TRACING_EXPORTER", "").split(",") if name.strip()]
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "traces.jsonl")
+# Only traces at least this slow are printed by the console exporter
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_file_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation with attributes; children are collected on the root span"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.root = parent.root if parent else self
+        self.finished: List["Span"] = []
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        # list.append is atomic, so spans finished in worker threads are safe to collect
+        self.root.finished.append(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms or 0, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attribute(key: str, value):
+    """Set an attribute on the current span (no-op outside a span or with tracing disabled)"""
+    span_ = _current_span.get()
+    if span_ is not None:
+        span_.set_attribute(key, value)
+
+
+def _finish(span_: Span):
+    span_.finish()
+    if span_.parent is None:
+        export_trace(span_)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span (or as a new trace)"""
+    if not TRACING_EXPORTERS:
+        yield None
+        return
+
+    span_ = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(span_)
+    try:
+        yield span_
+    except BaseException as e:
+        span_.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(span_)
+
+
+def _traced_generator(span_name: str, attributes: Dict, generator):
+    """Trace a generator until it is exhausted
+
+    The span is current only while the generator runs; Gradio may resume each
+    step in a different thread and context, so it is never left set across a yield.
+    """
+    span_ = Span(span_name, _current_span.get(), attributes)
+    try:
+        while True:
+            token = _current_span.set(span_)
+            try:
+                value = next(generator)
+            except StopIteration:
+                return
+            finally:
+                _current_span.reset(token)
+            yield value
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            span_.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        generator.close()
+        _finish(span_)
+
+
+def traced(name: Optional[str] = None, **attributes) -> Callable:
+    """Decorator form of span (generator functions are traced until they are exhausted)"""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not TRACING_EXPORTERS:
+                    yield from fn(*args, **kwargs)
+                    return
+                yield from _traced_generator(span_name, attributes, fn(*args, **kwargs))
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def submit_traced(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the current span as the parent inside the worker thread"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def format_trace(root: Span) -> str:
+    """Indented tree of a finished trace, children in start order"""
+    children: Dict[Optional[str], List[Span]] = {}
+    for span_ in root.finished:
+        children.setdefault(span_.parent.span_id if span_.parent else None, []).append(span_)
+
+    lines = []
+
+    def walk(span_: Span, depth: int):
+        attributes = " ".join(f"{key}={value}" for key, value in span_.attributes.items())
+        error = f" ERROR {span_.error}" if span_.error else ""
+        lines.append(f"{'  ' * depth}{span_.duration_ms:9.1f}ms  {span_.name}  {attributes}{error}".rstrip())
+        for child in sorted(children.get(span_.span_id, []), key=lambda item: item.start_time):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def export_trace(root: Span):
+    """Send a finished trace to the configured exporters"""
+    try:
+        if "console" in TRACING_EXPORTERS and (root.duration_ms or 0) >= TRACE_SLOW_MS:
+            print(f"Trace {root.trace_id} ({root.name}):\n{format_trace(root)}")
+        if "file" in TRACING_EXPORTERS:
+            lines = "".join(json.dumps(span_.to_dict(), ensure_ascii=False, default=str) + "\n" for span_ in root.finished)
+            with _file_lock, open(TRACE_FILE_PATH, "a", encoding="utf-8") as f:
+                f.write(lines)
+    except Exception as e:
+        print(f"Trace export error: {str(e)}")
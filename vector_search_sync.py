@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Triggered sync of the Vector Search index behind the chat bot
+instead of a CONTINUOUS pipeline (compute around the clock for a table that
+changes a few times a day), the index is created with pipeline_type TRIGGERED
+and the app's write paths call notify_write(). Writes are coalesced: a sync is
+triggered once no write arrived for VECTOR_SEARCH_SYNC_DEBOUNCE_SECONDS, or at
+the latest VECTOR_SEARCH_SYNC_MAX_DELAY_SECONDS after the first pending write,
+and never while a sync is still running (writes arriving meanwhile trigger one
+more sync after it finished).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import pytz
+import requests
+
+from metrics import VECTOR_SEARCH_SYNCS
+
+VECTOR_SEARCH_SYNC_ENABLED = os.getenv("VECTOR_SEARCH_SYNC_ENABLED", "false").lower() == "true"
+VECTOR_SEARCH_INDEX_NAME = os.getenv("VECTOR_SEARCH_INDEX_NAME", "hiroshi.ai_demo_hub.demos_vs_gte")
+VECTOR_SEARCH_SYNC_DEBOUNCE_SECONDS = float(os.getenv("VECTOR_SEARCH_SYNC_DEBOUNCE_SECONDS", "30"))
+VECTOR_SEARCH_SYNC_MAX_DELAY_SECONDS = float(os.getenv("VECTOR_SEARCH_SYNC_MAX_DELAY_SECONDS", "300"))
+# How often a running sync is checked for completion
+VECTOR_SEARCH_SYNC_POLL_SECONDS = float(os.getenv("VECTOR_SEARCH_SYNC_POLL_SECONDS", "10"))
+
+JST = pytz.timezone('Asia/Tokyo')
+MAX_RETRY_SECONDS = 300
+
+
+def sync_in_progress(detailed_state: str) -> bool:
+    """Whether the index is still building or syncing (detailed_state of the index status)"""
+    return any(marker in (detailed_state or "") for marker in ("TRIGGERED_UPDATE", "UPDATING", "PROVISIONING"))
+
+
+class VectorSearchIndexClient:
+    """The two Vector Search index calls the scheduler needs"""
+
+    def __init__(self, host: str, index_name: str, token_provider: Callable[[], str], timeout: float = 30):
+        if not host.startswith(("https://", "http://")):
+            host = f"https://{host}"
+        self.base_url = f"{host.rstrip('/')}/api/2.0/vector-search/indexes/{index_name}"
+        self.token_provider = token_provider
+        self.timeout = timeout
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token_provider()}"}
+
+    def trigger_sync(self):
+        response = requests.post(f"{self.base_url}/sync", headers=self._headers(), timeout=self.timeout)
+        response.raise_for_status()
+
+    def get_status(self) -> Dict:
+        """status of the index (ready, detailed_state, indexed_row_count, message)"""
+        response = requests.get(self.base_url, headers=self._headers(), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("status", {})
+
+
+class IndexSyncScheduler:
+    """Debounces and coalesces sync triggers for one index; runs in a daemon thread"""
+
+    def __init__(self, client: VectorSearchIndexClient, debounce_seconds: float = VECTOR_SEARCH_SYNC_DEBOUNCE_SECONDS,
+                 max_delay_seconds: float = VECTOR_SEARCH_SYNC_MAX_DELAY_SECONDS,
+                 poll_seconds: float = VECTOR_SEARCH_SYNC_POLL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        # Writes not covered by a triggered sync yet
+        self._first_pending_at: Optional[float] = None
+        self._last_write_at: Optional[float] = None
+        self._pending_writes = 0
+        # The sync being waited for (ours or one started elsewhere)
+        self._syncing = False
+        self._syncing_writes = 0
+        self._retry_at = 0.0
+        self._failures = 0
+        self.triggered = 0
+        self.last_triggered_at: Optional[datetime] = None
+        self.last_synced_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def notify_write(self):
+        """Record that the demos table changed (called after every write)"""
+        now = self.clock()
+        with self._lock:
+            if self._first_pending_at is None:
+                self._first_pending_at = now
+            self._last_write_at = now
+            self._pending_writes += 1
+        self._wake.set()
+
+    def _restore_pending(self, first_pending_at: float, last_write_at: float, writes: int):
+        with self._lock:
+            self._first_pending_at = min(first_pending_at, self._first_pending_at or first_pending_at)
+            self._last_write_at = max(last_write_at, self._last_write_at or last_write_at)
+            self._pending_writes += writes
+
+    def _fail(self, error: str) -> float:
+        with self._lock:
+            self._failures += 1
+            delay = min(self.poll_seconds * 2 ** self._failures, MAX_RETRY_SECONDS)
+            self._retry_at = self.clock() + delay
+            self.last_error = error
+        print(f"Vector Search sync error: {error}")
+        return delay
+
+    def step(self) -> Optional[float]:
+        """One scheduling step; returns the seconds until the next one (None: wait for a write)"""
+        if self._syncing:
+            try:
+                state = self.client.get_status().get("detailed_state", "")
+            except Exception as e:
+                return self._fail(f"status check failed: {str(e)}")
+            if sync_in_progress(state):
+                return self.poll_seconds
+            with self._lock:
+                self._syncing = False
+                if "FAILED" in state:
+                    self.last_error = f"sync ended in {state}"
+                else:
+                    self.last_synced_at = datetime.now(JST)
+                    self.last_error = None
+                    self._failures = 0
+            VECTOR_SEARCH_SYNCS.inc(result="failed" if "FAILED" in state else "completed")
+
+        with self._lock:
+            if self._first_pending_at is None:
+                return None
+            now = self.clock()
+            due = min(self._last_write_at + self.debounce_seconds, self._first_pending_at + self.max_delay_seconds)
+            due = max(due, self._retry_at)
+            if now < due:
+                return due - now
+            pending = (self._first_pending_at, self._last_write_at, self._pending_writes)
+            self._first_pending_at = self._last_write_at = None
+            self._pending_writes = 0
+
+        try:
+            # A sync started elsewhere (e.g. from the notebook) cannot be joined: wait for it, then trigger
+            if sync_in_progress(self.client.get_status().get("detailed_state", "")):
+                self._restore_pending(*pending)
+                with self._lock:
+                    self._syncing = True
+                return self.poll_seconds
+            self.client.trigger_sync()
+        except Exception as e:
+            self._restore_pending(*pending)
+            VECTOR_SEARCH_SYNCS.inc(result="error")
+            return self._fail(f"trigger failed: {str(e)}")
+
+        with self._lock:
+            self._syncing = True
+            self._syncing_writes = pending[2]
+            self._retry_at = 0.0
+            self.triggered += 1
+            self.last_triggered_at = datetime.now(JST)
+        VECTOR_SEARCH_SYNCS.inc(result="triggered")
+        return self.poll_seconds
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                try:
+                    wait = self.step()
+                except Exception as e:
+                    print(f"Vector Search sync scheduler error: {str(e)}")
+                    wait = self.poll_seconds
+                self._wake.wait(wait)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=run, name="vector-search-sync", daemon=True)
+        self._thread.start()
+
+    def status(self) -> Dict:
+        """Snapshot for the UI: state is syncing, pending, failed or idle"""
+        with self._lock:
+            now = self.clock()
+            if self._syncing:
+                state = "syncing"
+            elif self._first_pending_at is not None:
+                state = "pending"
+            elif self.last_error:
+                state = "failed"
+            else:
+                state = "idle"
+            due_in = None
+            if self._first_pending_at is not None:
+                due = min(self._last_write_at + self.debounce_seconds, self._first_pending_at + self.max_delay_seconds)
+                due_in = max(0.0, max(due, self._retry_at) - now)
+            return {
+                "state": state,
+                "pending_writes": self._pending_writes,
+                "syncing_writes": self._syncing_writes if self._syncing else 0,
+                "due_in_seconds": due_in,
+                "triggered": self.triggered,
+                "last_triggered_at": self.last_triggered_at,
+                "last_synced_at": self.last_synced_at,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Write-behind journal for demo registrations and updates
+mutations are appended durably to a local SQLite (WAL) journal and
+acknowledged immediately; a background flusher applies them to the
+demos table in order, with retries and idempotency checks
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import pytz
+
+from demo_repository import DemoNotFound, UpdateConflict
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_JOURNAL_PATH = os.getenv("WRITE_BEHIND_JOURNAL_PATH", "write_journal.db")
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "10"))
+WRITE_BEHIND_POLL_SECONDS = float(os.getenv("WRITE_BEHIND_POLL_SECONDS", "5"))
+
+JST = pytz.timezone('Asia/Tokyo')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mutations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    operation TEXT NOT NULL,
+    demo_id INTEGER,
+    payload TEXT NOT NULL,
+    written_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    applied_demo_id INTEGER
+)
+"""
+
+
+def parse_timestamp(value: str) -> datetime:
+    """JST datetime of a journaled timestamp (entries written before microsecond precision included)"""
+    return JST.localize(datetime.fromisoformat(value))
+
+
+class WriteJournal:
+    """Durable, ordered queue of pending demo inserts and updates
+
+    The idempotency key of an insert is (title, owner_emp_id, created_at) and of an
+    update (demo_id, updated_at); the timestamps are fixed when the write is accepted,
+    so a retry after an unacknowledged success is detected instead of applied twice.
+    """
+
+    def __init__(self, path: str = WRITE_BEHIND_JOURNAL_PATH, max_attempts: int = WRITE_BEHIND_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # An acknowledged write must survive a crash
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(SCHEMA)
+
+    def _next_timestamp(self, demo_id: Optional[int] = None) -> datetime:
+        """Current time; for updates moved past every journaled write so that (demo_id, updated_at)
+        never matches an earlier insert or update"""
+        now = datetime.now(JST)
+        if demo_id is not None:
+            row = self._connection.execute("SELECT MAX(written_at) FROM mutations").fetchone()
+            if row[0]:
+                last = parse_timestamp(row[0])
+                if now <= last:
+                    now = last + timedelta(microseconds=1)
+        return now
+
+    def _pending_update_version(self, demo_id: int, expected_version: Dict) -> Dict:
+        """Version the demo will have once the latest pending update of demo_id is applied, if expected_version
+        was loaded before it (the row still has the version that update expects); otherwise expected_version"""
+        row = self._connection.execute(
+            "SELECT payload, written_at FROM mutations WHERE status = 'pending' AND operation = 'update' AND demo_id = ? "
+            "ORDER BY id DESC LIMIT 1", (demo_id,)
+        ).fetchone()
+        if row is None:
+            return expected_version
+        pending_expected = json.loads(row[0]).get("_expected_version")
+        if pending_expected is not None and pending_expected.get("updated_at") != str(expected_version.get("updated_at")):
+            return expected_version
+        return dict(expected_version, updated_at=row[1])
+
+    def _append(self, operation: str, demo_id: Optional[int], data: Dict, key_parts: List,
+                expected_version: Optional[Dict] = None) -> Dict:
+        with self._lock:
+            if expected_version:
+                # A second edit from the same loaded form follows the pending one instead of conflicting with it
+                data = dict(data, _expected_version=self._pending_update_version(demo_id, expected_version))
+            written_at = self._next_timestamp(demo_id)
+            key = json.dumps(key_parts + [written_at.strftime(TIMESTAMP_FORMAT)], ensure_ascii=False)
+            self._connection.execute(
+                "INSERT OR IGNORE INTO mutations (idempotency_key, operation, demo_id, payload, written_at) VALUES (?, ?, ?, ?, ?)",
+                (key, operation, demo_id, json.dumps(data, ensure_ascii=False, default=str), written_at.strftime(TIMESTAMP_FORMAT))
+            )
+        self._wake.set()
+        return {"idempotency_key": key, "written_at": written_at}
+
+    def append_insert(self, data: Dict) -> Dict:
+        return self._append("insert", None, data, ["insert", data.get("title"), data.get("owner_emp_id")])
+
+    def append_update(self, demo_id: int, data: Dict, expected_version: Optional[Dict] = None) -> Dict:
+        """expected_version (the version the form was loaded at) makes the applied UPDATE conditional"""
+        return self._append("update", int(demo_id), data, ["update", int(demo_id)], expected_version)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM mutations WHERE status = 'pending'").fetchone()[0]
+
+    def failed_count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM mutations WHERE status = 'failed'").fetchone()[0]
+
+    def _apply(self, db_manager, operation: str, demo_id: Optional[int], data: Dict, written_at: datetime,
+               expected_version: Optional[Dict] = None) -> Optional[int]:
+        """Apply one mutation unless it already reached the table; returns the demo_id"""
+        if operation == "insert":
+            existing_id = db_manager.find_demo_by_write_key(data["title"], data["owner_emp_id"], written_at)
+            if existing_id is None:
+                db_manager.insert_demo(data, created_at=written_at)
+                existing_id = db_manager.find_demo_by_write_key(data["title"], data["owner_emp_id"], written_at)
+                if existing_id is None:
+                    raise Exception("inserted row was not found")
+            return existing_id
+
+        if not db_manager.is_demo_updated_at(demo_id, written_at):
+            db_manager.update_demo(demo_id, data, updated_at=written_at, expected_version=expected_version)
+            if not db_manager.is_demo_updated_at(demo_id, written_at):
+                raise Exception("update was not applied")
+        return demo_id
+
+    def flush(self, db_manager, on_applied: Optional[Callable[[int, Optional[Dict]], None]] = None) -> int:
+        """Apply pending mutations in order; stops at the first one that has to be retried
+
+        Returns the number of applied mutations. on_applied is called with (demo_id, data).
+        """
+        applied = 0
+        while True:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT id, operation, demo_id, payload, written_at, attempts, next_attempt_at "
+                    "FROM mutations WHERE status = 'pending' ORDER BY id LIMIT 1"
+                ).fetchone()
+            if row is None:
+                return applied
+            mutation_id, operation, demo_id, payload, written_at, attempts, next_attempt_at = row
+            if next_attempt_at > time.time():
+                # Later mutations may depend on this one, so they wait too
+                return applied
+
+            data = json.loads(payload)
+            expected_version = data.pop("_expected_version", None)
+            written_at_dt = parse_timestamp(written_at)
+            try:
+                applied_demo_id = self._apply(db_manager, operation, demo_id, data, written_at_dt, expected_version)
+            except Exception as e:
+                attempts += 1
+                # A conflicting or deleted demo does not change by retrying
+                permanent = isinstance(e, (UpdateConflict, DemoNotFound))
+                status = "failed" if permanent or attempts >= self.max_attempts else "pending"
+                backoff = min(2 ** attempts, 300)
+                print(f"Write-behind {operation} #{mutation_id} failed (attempt {attempts}): {str(e)}")
+                with self._lock:
+                    self._connection.execute(
+                        "UPDATE mutations SET attempts = ?, status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (attempts, status, time.time() + backoff, str(e), mutation_id)
+                    )
+                if status == "pending":
+                    return applied
+                continue
+
+            with self._lock:
+                self._connection.execute(
+                    "UPDATE mutations SET status = 'applied', attempts = ?, applied_demo_id = ? WHERE id = ?",
+                    (attempts + 1, applied_demo_id, mutation_id)
+                )
+            applied += 1
+            if on_applied:
+                on_applied(applied_demo_id, data)
+
+    def start_flusher(self, manager_factory: Callable[[], object],
+                      on_applied: Optional[Callable[[int, Optional[Dict]], None]] = None,
+                      poll_seconds: float = WRITE_BEHIND_POLL_SECONDS):
+        """Run flush in a daemon thread, woken by new writes or every poll_seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                self._wake.wait(poll_seconds)
+                self._wake.clear()
+                try:
+                    if self.pending_count():
+                        self.flush(manager_factory(), on_applied)
+                except Exception as e:
+                    print(f"Write-behind flusher error: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name="write-behind-flusher", daemon=True)
+        self._thread.start()